@@ -11,7 +11,7 @@ from PySide6.QtWidgets import (
     QLabel,
     QApplication,
 )
-from PySide6.QtCore import Qt, QTimer, QThread, Signal
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import (
     QKeySequence,
     QShortcut,
@@ -24,180 +24,17 @@ from common_methods import (
 import os
 import json
 import toml
-import time
-
-
-class QueueProcessorThread(QThread):
-    """Thread séparé pour traiter les entrées de la file d'attente sans bloquer l'UI."""
-
-    # Signaux pour communiquer avec l'UI principale
-    entry_processed = Signal(dict, bool, str)  # entry, success, message
-    queue_updated = Signal()  # Signal pour indiquer que la file doit être rechargée
-    entry_cancelled = Signal(dict)  # Signal pour indiquer qu'une entrée a été annulée
-
-    def __init__(self, queue_file, db_manager):
-        super().__init__()
-        self.queue_file = queue_file
-        self.db_manager = db_manager
-        self._should_stop = False
-        self._current_processing_entry = (
-            None  # Entrée actuellement en cours de traitement
-        )
-        self._cancelled_entries = set()  # Set des timestamps des entrées annulées
-
-    def cancel_entry(self, entry_timestamp):
-        """Marque une entrée comme annulée pour arrêter son traitement."""
-        self._cancelled_entries.add(entry_timestamp)
-        print(f"🚫 Entrée marquée pour annulation : timestamp {entry_timestamp}")
-
-    def _is_entry_cancelled(self, entry):
-        """Vérifie si une entrée a été annulée."""
-        timestamp = entry.get("timestamp")
-        return timestamp in self._cancelled_entries
-
-    def stop(self):
-        """Arrête proprement le thread."""
-        print("🛑 Demande d'arrêt du thread de traitement...")
-        self._should_stop = True
-        self.quit()
-        self.wait()
-
-    def run(self):
-        """Boucle principale du thread de traitement."""
-        while not self._should_stop:
-            try:
-                # Vérifier s'il y a des entrées à traiter
-                if not os.path.exists(self.queue_file):
-                    self.msleep(5000)  # Attendre 5 secondes si pas de file
-                    continue
-
-                with open(self.queue_file, "r", encoding="utf-8") as f:
-                    queue_data = json.load(f)
-
-                # Chercher la première entrée en attente
-                entry_to_process = None
-                for entry in queue_data:
-                    if entry.get("status") == "pending":
-                        entry_to_process = entry
-                        break
-
-                if entry_to_process is None:
-                    self.msleep(5000)  # Pas d'entrée en attente, attendre 5 secondes
-                    continue
-
-                # Vérifier si l'entrée a été annulée avant de commencer le traitement
-                if self._is_entry_cancelled(entry_to_process):
-                    print(
-                        f"🚫 Entrée annulée, suppression de la file : {entry_to_process.get('question_data', '')[:50]}..."
-                    )
-                    # Supprimer l'entrée annulée de la file
-                    queue_data = [
-                        e
-                        for e in queue_data
-                        if e.get("timestamp") != entry_to_process.get("timestamp")
-                    ]
-                    with open(self.queue_file, "w", encoding="utf-8") as f:
-                        json.dump(queue_data, f, ensure_ascii=False, indent=2)
-                    # Émettre signal d'annulation
-                    self.entry_cancelled.emit(entry_to_process)
-                    continue
-
-                # Marquer l'entrée comme en cours de traitement et sauvegarder la référence
-                self._current_processing_entry = entry_to_process
-                entry_to_process["status"] = "processing"
-                entry_to_process["processing_start"] = time.time()
-
-                # Sauvegarder immédiatement le statut
-                with open(self.queue_file, "w", encoding="utf-8") as f:
-                    json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
-                print(
-                    f"🔄 Thread: Début traitement : {entry_to_process.get('question_data', '')[:50]}..."
-                )
-
-                try:
-                    # Vérifier une dernière fois si l'entrée a été annulée pendant le traitement
-                    if self._is_entry_cancelled(entry_to_process):
-                        print(
-                            f"🚫 Traitement annulé en cours : {entry_to_process.get('question_data', '')[:50]}..."
-                        )
-                        # Marquer comme annulée et supprimer de la file
-                        queue_data = [
-                            e
-                            for e in queue_data
-                            if e.get("timestamp") != entry_to_process.get("timestamp")
-                        ]
-                        with open(self.queue_file, "w", encoding="utf-8") as f:
-                            json.dump(queue_data, f, ensure_ascii=False, indent=2)
-                        self.entry_cancelled.emit(entry_to_process)
-                        self._current_processing_entry = None
-                        continue
-
-                    # Traitement dans le thread séparé - opérations lourdes
-                    # Vérifier à nouveau si on doit s'arrêter avant le traitement DB
-                    if self._should_stop:
-                        print("🛑 Arrêt demandé pendant le traitement")
-                        break
-
-                    self.db_manager.insert_record(
-                        entry_to_process.get("file_path", ""),
-                        entry_to_process.get("question_data", ""),
-                        entry_to_process.get("response_data", ""),
-                        entry_to_process.get("start_time"),
-                        entry_to_process.get("end_time"),
-                        attribution=entry_to_process.get(
-                            "attribution", "no-attribution"
-                        ),
-                    )
-
-                    # Marquer comme complété
-                    entry_to_process["status"] = "completed"
-                    entry_to_process["completed_at"] = time.time()
-                    processing_time = (
-                        entry_to_process["completed_at"]
-                        - entry_to_process["processing_start"]
-                    )
-
-                    # Émettre le signal de succès
-                    self.entry_processed.emit(
-                        entry_to_process, True, f"Traité en {processing_time:.1f}s"
-                    )
-
-                except Exception as e:
-                    # Marquer comme erreur
-                    entry_to_process["status"] = "error"
-                    entry_to_process["error_message"] = str(e)
-                    entry_to_process["error_at"] = time.time()
-
-                    # Émettre le signal d'erreur
-                    self.entry_processed.emit(entry_to_process, False, str(e))
-
-                # Nettoyer la référence à l'entrée en cours de traitement
-                self._current_processing_entry = None
-
-                # Sauvegarder l'état final
-                with open(self.queue_file, "w", encoding="utf-8") as f:
-                    json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
-                # Émettre signal de mise à jour de la file
-                self.queue_updated.emit()
-
-                # Courte pause avant de traiter la suivante
-                self.msleep(1000)
-
-            except Exception as e:
-                print(f"Erreur dans le thread de traitement : {e}")
-                # Nettoyer la référence en cas d'erreur
-                self._current_processing_entry = None
-
-                # Vérifier si on doit s'arrêter même en cas d'erreur
-                if self._should_stop:
-                    print("🛑 Arrêt demandé après erreur")
-                    break
-
-                self.msleep(5000)
-
-        print("🏁 Thread de traitement terminé")
+from db import INSERT_OK, INSERT_FAILED
+from tts_backfill import start_tts_backfill
+from autosave import AutosaveWriter
+from addition_queue import (
+    AdditionQueue,
+    JOB_COMPLETED,
+    JOB_ERROR,
+    JOB_PENDING,
+    JOB_PROCESSING,
+    start_addition_queue,
+)
 
 
 class ProcessInputsWorker(multiprocessing.Process):
@@ -224,7 +61,7 @@ class ProcessInputsWorker(multiprocessing.Process):
 
     def run(self):
         try:
-            self.db_manager.insert_record(
+            status = self.db_manager.insert_record(
                 self.file_path,
                 self.question_data,
                 self.response_data,
@@ -232,16 +69,23 @@ class ProcessInputsWorker(multiprocessing.Process):
                 self.end_time,
                 attribution=self.attribution,
             )
-            self.queue.put((True, "Entrée enregistrée avec succès !"))
+            if status == INSERT_FAILED:
+                self.queue.put((False, "Échec de l'enregistrement de l'entrée."))
+            elif status != INSERT_OK:
+                self.queue.put((False, "Cette entrée existe déjà."))
+            else:
+                self.queue.put((True, "Entrée enregistrée avec succès !"))
         except Exception as e:
             self.queue.put((False, f"Échec de l'enregistrement : {e}"))
+        finally:
+            # db_manager a été copié dans ce processus : il y a ouvert sa connexion
+            self.db_manager.release_connection()
 
 
 class AudioSaverApp(QWidget):
     AUTOSAVE_FILE = os.path.join(
         os.path.dirname(__file__), "tmp", ".addition_autosave.json"
     )
-    QUEUE_FILE = os.path.join(os.path.dirname(__file__), "tmp", ".addition_queue.json")
 
     def __init__(self, db_manager, font_size=12):  # Ajout de font_size
         super().__init__()
@@ -258,25 +102,24 @@ class AudioSaverApp(QWidget):
         tmp_dir = os.path.join(os.path.dirname(__file__), "tmp")
         os.makedirs(tmp_dir, exist_ok=True)
 
+        # Brouillon du formulaire : sauvegarde différée, écrite hors du thread de
+        # l'interface (thread créé à l'ouverture, arrêté à la fermeture)
+        self._autosave = None
+
         # Variable pour éviter les traitements simultanés
         self._is_processing = False
 
         # Variable pour stocker la dernière entrée ajoutée (pour annulation)
         self._last_added_entry = None
 
-        # Créer et démarrer le thread de traitement
-        self._processor_thread = QueueProcessorThread(self.QUEUE_FILE, self.db_manager)
+        # File d'attente des ajouts (table addition_jobs), traitée en arrière-plan,
+        # y compris après la fermeture de cette fenêtre
+        self._queue = AdditionQueue(self.db_manager)
+        self._processor_thread = start_addition_queue(self.db_manager)
         self._processor_thread.entry_processed.connect(self._on_entry_processed)
         self._processor_thread.queue_updated.connect(self._on_queue_updated)
-        self._processor_thread.entry_cancelled.connect(self._on_entry_cancelled)
-        self._processor_thread.start()
 
-        # Timer pour vérification périodique de la file d'attente
-        self._queue_timer = QTimer()
-        self._queue_timer.timeout.connect(self._check_queue_status)
-        self._queue_timer.start(10000)  # Vérifie toutes les 10 secondes
-
-        # Vérifier et reprendre le traitement de la file d'attente existante au démarrage
+        # Signaler les entrées restées en attente ou en erreur
         self._resume_existing_queue()
 
         # Récupère l'info sur la base de données courante
@@ -294,184 +137,77 @@ class AudioSaverApp(QWidget):
             print(f"✓ Thread: {message}")
         else:
             print(f"✗ Thread: Erreur - {message}")
-            # Notifier l'utilisateur des erreurs persistantes
+            if not self.isVisible():
+                # Fenêtre fermée : l'entrée reste en erreur dans la file
+                return
+            # Notifier l'utilisateur des erreurs persistantes (essais épuisés)
             question_preview = (
                 entry.get("question_data", "")[:50] + "..."
                 if len(entry.get("question_data", "")) > 50
                 else entry.get("question_data", "")
             )
             QTimer.singleShot(
-                100, lambda: self._notify_user_error(message, question_preview)
+                100,
+                lambda: self._notify_user_error(
+                    message, question_preview, entry.get("id")
+                ),
             )
 
-    def _on_entry_cancelled(self, entry):
-        """Callback appelé quand une entrée est annulée dans le thread."""
-        print(f"🚫 Entrée annulée : {entry.get('question_data', '')[:50]}...")
-
     def _on_queue_updated(self):
         """Callback appelé quand la file d'attente est mise à jour."""
         # Cette méthode peut être utilisée pour rafraîchir l'UI si nécessaire
         pass
 
-    def _check_queue_status(self):
-        """Vérifie périodiquement le statut de la file d'attente."""
-        try:
-            if not os.path.exists(self.QUEUE_FILE):
-                return
-
-            with open(self.QUEUE_FILE, "r", encoding="utf-8") as f:
-                queue_data = json.load(f)
-
-            # Nettoyer les entrées très anciennes et timeout les traitements bloqués
-            current_time = time.time()
-            updated = False
-
-            for entry in queue_data:
-                # Timeout pour les traitements trop longs (>15 minutes)
-                if entry.get("status") == "processing":
-                    processing_start = entry.get("processing_start", 0)
-                    if current_time - processing_start > 900:  # 15 minutes
-                        entry["status"] = "error"
-                        entry["error_message"] = (
-                            "Timeout - traitement trop long (>15min)"
-                        )
-                        entry["error_at"] = current_time
-                        print(
-                            f"⏰ Timeout sur entrée : {entry.get('question_data', '')[:50]}..."
-                        )
-                        updated = True
-
-                        # Notifier immédiatement l'utilisateur du timeout
-                        question_preview = (
-                            entry.get("question_data", "")[:50] + "..."
-                            if len(entry.get("question_data", "")) > 50
-                            else entry.get("question_data", "")
-                        )
-
-                        # Déclencher la notification dans le thread principal
-                        def show_timeout_notification():
-                            self._notify_user_error(
-                                "Timeout - traitement trop long (>15min)",
-                                question_preview,
-                            )
-
-                        QTimer.singleShot(100, show_timeout_notification)
-
-            if updated:
-                with open(self.QUEUE_FILE, "w", encoding="utf-8") as f:
-                    json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
-        except Exception as e:
-            print(f"Erreur lors de la vérification périodique : {e}")
-
-    def closeEvent(self, event):
-        """Fermeture propre avec arrêt du thread."""
+    def _resume_existing_queue(self):
+        """Signale les entrées de la file d'attente restées en attente ou en erreur
+        (le thread de traitement les reprend de lui-même)."""
         try:
-            # Arrêter le timer de vérification
-            if hasattr(self, "_queue_timer") and self._queue_timer:
-                self._queue_timer.stop()
-
-            # Arrêter proprement le thread de traitement
-            if hasattr(self, "_processor_thread") and self._processor_thread:
-                print("🛑 Arrêt du thread de traitement...")
-                self._processor_thread.stop()
-
-                # Attendre que le thread se termine (maximum 3 secondes)
-                if not self._processor_thread.wait(3000):
-                    print("⚠️ Thread non terminé dans les 3 secondes, forçage...")
-                    self._processor_thread.terminate()
-                    self._processor_thread.wait(1000)
-
-                print("✓ Thread arrêté")
-
+            counts = self._queue.counts()
         except Exception as e:
-            print(f"Erreur lors de la fermeture : {e}")
-        finally:
-            super().closeEvent(event)
-
-    def _resume_existing_queue(self):
-        """Vérifie s'il y a une file d'attente existante et reprend le traitement."""
-        if os.path.exists(self.QUEUE_FILE):
-            try:
-                with open(self.QUEUE_FILE, "r", encoding="utf-8") as f:
-                    queue_data = json.load(f)
-
-                # Compter les entrées en attente
-                pending_count = sum(
-                    1 for entry in queue_data if entry.get("status") == "pending"
-                )
-                processing_count = sum(
-                    1 for entry in queue_data if entry.get("status") == "processing"
-                )
-                error_count = sum(
-                    1 for entry in queue_data if entry.get("status") == "error"
+            print(f"Erreur lors de la lecture de la file d'attente existante : {e}")
+            return
+        pending_count = counts[JOB_PENDING]
+        processing_count = counts[JOB_PROCESSING]
+        error_count = counts[JOB_ERROR]
+        if pending_count > 0 or processing_count > 0 or error_count > 0:
+            print(
+                f"File d'attente trouvée : {pending_count} entrées en attente, {processing_count} en cours, {error_count} en erreur"
+            )
+            if error_count > 0:
+                print(
+                    f"⚠️ {error_count} entrée(s) en erreur - vérifiez les notifications"
                 )
-
-                if pending_count > 0 or processing_count > 0 or error_count > 0:
-                    print(
-                        f"File d'attente trouvée : {pending_count} entrées en attente, {processing_count} en cours, {error_count} en erreur"
-                    )
-                    if error_count > 0:
-                        print(
-                            f"⚠️ {error_count} entrée(s) en erreur - vérifiez les notifications"
-                        )
-                    print("Reprise du traitement en arrière-plan via thread...")
-
-                    # Le thread se chargera automatiquement du traitement
-
-            except Exception as e:
-                print(f"Erreur lors de la lecture de la file d'attente existante : {e}")
+            print("Reprise du traitement en arrière-plan via thread...")
 
     def _add_to_queue(self, entry_data):
-        """Ajoute une entrée à la file d'attente JSON."""
+        """Ajoute une entrée à la file d'attente et réveille le thread de traitement.
+        Renvoie l'identifiant du travail, ou None en cas d'échec ou de doublon."""
         try:
-            # Charger la file existante ou créer une nouvelle
-            queue_data = []
-            if os.path.exists(self.QUEUE_FILE):
-                with open(self.QUEUE_FILE, "r", encoding="utf-8") as f:
-                    queue_data = json.load(f)
-
-            # Vérifier s'il n'y a pas déjà une entrée identique récente
-            current_time = time.time()
-            for existing_entry in queue_data:
-                if (
-                    existing_entry.get("status") in ["pending", "processing"]
-                    and existing_entry.get("question_data")
-                    == entry_data.get("question_data")
-                    and existing_entry.get("response_data")
-                    == entry_data.get("response_data")
-                    and abs(current_time - existing_entry.get("timestamp", 0)) < 5
-                ):  # 5 secondes de protection
-                    print("⚠️ Entrée identique déjà en file d'attente, ignorée")
-                    return False
-
-            # Ajouter la nouvelle entrée avec timestamp
-            entry_data["timestamp"] = current_time
-            entry_data["status"] = "pending"
-            queue_data.append(entry_data)
-
-            # Sauvegarder la file mise à jour
-            with open(self.QUEUE_FILE, "w", encoding="utf-8") as f:
-                json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
+            job_id = self._queue.enqueue(entry_data)
+            if job_id is None:
+                print("⚠️ Entrée identique déjà en file d'attente, ignorée")
+                return None
+            self._processor_thread.wake()
             print("✓ Entrée ajoutée à la file d'attente")
-            return True
+            return job_id
         except Exception as e:
             print(f"Erreur lors de l'ajout à la file d'attente : {e}")
-            return False
+            return None
 
-    def _notify_user_error(self, error_message, question_preview):
+    def _notify_user_error(self, error_message, question_preview, job_id):
         """Notifie l'utilisateur d'une erreur persistante."""
         try:
             # Notification non-bloquante pour l'utilisateur
             QTimer.singleShot(
                 0,
-                lambda: self._show_error_notification(error_message, question_preview),
+                lambda: self._show_error_notification(
+                    error_message, question_preview, job_id
+                ),
             )
         except Exception as e:
             print(f"Erreur lors de la notification utilisateur : {e}")
 
-    def _show_error_notification(self, error_message, question_preview):
+    def _show_error_notification(self, error_message, question_preview, job_id):
         """Affiche une notification d'erreur à l'utilisateur."""
         try:
             msg_box = QMessageBox(self)
@@ -495,90 +231,51 @@ class AudioSaverApp(QWidget):
             # Gestion des réponses
             msg_box.finished.connect(
                 lambda result: self._handle_error_response(
-                    result, msg_box, question_preview
+                    result, msg_box, question_preview, job_id
                 )
             )
 
         except Exception as e:
             print(f"Erreur lors de l'affichage de la notification : {e}")
 
-    def _handle_error_response(self, result, msg_box, question_preview):
+    def _handle_error_response(self, result, msg_box, question_preview, job_id):
         """Gère la réponse de l'utilisateur à une notification d'erreur."""
         try:
             clicked_button = msg_box.clickedButton()
             button_text = clicked_button.text() if clicked_button else ""
 
             if "Réessayer" in button_text:
-                self._retry_failed_entry(question_preview)
+                self._retry_failed_entry(job_id, question_preview)
             elif "Ignorer" in button_text:
-                self._remove_failed_entry(question_preview)
+                self._remove_failed_entry(job_id, question_preview)
 
         except Exception as e:
             print(f"Erreur lors de la gestion de la réponse : {e}")
 
-    def _retry_failed_entry(self, question_preview):
-        """Remet une entrée échouée en statut 'pending' pour retry."""
+    def _retry_failed_entry(self, job_id, question_preview):
+        """Remet une entrée échouée en attente, avec de nouveaux essais."""
         try:
-            if not os.path.exists(self.QUEUE_FILE):
-                return
-
-            with open(self.QUEUE_FILE, "r", encoding="utf-8") as f:
-                queue_data = json.load(f)
-
-            # Trouver et remettre en pending
-            for entry in queue_data:
-                if entry.get("status") == "error" and question_preview in entry.get(
-                    "question_data", ""
-                ):
-                    entry["status"] = "pending"
-                    entry.pop("error_message", None)
-                    entry.pop("error_at", None)
-                    entry.pop("error_reported", None)
-                    print(f"↻ Remise en file d'attente : {question_preview}")
-                    break
-
-            # Sauvegarder
-            with open(self.QUEUE_FILE, "w", encoding="utf-8") as f:
-                json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
-            # Le thread reprendra automatiquement le traitement
-
+            if self._queue.retry(job_id):
+                print(f"↻ Remise en file d'attente : {question_preview}")
+                self._processor_thread.wake()
         except Exception as e:
             print(f"Erreur lors du retry : {e}")
 
-    def _remove_failed_entry(self, question_preview):
+    def _remove_failed_entry(self, job_id, question_preview):
         """Supprime définitivement une entrée échouée de la file."""
         try:
-            if not os.path.exists(self.QUEUE_FILE):
-                return
-
-            with open(self.QUEUE_FILE, "r", encoding="utf-8") as f:
-                queue_data = json.load(f)
-
-            # Filtrer l'entrée échouée
-            original_count = len(queue_data)
-            queue_data = [
-                entry
-                for entry in queue_data
-                if not (
-                    entry.get("status") == "error"
-                    and question_preview in entry.get("question_data", "")
-                )
-            ]
-
-            if len(queue_data) < original_count:
+            if self._queue.cancel(job_id) == JOB_ERROR:
                 print(f"🗑️ Entrée supprimée de la file : {question_preview}")
-
-                # Sauvegarder
-                with open(self.QUEUE_FILE, "w", encoding="utf-8") as f:
-                    json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
         except Exception as e:
             print(f"Erreur lors de la suppression : {e}")
 
     def auto_save(self):
-        """Sauvegarde automatique de l'état du formulaire dans le dossier tmp."""
-        state = {
+        """Sauvegarde automatique de l'état du formulaire dans le dossier tmp
+        (regroupe les modifications rapprochées, voir autosave)."""
+        self._autosave.schedule()
+
+    def _form_state(self) -> dict:
+        return {
             "file_path": self.file_path_input.text(),
             "start_time": self.start_time_input.text(),
             "end_time": self.end_time_input.text(),
@@ -586,11 +283,6 @@ class AudioSaverApp(QWidget):
             "responses": self.responses_input.toPlainText(),
             "attribution": self.attribution_input.text(),
         }
-        try:
-            with open(self.AUTOSAVE_FILE, "w", encoding="utf-8") as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erreur lors de l'auto-sauvegarde : {e}")
 
     def try_restore_autosave(self):
         """Propose de restaurer l'état si une sauvegarde existe."""
@@ -618,13 +310,21 @@ class AudioSaverApp(QWidget):
                 # On ne supprime pas la sauvegarde ici, seulement après succès
 
     def clear_autosave(self):
-        try:
-            if os.path.exists(self.AUTOSAVE_FILE):
-                os.remove(self.AUTOSAVE_FILE)
-        except Exception as e:
-            print(f"Erreur lors de la suppression de l'auto-sauvegarde : {e}")
+        # Annule aussi une sauvegarde encore en attente
+        self._autosave.discard()
+
+    def closeEvent(self, event):
+        """Écrit le brouillon en attente et arrête son thread avant la fermeture."""
+        if self._autosave is not None:
+            self._autosave.close()
+        super().closeEvent(event)
 
     def initialize_ui(self):
+        # Fenêtre rouverte : la fermeture a arrêté le thread d'auto-sauvegarde
+        if self._autosave is None or self._autosave.closed:
+            self._autosave = AutosaveWriter(
+                self.AUTOSAVE_FILE, self._form_state, parent=self
+            )
         # Supprimer le layout existant s'il y en a un (pour éviter les doublons et erreurs)
         old_layout = self.layout()
         if old_layout is not None:
@@ -951,22 +651,37 @@ class AudioSaverApp(QWidget):
         if not lines:
             QMessageBox.warning(self, "Erreur", "Aucune phrase saisie.")
             return
-        count = 0
         progress_helper.show(len(lines))
-        for idx, word in enumerate(lines, start=1):
-            try:
-                self.db_manager.insert_record(
-                    media_file="",
-                    question="(?)",
-                    response=word,
-                    attribution="no-attribution",
-                )
-                count += 1
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur sur '{word}': {e}")
-            progress_helper.set_value(idx)
+        # Insertion immédiate ; l'audio TTS est généré en arrière-plan
+        statuses = self.db_manager.insert_records_batch(
+            [
+                {
+                    "media_file": "",
+                    "question": "(?)",
+                    "response": word,
+                    "attribution": "no-attribution",
+                }
+                for word in lines
+            ],
+            progress_callback=progress_helper.set_value,
+            defer_tts=True,
+        )
         progress_helper.hide()
-        QMessageBox.information(self, "Succès", f"{count} entrées ajoutées.")
+        count = statuses.count(INSERT_OK)
+        if count:
+            start_tts_backfill(self.db_manager)
+        failed_words = [
+            word for word, status in zip(lines, statuses) if status == INSERT_FAILED
+        ]
+        if failed_words:
+            QMessageBox.critical(
+                self, "Erreur", f"Erreur sur : {', '.join(failed_words)}"
+            )
+        QMessageBox.information(
+            self,
+            "Succès",
+            f"{count} entrées ajoutées. Les audios sont générés en arrière-plan.",
+        )
         quick_dialog.accept()
 
     def safe_close(self):
@@ -1071,7 +786,8 @@ class AudioSaverApp(QWidget):
         }
 
         # Ajouter à la file d'attente
-        if self._add_to_queue(entry_data):
+        job_id = self._add_to_queue(entry_data)
+        if job_id is not None:
             # Jouer le son de succès
             from common_methods import MediaUtils
 
@@ -1079,9 +795,9 @@ class AudioSaverApp(QWidget):
 
             # Sauvegarder les données de la dernière entrée ajoutée pour annulation
             self._last_added_entry = {
+                "id": job_id,
                 "question_data": question_data,
                 "response_data": response_data,
-                "timestamp": time.time(),
             }
 
             # Afficher message de succès avec bouton d'annulation
@@ -1185,35 +901,10 @@ class AudioSaverApp(QWidget):
                 )
                 return
 
-            if not os.path.exists(self.QUEUE_FILE):
-                QMessageBox.warning(
-                    self, "Annulation impossible", "La file d'attente n'existe plus."
-                )
-                return
-
-            last_entry = self._last_added_entry
-            entry_timestamp = last_entry.get("timestamp")
-
-            # Signaler au thread que cette entrée doit être annulée
-            if hasattr(self, "_processor_thread") and self._processor_thread:
-                self._processor_thread.cancel_entry(entry_timestamp)
-
-            with open(self.QUEUE_FILE, "r", encoding="utf-8") as f:
-                queue_data = json.load(f)
-
-            # Chercher l'entrée correspondante
-            target_entry = None
-            for entry in queue_data:
-                if (
-                    entry.get("question_data") == last_entry.get("question_data")
-                    and entry.get("response_data") == last_entry.get("response_data")
-                    and abs(entry.get("timestamp", 0) - entry_timestamp)
-                    < 2  # Tolérance de 2 secondes
-                ):
-                    target_entry = entry
-                    break
+            # Suppression atomique si l'entrée est encore en attente ou en erreur
+            entry_status = self._queue.cancel(self._last_added_entry["id"])
 
-            if not target_entry:
+            if entry_status is None:
                 QMessageBox.warning(
                     self,
                     "Annulation échouée",
@@ -1221,17 +912,7 @@ class AudioSaverApp(QWidget):
                 )
                 return
 
-            # Vérifier le statut de l'entrée
-            entry_status = target_entry.get("status", "unknown")
-
-            if entry_status == "pending":
-                # Entrée en attente : suppression directe de la file
-                queue_data = [
-                    e for e in queue_data if e.get("timestamp") != entry_timestamp
-                ]
-                with open(self.QUEUE_FILE, "w", encoding="utf-8") as f:
-                    json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
+            if entry_status == JOB_PENDING:
                 print("🗑️ Entrée en attente annulée et supprimée")
                 QMessageBox.information(
                     self,
@@ -1239,16 +920,15 @@ class AudioSaverApp(QWidget):
                     "L'entrée en attente a été annulée avec succès.",
                 )
 
-            elif entry_status == "processing":
-                # Entrée en cours de traitement : le thread l'arrêtera
-                print("🚫 Demande d'arrêt pour l'entrée en cours de traitement")
-                QMessageBox.information(
+            elif entry_status == JOB_PROCESSING:
+                QMessageBox.warning(
                     self,
-                    "Annulation en cours",
-                    "L'entrée est en cours de traitement.\nL'annulation va être appliquée dès que possible.",
+                    "Annulation impossible",
+                    "L'entrée est en cours d'enregistrement.\nImpossible d'annuler.",
                 )
+                return
 
-            elif entry_status == "completed":
+            elif entry_status == JOB_COMPLETED:
                 QMessageBox.warning(
                     self,
                     "Annulation impossible",
@@ -1256,14 +936,7 @@ class AudioSaverApp(QWidget):
                 )
                 return
 
-            elif entry_status == "error":
-                # Entrée en erreur : suppression directe
-                queue_data = [
-                    e for e in queue_data if e.get("timestamp") != entry_timestamp
-                ]
-                with open(self.QUEUE_FILE, "w", encoding="utf-8") as f:
-                    json.dump(queue_data, f, ensure_ascii=False, indent=2)
-
+            elif entry_status == JOB_ERROR:
                 print("🗑️ Entrée en erreur supprimée")
                 QMessageBox.information(
                     self,
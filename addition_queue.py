@@ -0,0 +1,384 @@
+"""File d'attente des ajouts, stockée dans la base (table addition_jobs).
+
+La fenêtre d'ajout enregistre chaque entrée soumise comme un travail (enqueue)
+et réveille aussitôt le thread de traitement. Les travaux sont réservés par une
+seule instruction UPDATE ... RETURNING : plusieurs workers peuvent traiter la
+file en même temps sans prendre deux fois le même. Un échec est retenté après un
+délai croissant (retry_delay, puis le double, etc.) ; après max_retries essais
+le travail passe en erreur, où l'utilisateur peut le relancer ou l'abandonner.
+
+Un travail resté « processing » après un arrêt brutal est remis en attente au
+démarrage suivant (requeue_interrupted). L'ancienne file JSON
+(tmp/.addition_queue.json) est reprise dans la table puis supprimée.
+"""
+
+import json
+import os
+import threading
+import time
+from PySide6.QtCore import QThread, Signal
+from logger import logger
+from db import INSERT_DUPLICATE, INSERT_FAILED
+
+JOB_PENDING = "pending"
+JOB_PROCESSING = "processing"
+JOB_COMPLETED = "completed"
+JOB_ERROR = "error"
+
+# Travaux traités simultanément (insertion, découpe du média, synthèse TTS)
+ADDITION_WORKERS = 2
+# Nouveaux essais après un échec, espacés de ADDITION_RETRY_DELAY puis du double
+ADDITION_MAX_RETRIES = 3
+ADDITION_RETRY_DELAY = 2.0
+# Protection contre la double soumission d'une même entrée (s)
+DUPLICATE_WINDOW = 5.0
+# Travaux terminés conservés (annulation impossible, message explicite) (s)
+COMPLETED_RETENTION = 24 * 3600
+
+LEGACY_QUEUE_FILE = os.path.join(
+    os.path.dirname(__file__), "tmp", ".addition_queue.json"
+)
+
+_JOB_COLUMNS = (
+    "id, file_path, question, response, start_time_ms, end_time_ms, attribution,"
+    " status, attempts, created_at, error_message"
+)
+
+
+class AdditionQueue:
+    """Accès à la table addition_jobs (connexion du thread appelant)."""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    @staticmethod
+    def _job(query) -> dict:
+        def value(index):
+            return None if query.isNull(index) else query.value(index)
+
+        # Clés reprises de l'ancienne file JSON, utilisées par la fenêtre d'ajout
+        return {
+            "id": query.value(0),
+            "file_path": query.value(1),
+            "question_data": query.value(2),
+            "response_data": query.value(3),
+            "start_time": value(4),
+            "end_time": value(5),
+            "attribution": query.value(6),
+            "status": query.value(7),
+            "attempts": query.value(8),
+            "timestamp": query.value(9),
+            "error_message": value(10),
+        }
+
+    def enqueue(self, entry: dict, created_at: float = None, status=JOB_PENDING):
+        """Ajoute un travail ; renvoie son identifiant, ou None si la même entrée a
+        été soumise il y a moins de DUPLICATE_WINDOW secondes."""
+        now = created_at or time.time()
+        question = entry.get("question_data", "")
+        response = entry.get("response_data", "")
+        if (
+            self.db_manager._scalar(
+                "SELECT 1 FROM addition_jobs WHERE status IN (?, ?) AND question = ? AND response = ? AND created_at > ?",
+                [
+                    JOB_PENDING,
+                    JOB_PROCESSING,
+                    question,
+                    response,
+                    now - DUPLICATE_WINDOW,
+                ],
+            )
+            is not None
+        ):
+            return None
+        query = self.db_manager._exec_sql(
+            """
+            INSERT INTO addition_jobs (file_path, question, response, start_time_ms,
+                end_time_ms, attribution, status, created_at, available_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                entry.get("file_path", ""),
+                question,
+                response,
+                entry.get("start_time"),
+                entry.get("end_time"),
+                entry.get("attribution") or "no-attribution",
+                status,
+                now,
+                now,
+            ],
+        )
+        return query.lastInsertId()
+
+    def claim(self):
+        """Réserve le plus ancien travail prêt ; renvoie le travail ou None."""
+        now = time.time()
+        query = self.db_manager._exec_sql(
+            f"""
+            UPDATE addition_jobs SET status = ?, started_at = ?, attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM addition_jobs
+                WHERE status = ? AND available_at <= ? ORDER BY available_at, id LIMIT 1
+            )
+            RETURNING {_JOB_COLUMNS}
+            """,
+            [JOB_PROCESSING, now, JOB_PENDING, now],
+        )
+        job = self._job(query) if query.next() else None
+        query.finish()
+        return job
+
+    def next_available_in(self):
+        """Secondes avant que le prochain travail en attente soit prêt (0 s'il l'est
+        déjà), None si la file ne contient aucun travail en attente."""
+        available_at = self.db_manager._scalar(
+            "SELECT available_at FROM addition_jobs WHERE status = ? ORDER BY available_at LIMIT 1",
+            [JOB_PENDING],
+        )
+        if available_at is None:
+            return None
+        return max(0.0, float(available_at) - time.time())
+
+    def complete(self, job_id):
+        self.db_manager._exec_sql(
+            "UPDATE addition_jobs SET status = ?, finished_at = ?, error_message = NULL WHERE id = ?",
+            [JOB_COMPLETED, time.time(), job_id],
+        )
+
+    def fail(self, job: dict, message: str, max_retries: int, retry_delay: float):
+        """Enregistre l'échec d'un travail réservé. Renvoie True si un nouvel essai
+        est programmé, False si le travail passe en erreur."""
+        attempts = job["attempts"]
+        if attempts <= max_retries:
+            self.db_manager._exec_sql(
+                "UPDATE addition_jobs SET status = ?, available_at = ?, error_message = ? WHERE id = ? AND status = ?",
+                [
+                    JOB_PENDING,
+                    time.time() + retry_delay * 2 ** (attempts - 1),
+                    message,
+                    job["id"],
+                    JOB_PROCESSING,
+                ],
+            )
+            return True
+        self.db_manager._exec_sql(
+            "UPDATE addition_jobs SET status = ?, finished_at = ?, error_message = ? WHERE id = ? AND status = ?",
+            [JOB_ERROR, time.time(), message, job["id"], JOB_PROCESSING],
+        )
+        return False
+
+    def status(self, job_id):
+        return self.db_manager._scalar(
+            "SELECT status FROM addition_jobs WHERE id = ?", [job_id]
+        )
+
+    def cancel(self, job_id):
+        """Supprime un travail en attente ou en erreur. Renvoie son statut avant
+        l'annulation (None s'il n'existe plus) ; un travail en cours ou terminé
+        n'est pas supprimé."""
+        status = self.status(job_id)
+        if status in (JOB_PENDING, JOB_ERROR):
+            query = self.db_manager._exec_sql(
+                "DELETE FROM addition_jobs WHERE id = ? AND status IN (?, ?)",
+                [job_id, JOB_PENDING, JOB_ERROR],
+            )
+            if query.numRowsAffected() == 0:
+                # Réservé entre-temps par un worker
+                return self.status(job_id)
+        return status
+
+    def retry(self, job_id) -> bool:
+        """Remet en attente un travail en erreur, avec de nouveaux essais."""
+        query = self.db_manager._exec_sql(
+            "UPDATE addition_jobs SET status = ?, attempts = 0, available_at = ?, error_message = NULL WHERE id = ? AND status = ?",
+            [JOB_PENDING, time.time(), job_id, JOB_ERROR],
+        )
+        return query.numRowsAffected() > 0
+
+    def counts(self) -> dict:
+        """Nombre de travaux par statut."""
+        query = self.db_manager._exec_sql(
+            "SELECT status, COUNT(*) FROM addition_jobs GROUP BY status"
+        )
+        counts = dict.fromkeys((JOB_PENDING, JOB_PROCESSING, JOB_ERROR), 0)
+        while query.next():
+            counts[query.value(0)] = query.value(1)
+        query.finish()
+        return counts
+
+    def requeue_interrupted(self) -> int:
+        """Remet en attente les travaux restés en cours (arrêt brutal) et oublie les
+        travaux terminés depuis plus de COMPLETED_RETENTION secondes."""
+        now = time.time()
+        self.db_manager._exec_sql(
+            "DELETE FROM addition_jobs WHERE status = ? AND finished_at < ?",
+            [JOB_COMPLETED, now - COMPLETED_RETENTION],
+        )
+        query = self.db_manager._exec_sql(
+            "UPDATE addition_jobs SET status = ?, available_at = ? WHERE status = ?",
+            [JOB_PENDING, now, JOB_PROCESSING],
+        )
+        return query.numRowsAffected()
+
+    def import_legacy_file(self, path: str = LEGACY_QUEUE_FILE) -> int:
+        """Reprend les entrées non terminées de l'ancienne file JSON, puis supprime
+        le fichier. Renvoie le nombre d'entrées reprises."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            queue_data = json.load(f)
+        imported = 0
+        for entry in queue_data:
+            status = entry.get("status")
+            if status not in (JOB_PENDING, JOB_PROCESSING, JOB_ERROR):
+                continue
+            created_at = entry.get("timestamp") or time.time()
+            job_id = self.enqueue(
+                entry,
+                created_at=created_at,
+                status=JOB_ERROR if status == JOB_ERROR else JOB_PENDING,
+            )
+            if job_id is not None:
+                imported += 1
+        os.remove(path)
+        logger.info(f"File d'ajout JSON reprise dans la base : {imported} entrée(s).")
+        return imported
+
+
+class AdditionQueueThread(QThread):
+    """Traite la file des ajouts avec plusieurs workers ; attend, sans
+    scrutation, qu'un travail soit ajouté (wake) ou qu'un nouvel essai arrive à
+    échéance."""
+
+    entry_processed = Signal(dict, bool, str)  # travail, succès, message
+    queue_updated = Signal()  # la file a changé (travail terminé ou en erreur)
+
+    def __init__(
+        self,
+        db_manager,
+        workers: int = ADDITION_WORKERS,
+        max_retries: int = ADDITION_MAX_RETRIES,
+        retry_delay: float = ADDITION_RETRY_DELAY,
+    ):
+        super().__init__()
+        self.db_manager = db_manager
+        self.workers = max(1, workers)
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+        self._condition = threading.Condition()
+        # Incrémenté à chaque réveil : un worker n'attend que si rien n'a changé
+        # depuis sa dernière recherche de travail
+        self._generation = 0
+        self._stop_requested = False
+
+    def wake(self):
+        """Signale un travail ajouté ou remis en attente."""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def stop(self):
+        """Arrête les workers après leur travail en cours ; les travaux restants
+        seront traités au prochain démarrage."""
+        with self._condition:
+            self._stop_requested = True
+            self._condition.notify_all()
+
+    def run(self):
+        helpers = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.workers - 1)
+        ]
+        for helper in helpers:
+            helper.start()
+        self._work()
+        for helper in helpers:
+            helper.join()
+
+    def _work(self):
+        queue = AdditionQueue(self.db_manager)
+        try:
+            while True:
+                with self._condition:
+                    if self._stop_requested:
+                        break
+                    generation = self._generation
+                job = queue.claim()
+                if job is not None:
+                    self._process(queue, job)
+                    continue
+                delay = queue.next_available_in()
+                with self._condition:
+                    if not self._stop_requested and generation == self._generation:
+                        self._condition.wait(delay)
+        except Exception as e:
+            logger.error(f"Arrêt d'un worker de la file d'ajout : {e}")
+        finally:
+            self.db_manager.release_connection()
+
+    def _process(self, queue, job):
+        start = time.perf_counter()
+        try:
+            status = self.db_manager.insert_record(
+                job["file_path"],
+                job["question_data"],
+                job["response_data"],
+                job["start_time"],
+                job["end_time"],
+                attribution=job["attribution"],
+            )
+            if status == INSERT_FAILED:
+                raise Exception("Échec de l'insertion dans la base")
+        except Exception as e:
+            retried = queue.fail(job, str(e), self.max_retries, self.retry_delay)
+            if retried:
+                logger.warning(
+                    f"Ajout en échec (essai {job['attempts']}), nouvel essai programmé : {e}"
+                )
+                # Les workers en attente recalculent l'échéance du nouvel essai
+                self.wake()
+            else:
+                logger.error(f"Ajout abandonné après {job['attempts']} essai(s) : {e}")
+                self.entry_processed.emit(dict(job, status=JOB_ERROR), False, str(e))
+                self.queue_updated.emit()
+            return
+        queue.complete(job["id"])
+        message = f"Traité en {time.perf_counter() - start:.1f}s"
+        if status == INSERT_DUPLICATE:
+            message = "Entrée déjà présente dans la base"
+        self.entry_processed.emit(dict(job, status=JOB_COMPLETED), True, message)
+        self.queue_updated.emit()
+
+
+# Un thread de traitement au plus par base (clé : chemin de la base)
+_queue_threads = {}
+
+
+def start_addition_queue(db_manager, **options) -> AdditionQueueThread:
+    """Démarre (une fois par base) le traitement de la file des ajouts et renvoie
+    le thread ; les travaux interrompus ou de l'ancienne file JSON sont repris."""
+    thread = _queue_threads.get(db_manager.db_path)
+    if thread is not None and thread.isRunning():
+        return thread
+    queue = AdditionQueue(db_manager)
+    try:
+        queue.import_legacy_file()
+    except Exception as e:
+        logger.error(f"Reprise de l'ancienne file d'ajout impossible : {e}")
+    queue.requeue_interrupted()
+    thread = AdditionQueueThread(db_manager, **options)
+    _queue_threads[db_manager.db_path] = thread
+    thread.start()
+    return thread
+
+
+def stop_addition_queue(timeout_ms: int = 5000) -> bool:
+    """Arrête les traitements en cours (fermeture de l'application). Renvoie False
+    si un thread tourne encore après `timeout_ms` : sa base ne doit pas être fermée."""
+    for thread in _queue_threads.values():
+        thread.stop()
+    for db_path, thread in list(_queue_threads.items()):
+        if thread.wait(timeout_ms):
+            del _queue_threads[db_path]
+    return not _queue_threads
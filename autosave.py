@@ -0,0 +1,170 @@
+"""Sauvegarde automatique différée des brouillons (formulaire d'ajout, saisie des
+réponses manquantes).
+
+Chaque modification appelle `schedule()`, qui relance un minuteur : les
+modifications rapprochées (frappe au clavier) sont regroupées et l'état n'est
+relevé qu'une fois la saisie au repos depuis `debounce_ms`. L'état relevé sur le
+thread de l'interface est sérialisé puis écrit par un thread d'écriture, de façon
+atomique (fichier temporaire puis renommage) : un arrêt brutal laisse l'ancienne
+ou la nouvelle sauvegarde, jamais un fichier tronqué. `flush()` écrit sans
+attendre l'état en attente (fermeture de la fenêtre), `discard()` annule les
+écritures en attente et supprime le fichier.
+
+Le délai se règle dans la section [autosave] de config.toml :
+
+    [autosave]
+    debounce_ms = 500
+"""
+
+import json
+import os
+import tempfile
+import threading
+from PySide6.QtCore import QTimer
+from logger import logger
+
+AUTOSAVE_DEBOUNCE_MS = 500
+
+_autosave_config = {}
+
+
+def configure_autosave(config: dict = None):
+    """Applique la section [autosave] de config.toml (appelé au démarrage)."""
+    global _autosave_config
+    _autosave_config = dict(config or {})
+
+
+def autosave_debounce_ms() -> int:
+    return int(_autosave_config.get("debounce_ms", AUTOSAVE_DEBOUNCE_MS))
+
+
+def write_json_atomic(path: str, data, indent: int = 2):
+    """Écrit `data` en JSON dans `path` via un fichier temporaire du même dossier,
+    renommé ensuite à la place de l'ancien fichier."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class AutosaveWriter:
+    """Sauvegarde différée de l'état renvoyé par `snapshot` dans `path`.
+
+    `snapshot` est appelé sur le thread de l'interface et doit renvoyer une copie
+    indépendante de l'état (le thread d'écriture la sérialise ensuite)."""
+
+    def __init__(self, path: str, snapshot, debounce_ms: int = None, parent=None):
+        self.path = path
+        self.snapshot = snapshot
+        self.debounce_ms = (
+            autosave_debounce_ms() if debounce_ms is None else debounce_ms
+        )
+        self._timer = QTimer(parent)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._submit)
+        self._condition = threading.Condition()
+        self._pending = None
+        self._has_pending = False
+        self._writing = False
+        self._closed = False
+        self.error = None  # Exception de la dernière écriture (None : réussie)
+        # Incrémenté par discard : un état relevé avant n'est plus écrit
+        self._generation = 0
+        # Écriture et suppression du fichier ne se chevauchent jamais
+        self._file_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def schedule(self):
+        """Signale une modification ; l'état sera relevé après `debounce_ms` sans
+        nouvelle modification."""
+        if not self._closed:
+            self._timer.start(self.debounce_ms)
+
+    def _submit(self):
+        try:
+            state = self.snapshot()
+        except Exception as e:
+            logger.error(f"Auto-sauvegarde impossible ({self.path}) : {e}")
+            return
+        with self._condition:
+            # Seul le dernier état compte : un état non encore écrit est remplacé
+            self._pending = state
+            self._has_pending = True
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Relève l'état en attente s'il y en a un et attend qu'il soit écrit.
+        Renvoie False si l'écriture n'est pas terminée à l'échéance."""
+        if self._timer.isActive():
+            self._timer.stop()
+            self._submit()
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._has_pending and not self._writing, timeout
+            )
+
+    def discard(self):
+        """Annule les écritures en attente et supprime la sauvegarde."""
+        self._timer.stop()
+        with self._condition:
+            self._pending = None
+            self._has_pending = False
+            self._generation += 1
+        with self._file_lock:
+            try:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+            except OSError as e:
+                logger.error(
+                    f"Suppression de la sauvegarde impossible ({self.path}) : {e}"
+                )
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        """Écrit l'état en attente puis arrête le thread d'écriture."""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(5.0)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._has_pending or self._closed)
+                if not self._has_pending:
+                    return
+                state = self._pending
+                generation = self._generation
+                self._pending = None
+                self._has_pending = False
+                self._writing = True
+            try:
+                with self._file_lock:
+                    if generation == self._generation:
+                        write_json_atomic(self.path, state)
+                self.error = None
+            except Exception as e:
+                self.error = e
+                logger.error(f"Erreur lors de l'auto-sauvegarde ({self.path}) : {e}")
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
@@ -0,0 +1,484 @@
+"""Extraction de segments (clips) de fichiers audio et vidéo.
+
+Un CSV qui découpe des centaines de clips dans un même épisode ne doit pas le
+décoder autant de fois. ClipEngine traite ensemble les segments d'une source :
+
+- MP3 vers MP3 : copie du flux par ffmpeg, sans décodage, avec recherche avant
+  l'entrée (-ss placé avant -i, seules les trames utiles sont lues) ;
+- autres formats : la source est décodée une seule fois (pydub) pour tous ses
+  segments, puis gardée en cache dans la limite d'un budget mémoire, au cas où
+  d'autres segments de la même source suivraient ;
+- source décodée plus grosse que le budget : seul l'intervalle de chaque
+  segment est lu (trames WAV lues directement, sinon recherche de ffmpeg),
+  la source n'est jamais décodée en entier.
+
+Vidéo (extract_video) : recherche avant l'entrée, et copie des flux sans
+réencodage quand les codecs entrent dans un MP4 et qu'une image clé précède
+le début de près ; sinon réencodage (libx264, preset et CRF réglables). Les
+réglages viennent de la section [media] de config.toml :
+
+    [media]
+    video_mode = "auto"  # "auto", "copy" (toujours copier) ou "reencode"
+    video_preset = "veryfast"
+    video_crf = 23
+    ffmpeg_jobs = 0  # découpes vidéo simultanées (0 : la moitié des cœurs)
+    storage_profile = "original"  # "compact" : médias personnalisés en Opus
+    compact_bitrate = "24k"
+    compact_video = false  # profil compact : ne garder que le son des vidéos
+
+Profil de stockage compact (compact_media_file) : les médias personnalisés sont
+convertis à l'ajout en Opus (fichier .ogg, débit adapté à la parole) ; la
+conversion est reproductible, le contenu identique reste dédoublonné.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from collections import OrderedDict
+from logger import logger
+
+# Mémoire maximale des sources décodées gardées en cache (PCM brut)
+CLIP_CACHE_BYTES = 512 * 1024 * 1024
+# Sources copiées sans décodage quand la sortie est au même format
+STREAM_COPY_EXTENSIONS = (".mp3",)
+# Codecs copiés tels quels dans un conteneur MP4
+MP4_VIDEO_CODECS = ("h264", "hevc", "mpeg4", "av1")
+MP4_AUDIO_CODECS = ("aac", "mp3", "alac")
+# Écart maximal (s) entre le début demandé et l'image clé qui le précède pour
+# copier sans réencoder : le clip commence alors un peu plus tôt
+KEYFRAME_TOLERANCE = 0.5
+# Fenêtre (s) où l'image clé précédant le début est cherchée
+KEYFRAME_SEARCH_WINDOW = 10.0
+VIDEO_MODES = ("auto", "copy", "reencode")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+# Profil compact : formats convertis, et format produit
+COMPACT_AUDIO_EXTENSIONS = (".mp3", ".wav")
+COMPACT_EXTENSION = ".ogg"
+DEFAULT_COMPACT_BITRATE = "24k"
+DEFAULT_VIDEO_PRESET = "veryfast"
+DEFAULT_VIDEO_CRF = 23
+
+
+def default_ffmpeg_jobs() -> int:
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class ClipEngine:
+    def __init__(
+        self,
+        memory_budget: int = CLIP_CACHE_BYTES,
+        ffmpeg: str = None,
+        ffprobe: str = None,
+        video_mode: str = "auto",
+        video_preset: str = DEFAULT_VIDEO_PRESET,
+        video_crf: int = DEFAULT_VIDEO_CRF,
+        ffmpeg_jobs: int = 0,
+        compact_bitrate: str = DEFAULT_COMPACT_BITRATE,
+    ):
+        self.memory_budget = memory_budget
+        self.ffmpeg = ffmpeg if ffmpeg is not None else shutil.which("ffmpeg")
+        self.ffprobe = ffprobe if ffprobe is not None else shutil.which("ffprobe")
+        if video_mode not in VIDEO_MODES:
+            logger.warning(f"Mode vidéo inconnu « {video_mode} », utilisation de auto")
+            video_mode = "auto"
+        self.video_mode = video_mode
+        self.video_preset = video_preset
+        self.video_crf = int(video_crf)
+        self.ffmpeg_jobs = int(ffmpeg_jobs) or default_ffmpeg_jobs()
+        self.compact_bitrate = str(compact_bitrate)
+        # Borne les ffmpeg vidéo simultanés du processus, quel que soit l'appelant
+        self._video_slots = threading.BoundedSemaphore(self.ffmpeg_jobs)
+        self._decoded = OrderedDict()  # (chemin, mtime, taille) -> AudioSegment
+        self._decoded_bytes = 0
+        self._oversized = set()  # clés des sources qui dépassent le budget
+        self._lock = threading.Lock()
+        self.decodes = 0  # sources décodées depuis la création (mesures, tests)
+        self.slices = 0  # segments lus seuls, source trop grosse pour le cache
+
+    def extract(self, src_path: str, segments: list, dest_paths: list) -> list:
+        """Écrit chaque segment (début_ms, fin_ms) de `src_path` dans le chemin
+        correspondant de `dest_paths` (format déduit de l'extension ; None : début
+        ou fin du fichier). Renvoie, pour chaque segment, None ou l'exception levée.
+        """
+        results = [None] * len(segments)
+        pending = list(range(len(segments)))
+        if self._can_stream_copy(src_path, dest_paths):
+            failed = []
+            for index in pending:
+                try:
+                    self._stream_copy(src_path, *segments[index], dest_paths[index])
+                except Exception as e:
+                    logger.warning(
+                        f"Copie sans réencodage impossible pour {src_path} : {e}"
+                    )
+                    failed.append(index)
+            pending = failed
+        if not pending:
+            return results
+
+        try:
+            key = self._source_key(src_path)
+            audio = None
+            if not self._too_large(src_path, key):
+                audio = self._decoded_source(src_path, key)
+        except Exception as e:
+            for index in pending:
+                results[index] = e
+            return results
+        for index in pending:
+            start_ms, end_ms = segments[index]
+            dest_path = dest_paths[index]
+            try:
+                if audio is None:
+                    clip = self._decode_span(src_path, start_ms, end_ms)
+                else:
+                    start = start_ms if start_ms is not None else 0
+                    end = end_ms if end_ms is not None else len(audio)
+                    clip = audio[start:end]
+                clip.export(
+                    dest_path, format=os.path.splitext(dest_path)[1][1:] or "mp3"
+                )
+            except Exception as e:
+                results[index] = e
+        return results
+
+    def _can_stream_copy(self, src_path, dest_paths) -> bool:
+        ext = os.path.splitext(src_path)[1].lower()
+        return (
+            bool(self.ffmpeg)
+            and ext in STREAM_COPY_EXTENSIONS
+            and all(os.path.splitext(p)[1].lower() == ext for p in dest_paths)
+        )
+
+    def _stream_copy(self, src_path, start_ms, end_ms, dest_path):
+        cmd = [self.ffmpeg, "-y", "-loglevel", "error"]
+        if start_ms:
+            cmd += ["-ss", f"{start_ms / 1000:.3f}"]
+        cmd += ["-i", src_path]
+        if end_ms is not None:
+            # Avec -ss avant -i, -t est une durée comptée depuis le point de recherche
+            cmd += ["-t", f"{(end_ms - (start_ms or 0)) / 1000:.3f}"]
+        cmd += ["-map", "0:a:0", "-c", "copy", dest_path]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(result.stderr.decode(errors="ignore").strip())
+
+    @staticmethod
+    def _source_key(src_path):
+        stat = os.stat(src_path)
+        return (os.path.abspath(src_path), stat.st_mtime_ns, stat.st_size)
+
+    def _too_large(self, src_path, key) -> bool:
+        """Vrai si la source décodée dépasse le budget : connu après un premier
+        décodage, ou d'avance pour un WAV (taille lue dans l'en-tête)."""
+        with self._lock:
+            if key in self._oversized:
+                return True
+        try:
+            with wave.open(src_path, "rb") as f:
+                size = f.getnframes() * f.getsampwidth() * f.getnchannels()
+        except Exception:
+            return False  # pas un WAV PCM : taille inconnue avant décodage
+        if size <= self.memory_budget:
+            return False
+        with self._lock:
+            self._oversized.add(key)
+        return True
+
+    def _decoded_source(self, src_path, key):
+        """Source décodée, prise dans le cache si elle n'a pas changé."""
+        with self._lock:
+            audio = self._decoded.get(key)
+            if audio is not None:
+                self._decoded.move_to_end(key)
+                return audio
+        from pydub import AudioSegment
+
+        audio = AudioSegment.from_file(src_path)
+        size = len(audio.raw_data)
+        with self._lock:
+            self.decodes += 1
+            if size > self.memory_budget:
+                # Trop grosse pour le cache : les segments suivants seront lus seuls
+                self._oversized.add(key)
+            elif key not in self._decoded:
+                self._decoded[key] = audio
+                self._decoded_bytes += size
+                while self._decoded_bytes > self.memory_budget:
+                    _, evicted = self._decoded.popitem(last=False)
+                    self._decoded_bytes -= len(evicted.raw_data)
+        return audio
+
+    def _decode_span(self, src_path, start_ms, end_ms):
+        """Décode le seul segment (début_ms, fin_ms) de `src_path`."""
+        from pydub import AudioSegment
+
+        start_ms = start_ms or 0
+        with self._lock:
+            self.slices += 1
+        try:
+            with wave.open(src_path, "rb") as f:
+                rate = f.getframerate()
+                first = min(start_ms * rate // 1000, f.getnframes())
+                last = f.getnframes() if end_ms is None else end_ms * rate // 1000
+                f.setpos(first)
+                return AudioSegment(
+                    data=f.readframes(max(0, last - first)),
+                    sample_width=f.getsampwidth(),
+                    frame_rate=rate,
+                    channels=f.getnchannels(),
+                )
+        except wave.Error:
+            pass  # pas un WAV PCM : recherche faite par ffmpeg
+        return AudioSegment.from_file(
+            src_path,
+            start_second=start_ms / 1000,
+            duration=None if end_ms is None else (end_ms - start_ms) / 1000,
+        )
+
+    def extract_video(self, src_path, start_ms, end_ms, dest_path):
+        """Écrit le segment vidéo (début_ms, fin_ms) de `src_path` dans `dest_path`
+        (MP4) ; lève une exception en cas d'échec."""
+        if not self.ffmpeg:
+            raise Exception("ffmpeg introuvable")
+        with self._video_slots:
+            result = subprocess.run(
+                self.video_command(src_path, start_ms, end_ms, dest_path),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+        if result.returncode != 0:
+            raise Exception(result.stderr.decode(errors="ignore").strip())
+
+    def video_command(self, src_path, start_ms, end_ms, dest_path) -> list:
+        """Commande ffmpeg du segment : copie des flux depuis l'image clé qui
+        précède le début si possible, sinon réencodage. -ss est toujours placé
+        avant -i : ffmpeg se positionne sans décoder le début du fichier."""
+        start = (start_ms or 0) / 1000
+        seek = start
+        copy = False
+        if self.video_mode != "reencode" and self._copyable(src_path):
+            keyframe = self._keyframe_before(src_path, start) if start else 0.0
+            if keyframe is not None and (
+                self.video_mode == "copy" or start - keyframe <= KEYFRAME_TOLERANCE
+            ):
+                copy = True
+                seek = keyframe
+        cmd = [self.ffmpeg, "-y", "-loglevel", "error"]
+        if seek:
+            cmd += ["-ss", f"{seek:.3f}"]
+        cmd += ["-i", src_path]
+        if end_ms is not None:
+            # Durée comptée depuis le point de recherche
+            cmd += ["-t", f"{end_ms / 1000 - seek:.3f}"]
+        if copy:
+            cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+        else:
+            cmd += [
+                "-c:v",
+                "libx264",
+                "-preset",
+                self.video_preset,
+                "-crf",
+                str(self.video_crf),
+                "-c:a",
+                "aac",
+                # Les cœurs sont partagés entre les découpes simultanées
+                "-threads",
+                str(max(1, (os.cpu_count() or 1) // self.ffmpeg_jobs)),
+            ]
+        cmd += ["-movflags", "+faststart", dest_path]
+        return cmd
+
+    def _probe(self, args: list) -> str:
+        result = subprocess.run(
+            [self.ffprobe, "-v", "error", *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            raise Exception(f"ffprobe a échoué ({result.returncode})")
+        return result.stdout.decode(errors="ignore")
+
+    def _copyable(self, src_path) -> bool:
+        """Vrai si tous les flux audio et vidéo peuvent être copiés dans un MP4."""
+        if not self.ffprobe:
+            return False
+        try:
+            output = self._probe(
+                [
+                    "-show_entries",
+                    "stream=codec_type,codec_name",
+                    "-of",
+                    "csv=p=0",
+                    src_path,
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Analyse de {src_path} impossible : {e}")
+            return False
+        streams = [line.split(",") for line in output.split() if "," in line]
+        video = [name for name, kind in streams if kind == "video"]
+        audio = [name for name, kind in streams if kind == "audio"]
+        return (
+            bool(video)
+            and all(name in MP4_VIDEO_CODECS for name in video)
+            and all(name in MP4_AUDIO_CODECS for name in audio)
+        )
+
+    def _keyframe_before(self, src_path, start: float):
+        """Instant (s) de la dernière image clé au plus tard à `start`, ou None.
+        Seuls les paquets de la fenêtre qui précède sont lus, sans décodage."""
+        try:
+            output = self._probe(
+                [
+                    "-select_streams",
+                    "v:0",
+                    "-read_intervals",
+                    f"{max(0.0, start - KEYFRAME_SEARCH_WINDOW):.3f}%{start + 0.001:.3f}",
+                    "-show_entries",
+                    "packet=pts_time,flags",
+                    "-of",
+                    "csv=p=0",
+                    src_path,
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Recherche des images clés de {src_path} impossible : {e}")
+            return None
+        keyframes = []
+        for line in output.split():
+            pts_time, _, flags = line.partition(",")
+            try:
+                if "K" in flags and float(pts_time) <= start:
+                    keyframes.append(float(pts_time))
+            except ValueError:
+                continue
+        return max(keyframes) if keyframes else None
+
+    def compact_command(self, src_path, dest_path) -> list:
+        """Conversion en Opus mono (débit de parole), sans image. bitexact : même
+        source, même fichier (numéro de flux Ogg fixe, pas de métadonnées)."""
+        return [
+            self.ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            src_path,
+            "-vn",
+            "-map_metadata",
+            "-1",
+            "-ac",
+            "1",
+            "-c:a",
+            "libopus",
+            "-b:a",
+            self.compact_bitrate,
+            "-application",
+            "voip",
+            "-fflags",
+            "+bitexact",
+            "-flags:a",
+            "+bitexact",
+            dest_path,
+        ]
+
+    def compact(self, src_path, dest_path):
+        if not self.ffmpeg:
+            raise Exception("ffmpeg introuvable")
+        result = subprocess.run(
+            self.compact_command(src_path, dest_path),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        if result.returncode != 0:
+            raise Exception(result.stderr.decode(errors="ignore").strip())
+
+    def clear(self):
+        with self._lock:
+            self._decoded.clear()
+            self._decoded_bytes = 0
+            self._oversized.clear()
+
+
+_shared_engine = None
+_shared_lock = threading.Lock()
+_media_config = {}
+
+
+def configure_clip_engine(config: dict = None):
+    """Applique la section [media] de config.toml (appelé au démarrage)."""
+    global _media_config, _shared_engine
+    with _shared_lock:
+        _media_config = dict(config or {})
+        _shared_engine = None
+
+
+def shared_clip_engine() -> ClipEngine:
+    """Moteur partagé par le processus : les sources décodées profitent à tous les
+    découpages successifs (ajouts unitaires, imports, processus du pipeline)."""
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is None:
+            options = {
+                key: _media_config[key]
+                for key in (
+                    "memory_budget",
+                    "video_mode",
+                    "video_preset",
+                    "video_crf",
+                    "ffmpeg_jobs",
+                    "compact_bitrate",
+                )
+                if key in _media_config
+            }
+            _shared_engine = ClipEngine(**options)
+        return _shared_engine
+
+
+def ffmpeg_jobs() -> int:
+    """Découpes vidéo simultanées (taille du groupe de tâches du pipeline)."""
+    return int(_media_config.get("ffmpeg_jobs") or 0) or default_ffmpeg_jobs()
+
+
+def media_config() -> dict:
+    """Section [media] appliquée (transmise aux processus de l'import)."""
+    return dict(_media_config)
+
+
+def should_compact(path: str) -> bool:
+    """Vrai si le profil de stockage demande de convertir ce fichier."""
+    if _media_config.get("storage_profile", "original") != "compact":
+        return False
+    ext = os.path.splitext(path)[1].lower()
+    return ext in COMPACT_AUDIO_EXTENSIONS or (
+        ext in VIDEO_EXTENSIONS and bool(_media_config.get("compact_video", False))
+    )
+
+
+def compact_media_file(path: str, work_dir: str, remove_source: bool = False) -> str:
+    """Version compacte de `path`, écrite dans `work_dir`, si le profil de stockage
+    le demande ; sinon (ou en cas d'échec de la conversion) `path` lui-même.
+    `remove_source` : `path` est un fichier temporaire, effacé une fois converti."""
+    if not should_compact(path):
+        return path
+    base = os.path.splitext(os.path.basename(path))[0]
+    handle, dest_path = tempfile.mkstemp(
+        prefix=f"{base}_", suffix=COMPACT_EXTENSION, dir=work_dir
+    )
+    os.close(handle)
+    try:
+        shared_clip_engine().compact(path, dest_path)
+    except Exception as e:
+        logger.warning(
+            f"Conversion compacte impossible pour {path}, fichier gardé tel quel : {e}"
+        )
+        os.remove(dest_path)
+        return path
+    if remove_source:
+        os.remove(path)
+    return dest_path
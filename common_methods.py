@@ -234,7 +234,7 @@ class MediaUtils:
             import shutil
             from common_methods import TextUtils
             import os
-            from pydub import AudioSegment
+            from clip_engine import shared_clip_engine
 
             ext = os.path.splitext(src_path)[1].lower()
             # Correction : générer un nom unique et propre une seule fois
@@ -246,58 +246,29 @@ class MediaUtils:
                 file_name = TextUtils.clean_filename(os.path.basename(src_path))
             # Découpage audio
             if ext in [".mp3", ".wav", ".ogg"]:
-                audio = None
                 file_name = file_name + ".mp3"
                 dest_path = os.path.join(dest_dir, file_name)
                 if start_time_ms is not None or end_time_ms is not None:
-                    audio = AudioSegment.from_file(src_path)
-                    start = start_time_ms if start_time_ms is not None else 0
-                    end = end_time_ms if end_time_ms is not None else len(audio)
-                    segment = audio[start:end]
-                    segment.export(dest_path, format="mp3")
+                    # Source décodée une fois puis gardée en cache (clip_engine)
+                    (error,) = shared_clip_engine().extract(
+                        src_path, [(start_time_ms, end_time_ms)], [dest_path]
+                    )
+                    if error is not None:
+                        raise error
                 else:
                     shutil.copy2(src_path, dest_path)
             # Découpage vidéo (remplacement MoviePy par ffmpeg)
             elif ext in [".mp4", ".avi", ".mov", ".mkv"]:
-                import subprocess
-
                 file_name = file_name + ".mp4"
                 dest_path = os.path.join(dest_dir, file_name)
-                ffmpeg_cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    src_path,
-                ]
-                # Gestion des cas start_time/end_time
-                if start_time_ms is not None and end_time_ms is not None:
-                    start_sec = start_time_ms / 1000.0
-                    end_sec = end_time_ms / 1000.0
-                    duration = end_sec - start_sec
-                    ffmpeg_cmd += ["-ss", str(start_sec), "-t", str(duration)]
-                elif start_time_ms is not None:
-                    start_sec = start_time_ms / 1000.0
-                    ffmpeg_cmd += ["-ss", str(start_sec)]
-                elif end_time_ms is not None:
-                    # Découper du début jusqu'à end_time
-                    duration = end_time_ms / 1000.0
-                    ffmpeg_cmd += ["-t", str(duration)]
-                ffmpeg_cmd += ["-c:v", "libx264", "-c:a", "aac", dest_path]
+                # Recherche avant l'entrée, copie des flux quand c'est possible
                 try:
-                    result = subprocess.run(
-                        ffmpeg_cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        check=True,
+                    shared_clip_engine().extract_video(
+                        src_path, start_time_ms, end_time_ms, dest_path
                     )
                 except Exception as e:
-                    error_msg = f"Erreur ffmpeg sur {src_path}: {e}\n" + getattr(
-                        e, "stderr", b""
-                    ).decode(errors="ignore")
-                    ffmpeg_logger.error(error_msg)
-                    raise Exception(
-                        f"Erreur lors du découpage vidéo (ffmpeg) : {e}\n{getattr(e, 'stderr', b'').decode(errors='ignore')}"
-                    )
+                    ffmpeg_logger.error(f"Erreur ffmpeg sur {src_path}: {e}")
+                    raise Exception(f"Erreur lors du découpage vidéo (ffmpeg) : {e}")
             else:
                 raise Exception("Format de média non supporté.")
             return dest_path
@@ -1,18 +1,266 @@
 from __future__ import annotations
 
+import itertools
+import json
 import re
+import threading
+from PySide6.QtCore import QCoreApplication, QThread
 from PySide6.QtSql import QSqlDatabase, QSqlQuery
 from datetime import date, datetime
+from typing import NamedTuple
 import uuid
-from gtts import gTTS  # Importer gTTS pour générer des fichiers audio
 import os
 from logger import logger  # Remplacer l'import de logging par le logger centralisé
-from common_methods import MediaUtils
+from common_methods import TextUtils
+from media_store import MediaStore
+from tts_cache import shared_tts_cache
+
+# Codes de statut renvoyés par insert_record / insert_records_batch
+INSERT_OK = 0
+INSERT_DUPLICATE = 1
+INSERT_FAILED = 2
+
+# Nombre maximal de paramètres liés par requête (SQLite < 3.32 plafonne à 999)
+SQLITE_MAX_PARAMS = 500
+
+# État du média d'une entrée (colonne media_status). Une entrée insérée sans
+# média ni audio (TTS différée) reste « pending » jusqu'à ce que le service
+# tts_backfill lui attache un fichier ; « failed » après épuisement des essais.
+MEDIA_READY = "ready"
+MEDIA_PENDING = "pending"
+MEDIA_FAILED = "failed"
+
+
+class Record(NamedTuple):
+    """Entrée telle que renvoyée par les méthodes fetch_* de DatabaseManager.
+
+    Tuple immuable sans dictionnaire par instance ; reste lisible comme l'ancien
+    dict (`record["question"]`, `record.get(...)`, `dict(record)`)."""
+
+    UUID: str
+    media_file: str
+    question: str
+    response: str
+    creation_date: str
+    custom_media: int
+    attribution: str
+    is_favorite: int
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self._fields else default
+
+    def keys(self):
+        return self._fields
+
+    def to_dict(self) -> dict:
+        """Copie modifiable et sérialisable en JSON."""
+        return dict(zip(self._fields, self))
+
+
+# Colonnes sélectionnées par les méthodes fetch_*, dans l'ordre des champs de Record
+RECORD_SELECT = ", ".join(Record._fields)
+RECORD_FIELD_COUNT = len(Record._fields)
+
+# Colonnes de la table records (hors clé entière `id`)
+RECORD_TABLE_COLUMNS = [
+    "UUID",
+    "media_file",
+    "question",
+    "response",
+    "creation_date",
+    "custom_media",
+    "attribution",
+    "is_favorite",
+]
+
+# Profils de performance SQLite, appliqués en PRAGMA à l'ouverture (section
+# [database] de config.toml : `profile = "..."`, chaque PRAGMA pouvant y être
+# surchargé individuellement).
+# - durable : journal classique (un seul fichier, sûr dans un dossier synchronisé),
+#   synchronisation complète à chaque écriture ;
+# - fast : WAL + synchronous=NORMAL, une écriture ne force plus de fsync à chaque
+#   commit (seuls les derniers commits peuvent être perdus en cas de coupure) ;
+# - review : consultation en lecture seule (query_only, appliqué après les
+#   migrations) ; lectures servies par mmap et un cache plus grand. Aucune
+#   modification n'est alors possible (ajouts, favoris, statistiques).
+DATABASE_PROFILES = {
+    "durable": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "temp_store": "MEMORY",
+        "cache_size": -8000,
+        "mmap_size": 0,
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "cache_size": -32000,
+        "mmap_size": 134217728,
+        "busy_timeout": 5000,
+    },
+    "review": {
+        "temp_store": "MEMORY",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "busy_timeout": 5000,
+        "query_only": "ON",
+    },
+}
+DEFAULT_DATABASE_PROFILE = "durable"
+
+# Valeurs admises par PRAGMA ; None : entier
+_PRAGMA_VALUES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+    "cache_size": None,
+    "mmap_size": None,
+    "busy_timeout": None,
+    "query_only": {"ON", "OFF"},
+}
+
+
+class ConnectionProvider:
+    """Donne à chaque thread, et à chaque processus, sa propre connexion QSqlDatabase
+    nommée vers le même fichier : une connexion Qt SQL ne doit jamais être utilisée
+    hors du thread qui l'a créée.
+
+    Les connexions sont ouvertes à la demande et configurées par `on_open`. Celles
+    des threads terminés sont fermées lors de l'ouverture suivante (ou par
+    `close_all`) ; un thread de travail peut aussi rendre la sienne avec `release`
+    à la fin de son exécution.
+    """
+
+    def __init__(self, db_path: str, on_open=None):
+        self.db_path = db_path
+        self.on_open = on_open
+        self.base_name = f"connection_{uuid.uuid4()}"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # nom de connexion -> (QSqlDatabase, QThread propriétaire)
+        self._connections = {}
+        self._pid = os.getpid()
+        # Incrémenté par close_all : invalide les connexions mémorisées par les threads
+        self._generation = 0
+        self._serial = itertools.count()
+        self._app = None
+
+    def connection(self) -> QSqlDatabase:
+        """Connexion du thread courant, ouverte au besoin."""
+        local = self._local
+        if (
+            getattr(local, "db", None) is not None
+            and local.generation == self._generation
+            and local.pid == os.getpid()
+        ):
+            return local.db
+        return self._open()
+
+    def _open(self) -> QSqlDatabase:
+        pid = os.getpid()
+        if pid != self._pid:
+            # Processus fils créé par fork : les connexions héritées appartiennent
+            # au parent, on repart de zéro (Qt garde sa propre référence dessus)
+            self._connections = {}
+            self._lock = threading.Lock()
+            self._pid = pid
+        if QCoreApplication.instance() is None:
+            # Processus de travail lancé sans application Qt : QtSql en exige une
+            self._app = QCoreApplication([])
+        self.cleanup()
+        # Le compteur distingue un thread d'un thread terminé de même identifiant
+        name = f"{self.base_name}_{pid}_{threading.get_ident()}_{next(self._serial)}"
+        db = QSqlDatabase.addDatabase("QSQLITE", name)
+        db.setDatabaseName(self.db_path)
+        if not db.open():
+            raise Exception(f"Failed to open database: {db.lastError().text()}")
+        if self.on_open:
+            self.on_open(db)
+        with self._lock:
+            self._connections[name] = (db, QThread.currentThread())
+        self._local.db = db
+        self._local.name = name
+        self._local.pid = pid
+        self._local.generation = self._generation
+        return db
+
+    def release(self):
+        """Ferme la connexion du thread courant (fin d'un thread de travail)."""
+        name = getattr(self._local, "name", None)
+        if name is None or self._local.pid != os.getpid():
+            return
+        self._local.db = None
+        self._local.name = None
+        with self._lock:
+            entry = self._connections.pop(name, None)
+        if entry:
+            self._close([(name, entry[0])])
+
+    def cleanup(self):
+        """Ferme les connexions des threads terminés."""
+        with self._lock:
+            dead = [
+                (name, entry[0])
+                for name, entry in self._connections.items()
+                if self._thread_finished(entry[1])
+            ]
+            for name, _db in dead:
+                del self._connections[name]
+        self._close(dead)
+
+    def close_all(self):
+        """Ferme toutes les connexions ouvertes par ce fournisseur."""
+        with self._lock:
+            entries = [(name, entry[0]) for name, entry in self._connections.items()]
+            self._connections = {}
+            self._generation += 1
+        self._local.db = None
+        self._local.name = None
+        self._close(entries)
+
+    def active_connections(self) -> int:
+        with self._lock:
+            return len(self._connections)
+
+    @staticmethod
+    def _thread_finished(thread) -> bool:
+        try:
+            return thread.isFinished()
+        except RuntimeError:
+            # Objet QThread déjà détruit par Qt avec son thread
+            return True
+
+    @staticmethod
+    def _close(entries):
+        """Ferme puis retire les connexions [(nom, QSqlDatabase)] ; removeDatabase
+        n'est appelé qu'une fois nos références abandonnées."""
+        names = []
+        for name, db in entries:
+            if db.isOpen():
+                db.close()
+            names.append(name)
+        entries.clear()
+        db = None
+        for name in names:
+            if QSqlDatabase.contains(name):
+                QSqlDatabase.removeDatabase(name)
 
 
 class DatabaseManager:
 
-    def __init__(self, db_path: str, language_code: str = "fr"):
+    def __init__(
+        self, db_path: str, language_code: str = "fr", database_config: dict = None
+    ):
         try:
             # Créer le dossier parent si nécessaire
             self.db_path = db_path
@@ -21,28 +269,261 @@ class DatabaseManager:
             if self.db_dir and not os.path.exists(self.db_dir):
                 os.makedirs(self.db_dir, exist_ok=True)
             self.language_code = language_code
-            self.connection_name = (
-                f"connection_{uuid.uuid4()}"  # Utiliser une connexion unique
-            )
+            self.database_config = database_config or {}
             base_name = self.db_name.replace(".db", "-audio")
             self.audio_dir = f"assets/audio/{base_name}"
             os.makedirs(self.audio_dir, exist_ok=True)
-            self.db = QSqlDatabase.addDatabase("QSQLITE", self.connection_name)
-            self.db.setDatabaseName(db_path)
-            if not self.db.open():
-                raise Exception("Failed to open database")
+            self.pragmas = self.resolve_pragmas(self.database_config)
+            # Base ouverte en lecture seule (profil review) : query_only n'est
+            # appliqué qu'une fois le schéma à jour
+            self.read_only = self.pragmas.get("query_only") == "ON"
+            self._schema_ready = False
+            # UUID des favoris, chargés au premier besoin puis tenus à jour en place
+            self._favorites = None
+            # Fonction json_each de SQLite disponible (testée au premier besoin)
+            self._json_each = None
+            # Fichiers média adressés par empreinte (table media)
+            self.media_store = MediaStore(self)
+            # Une connexion par thread (voir la propriété db)
+            self._connections = ConnectionProvider(db_path, self._configure_connection)
+            self._connections.connection()  # connexion du thread courant
             logger.info(f"{self.db_name} opened.")
             logger.info(f"databased located in {self.db_dir}.")
             self.create_tables()
+            self._schema_ready = True
+            if self.read_only:
+                self._exec_sql("PRAGMA query_only = ON")
+            else:
+                self.media_store.reset_pins()
         except Exception:
             raise
 
+    @property
+    def db(self) -> QSqlDatabase:
+        """Connexion propre au thread (et au processus) appelant."""
+        return self._connections.connection()
+
+    def release_connection(self):
+        """À appeler en fin d'exécution d'un thread de travail qui a utilisé la base."""
+        self._connections.release()
+
+    def __getstate__(self):
+        # Une connexion ne se transmet pas à un autre processus : le processus
+        # fils ouvre la sienne au premier accès
+        state = self.__dict__.copy()
+        del state["_connections"]
+        state["_favorites"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._connections = ConnectionProvider(self.db_path, self._configure_connection)
+
+    @staticmethod
+    def resolve_pragmas(database_config: dict = None) -> dict:
+        """Calcule les PRAGMA à appliquer : profil choisi puis surcharges de la
+        section [database]. Les clés ou valeurs inconnues sont ignorées."""
+        database_config = database_config or {}
+        profile = database_config.get("profile", DEFAULT_DATABASE_PROFILE)
+        if profile not in DATABASE_PROFILES:
+            logger.warning(
+                f"Profil de base de données inconnu '{profile}', utilisation de '{DEFAULT_DATABASE_PROFILE}'"
+            )
+            profile = DEFAULT_DATABASE_PROFILE
+        pragmas = dict(DATABASE_PROFILES[profile])
+        for key, value in database_config.items():
+            if key == "profile":
+                continue
+            if key not in _PRAGMA_VALUES:
+                logger.warning(f"Option [database] inconnue ignorée : {key}")
+                continue
+            allowed = _PRAGMA_VALUES[key]
+            if allowed is None:
+                try:
+                    pragmas[key] = int(value)
+                except (TypeError, ValueError):
+                    logger.warning(f"Valeur entière attendue pour {key} : {value!r}")
+            elif str(value).upper() in allowed:
+                pragmas[key] = str(value).upper()
+            else:
+                logger.warning(f"Valeur invalide pour {key} : {value!r}")
+        return pragmas
+
+    def _configure_connection(self, db: QSqlDatabase):
+        """Applique le profil de performance SQLite à une connexion qui vient d'être
+        ouverte (appelé par le ConnectionProvider pour chaque thread)."""
+        query = QSqlQuery(db)
+        for key, value in self.pragmas.items():
+            if key == "query_only" and not self._schema_ready:
+                continue
+            if not query.exec_(f"PRAGMA {key} = {value}"):
+                logger.warning(
+                    f"PRAGMA {key} = {value} non appliqué : {query.lastError().text()}"
+                )
+                continue
+            # journal_mode renvoie le mode effectif (WAL peut être refusé, p. ex.
+            # sur un système de fichiers réseau)
+            if key == "journal_mode" and query.next():
+                effective = str(query.value(0)).upper()
+                if effective != value:
+                    logger.warning(
+                        f"journal_mode={value} refusé par SQLite, mode effectif : {effective}"
+                    )
+                    self.pragmas[key] = effective
+            query.finish()
+
+    # Migrations du schéma, appliquées dans l'ordre à l'ouverture de la base.
+    # La version courante est stockée dans PRAGMA user_version : une migration
+    # n'est exécutée qu'une fois, et les chemins de lecture peuvent supposer le
+    # schéma le plus récent. Chaque entrée : (version, description, méthode,
+    # transactionnelle). Une migration non transactionnelle (reconstruction de
+    # table par tranches) doit être reprenable si elle est interrompue.
+    MIGRATIONS = [
+        (1, "schéma de base et colonnes héritées", "_migration_1_base_schema", True),
+        (2, "index secondaires de records", "_migration_2_indexes", True),
+        (3, "clé entière stable pour records", "_migration_3_integer_id", False),
+        (4, "index plein texte records_fts", "_migration_4_fts", True),
+        (5, "stockage des médias par empreinte", "_migration_5_media_store", False),
+        (6, "état du média (TTS différée)", "_migration_6_media_status", True),
+        (7, "file des ajouts", "_migration_7_addition_jobs", True),
+        (8, "journal des révisions", "_migration_8_review_events", True),
+        (9, "épingles des médias en cours d'ajout", "_migration_9_media_pins", True),
+    ]
+
+    # Nombre de lignes copiées par transaction lors d'une reconstruction de table
+    REBUILD_CHUNK_SIZE = 5000
+
     def create_tables(self):
+        """Met le schéma à jour en appliquant les migrations en attente."""
+        self.apply_migrations()
+        self.unique_pairs = self._is_unique_index("idx_records_question_response")
+        self.fts_enabled = self._table_exists("records_fts")
+
+    def schema_version(self) -> int:
+        return int(self._scalar("PRAGMA user_version"))
+
+    def apply_migrations(self):
+        """Applique, dans l'ordre, les migrations dont la version dépasse celle de la base.
+
+        Une migration transactionnelle et la mise à jour de user_version sont validées
+        ensemble : en cas d'échec, la base reste à la version précédente."""
+        current_version = self.schema_version()
+        for version, description, method_name, transactional in self.MIGRATIONS:
+            if version <= current_version:
+                continue
+            logger.info(
+                f"Migration de {self.db_name} vers la version {version} : {description}"
+            )
+            if transactional and not self.db.transaction():
+                raise Exception(
+                    f"Impossible de démarrer la migration {version} : {self.db.lastError().text()}"
+                )
+            try:
+                getattr(self, method_name)()
+                self._exec_sql(f"PRAGMA user_version = {int(version)}")
+                if transactional and not self.db.commit():
+                    raise Exception(self.db.lastError().text())
+            except Exception as e:
+                if transactional:
+                    self.db.rollback()
+                raise Exception(
+                    f"Échec de la migration {version} ({description}) : {e}"
+                )
+            current_version = version
+
+    def _exec_sql(self, statement: str, params: list = None) -> QSqlQuery:
+        """Exécute une instruction et lève une exception en cas d'échec."""
         query = QSqlQuery(self.db)
-        query.exec_(
+        if params:
+            query.prepare(statement)
+            for param in params:
+                query.addBindValue(param)
+            ok = query.exec_()
+        else:
+            ok = query.exec_(statement)
+        if not ok:
+            raise Exception(f"{query.lastError().text()} ({statement.strip()[:80]})")
+        return query
+
+    def _scalar(self, statement: str, params: list = None):
+        """Renvoie la première valeur d'une requête (None si aucune ligne) et libère
+        le curseur, qui sinon verrouillerait la table pour les DDL suivants."""
+        query = self._exec_sql(statement, params)
+        value = query.value(0) if query.next() else None
+        query.finish()
+        return value
+
+    def _table_exists(self, table: str) -> bool:
+        return (
+            self._scalar(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                [table],
+            )
+            is not None
+        )
+
+    def _table_columns(self, table: str) -> list:
+        query = self._exec_sql(f"PRAGMA table_info({table})")
+        columns = []
+        while query.next():
+            columns.append(query.value(1))
+        query.finish()
+        return columns
+
+    def _migration_1_base_schema(self):
+        """Crée la table records, ou aligne une base antérieure sur le schéma actuel
+        (anciens noms audio_file / custom_audio, colonnes attribution et is_favorite).
+        """
+        if not self._table_exists("records"):
+            self._exec_sql(
+                """
+                CREATE TABLE records (
+                    UUID TEXT PRIMARY KEY,
+                    media_file TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    creation_date TEXT NOT NULL,
+                    custom_media INTEGER DEFAULT 0,
+                    attribution TEXT NOT NULL DEFAULT 'no-attribution',
+                    is_favorite INTEGER DEFAULT 0
+                )
+                """
+            )
+            return
+        columns = self._table_columns("records")
+        if "audio_file" in columns and "media_file" not in columns:
+            self._exec_sql("ALTER TABLE records RENAME COLUMN audio_file TO media_file")
+        if "custom_audio" in columns and "custom_media" not in columns:
+            self._exec_sql(
+                "ALTER TABLE records RENAME COLUMN custom_audio TO custom_media"
+            )
+        elif "custom_audio" not in columns and "custom_media" not in columns:
+            self._exec_sql(
+                "ALTER TABLE records ADD COLUMN custom_media INTEGER DEFAULT 0"
+            )
+        if "attribution" not in columns:
+            self._exec_sql(
+                "ALTER TABLE records ADD COLUMN attribution TEXT NOT NULL DEFAULT 'no-attribution'"
+            )
+        if "is_favorite" not in columns:
+            self._exec_sql(
+                "ALTER TABLE records ADD COLUMN is_favorite INTEGER DEFAULT 0"
+            )
+
+    def _migration_2_indexes(self):
+        self.create_indexes()
+
+    def _migration_3_integer_id(self):
+        """Ajoute une clé `id INTEGER PRIMARY KEY` : le rowid devient stable (VACUUM
+        peut renuméroter un rowid implicite), ce qu'exige l'index plein texte."""
+        if "id" in self._table_columns("records"):
+            return
+        self.rebuild_table(
+            "records",
             """
-            CREATE TABLE IF NOT EXISTS records (
-                UUID TEXT PRIMARY KEY,
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY,
+                UUID TEXT NOT NULL UNIQUE,
                 media_file TEXT NOT NULL,
                 question TEXT NOT NULL,
                 response TEXT NOT NULL,
@@ -51,8 +532,325 @@ class DatabaseManager:
                 attribution TEXT NOT NULL DEFAULT 'no-attribution',
                 is_favorite INTEGER DEFAULT 0
             )
+            """,
+            RECORD_TABLE_COLUMNS,
+            f"SELECT rowid, {', '.join(RECORD_TABLE_COLUMNS)} FROM {{table}}",
+            after_swap=self.create_indexes,
+        )
+
+    def _migration_4_fts(self):
+        """Index plein texte sur question, réponse et attribution, insensible à la
+        casse et aux accents, tenu à jour par déclencheurs."""
+        query = QSqlQuery(self.db)
+        if not query.exec_(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5 (
+                question, response, attribution,
+                content = 'records', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        ):
+            # SQLite compilé sans FTS5 : search_records se rabat sur LIKE
+            logger.warning(
+                f"FTS5 indisponible, recherche plein texte désactivée : {query.lastError().text()}"
+            )
+            return
+        self.create_fts_triggers()
+        self._exec_sql("INSERT INTO records_fts (records_fts) VALUES ('rebuild')")
+
+    def _migration_5_media_store(self):
+        """Table media et colonne records.media_hash. Les fichiers existants sont
+        hachés ; les copies identiques du dossier audio ne sont effacées qu'une fois
+        les entrées redirigées et la transaction validée (migration reprenable : seules
+        les entrées sans empreinte sont traitées)."""
+        if not self.db.transaction():
+            raise Exception(self.db.lastError().text())
+        try:
+            self.media_store.create_schema()
+            duplicates = self.media_store.backfill()
+            if not self.db.commit():
+                raise Exception(self.db.lastError().text())
+        except Exception:
+            self.db.rollback()
+            raise
+        for path in duplicates:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Copie de média non supprimée ({path}) : {e}")
+        if duplicates:
+            logger.info(f"{len(duplicates)} copie(s) de média dédoublonnée(s).")
+
+    def _migration_6_media_status(self):
+        if "media_status" not in self._table_columns("records"):
+            self._exec_sql(
+                f"ALTER TABLE records ADD COLUMN media_status TEXT NOT NULL DEFAULT '{MEDIA_READY}'"
+            )
+        self._exec_sql(
+            f"CREATE INDEX IF NOT EXISTS idx_records_media_pending ON records (id) WHERE media_status = '{MEDIA_PENDING}'"
+        )
+
+    def _migration_7_addition_jobs(self):
+        # Travaux de la fenêtre d'ajout (voir addition_queue) ; l'index
+        # (status, available_at) sert la recherche du prochain travail prêt et
+        # les mises à jour par état
+        self._exec_sql(
+            """
+            CREATE TABLE IF NOT EXISTS addition_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT NOT NULL DEFAULT '',
+                question TEXT NOT NULL,
+                response TEXT NOT NULL,
+                start_time_ms INTEGER,
+                end_time_ms INTEGER,
+                attribution TEXT NOT NULL DEFAULT 'no-attribution',
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                error_message TEXT
+            )
+            """
+        )
+        self._exec_sql(
+            "CREATE INDEX IF NOT EXISTS idx_addition_jobs_status ON addition_jobs (status, available_at)"
+        )
+
+    def _migration_8_review_events(self):
+        # Une ligne par réponse vérifiée (voir usage_statistics) ; review_daily
+        # cumule les événements par jour et par mode, tenue à jour par déclencheurs
+        self._exec_sql(
+            """
+            CREATE TABLE IF NOT EXISTS review_events (
+                id INTEGER PRIMARY KEY,
+                UUID TEXT NOT NULL,
+                reviewed_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                correct INTEGER,
+                total INTEGER,
+                latency_ms INTEGER
+            )
             """
         )
+        # Index couvrant du taux d'erreur par entrée
+        self._exec_sql(
+            "CREATE INDEX IF NOT EXISTS idx_review_events_uuid ON review_events (UUID, mode, correct, total)"
+        )
+        self._exec_sql(
+            "CREATE INDEX IF NOT EXISTS idx_review_events_time ON review_events (reviewed_at)"
+        )
+        self._exec_sql(
+            """
+            CREATE TABLE IF NOT EXISTS review_daily (
+                day TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                events INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                timed INTEGER NOT NULL DEFAULT 0,
+                latency_ms INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, mode)
+            ) WITHOUT ROWID
+            """
+        )
+        self._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS review_events_ai AFTER INSERT ON review_events BEGIN
+                INSERT INTO review_daily (day, mode, events, correct, total, timed, latency_ms)
+                VALUES (
+                    new.day, new.mode, 1, COALESCE(new.correct, 0), COALESCE(new.total, 0),
+                    new.latency_ms IS NOT NULL, COALESCE(new.latency_ms, 0)
+                )
+                ON CONFLICT (day, mode) DO UPDATE SET
+                    events = events + 1,
+                    correct = correct + excluded.correct,
+                    total = total + excluded.total,
+                    timed = timed + excluded.timed,
+                    latency_ms = latency_ms + excluded.latency_ms;
+            END
+            """
+        )
+        self._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS review_events_ad AFTER DELETE ON review_events BEGIN
+                UPDATE review_daily SET
+                    events = events - 1,
+                    correct = correct - COALESCE(old.correct, 0),
+                    total = total - COALESCE(old.total, 0),
+                    timed = timed - (old.latency_ms IS NOT NULL),
+                    latency_ms = latency_ms - COALESCE(old.latency_ms, 0)
+                WHERE day = old.day AND mode = old.mode;
+                DELETE FROM review_daily
+                WHERE day = old.day AND mode = old.mode AND events <= 0;
+            END
+            """
+        )
+
+    def _migration_9_media_pins(self):
+        # Épingles posées par MediaStore.add_file jusqu'à l'écriture de l'entrée
+        if "pins" not in self._table_columns("media"):
+            self._exec_sql(
+                "ALTER TABLE media ADD COLUMN pins INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def create_fts_triggers(self):
+        """(Re)crée les déclencheurs qui synchronisent records_fts avec records."""
+        self._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS records_fts_ai AFTER INSERT ON records BEGIN
+                INSERT INTO records_fts (rowid, question, response, attribution)
+                VALUES (new.id, new.question, new.response, new.attribution);
+            END
+            """
+        )
+        self._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS records_fts_ad AFTER DELETE ON records BEGIN
+                INSERT INTO records_fts (records_fts, rowid, question, response, attribution)
+                VALUES ('delete', old.id, old.question, old.response, old.attribution);
+            END
+            """
+        )
+        self._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS records_fts_au
+            AFTER UPDATE OF question, response, attribution ON records BEGIN
+                INSERT INTO records_fts (records_fts, rowid, question, response, attribution)
+                VALUES ('delete', old.id, old.question, old.response, old.attribution);
+                INSERT INTO records_fts (rowid, question, response, attribution)
+                VALUES (new.id, new.question, new.response, new.attribution);
+            END
+            """
+        )
+
+    def create_indexes(self):
+        """Crée (idempotent) les index secondaires de la table records."""
+        query = QSqlQuery(self.db)
+        # Index d'unicité (question, réponse) : la détection des doublons repose dessus.
+        # Une base existante peut déjà contenir des doublons : on se rabat alors sur un
+        # index simple, qui accélère tout de même la vérification préalable.
+        if not query.exec_(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_records_question_response
+            ON records (question, response)
+            """
+        ):
+            logger.warning(
+                f"Doublons présents dans {self.db_name}, index d'unicité (question, réponse) non créé : {query.lastError().text()}"
+            )
+            self._exec_sql(
+                """
+                CREATE INDEX IF NOT EXISTS idx_records_question_response
+                ON records (question, response)
+                """
+            )
+        for statement in (
+            "CREATE INDEX IF NOT EXISTS idx_records_creation_date ON records (creation_date)",
+            "CREATE INDEX IF NOT EXISTS idx_records_favorite ON records (UUID) WHERE is_favorite = 1",
+            "CREATE INDEX IF NOT EXISTS idx_records_media_file ON records (media_file)",
+        ):
+            self._exec_sql(statement)
+
+    def rebuild_table(
+        self,
+        table: str,
+        create_sql: str,
+        columns: list,
+        select_sql: str,
+        after_swap=None,
+        chunk_size: int = None,
+        progress_callback=None,
+    ):
+        """Reconstruit `table` selon un nouveau schéma, sans longue transaction.
+
+        `create_sql` crée la nouvelle table (gabarit `{table}`) ; `select_sql`, de la
+        forme « SELECT ... FROM {table} » sans clause WHERE, renvoie le rowid d'origine
+        puis les valeurs des `columns` de la nouvelle table. Le rowid est conservé,
+        ce qui rend la copie reprenable. Les lignes sont copiées par tranches
+        de rowid, chaque tranche dans sa propre transaction : si l'application est
+        interrompue, la copie reprend au dernier rowid copié à l'ouverture suivante.
+        La bascule finale (suppression de l'ancienne table, renommage, `after_swap`
+        pour recréer index et déclencheurs) est atomique.
+        """
+        chunk_size = chunk_size or self.REBUILD_CHUNK_SIZE
+        new_table = f"{table}_rebuild"
+        if not self._table_exists(new_table):
+            self._exec_sql(create_sql.format(table=new_table))
+        last_rowid = int(
+            self._scalar(f"SELECT COALESCE(MAX(rowid), 0) FROM {new_table}")
+        )
+        remaining = int(
+            self._scalar(f"SELECT COUNT(*) FROM {table} WHERE rowid > ?", [last_rowid])
+        )
+        copied = 0
+        insert_columns = ", ".join(["rowid"] + list(columns))
+        select_from = select_sql.format(table=table)
+        while True:
+            if not self.db.transaction():
+                raise Exception(self.db.lastError().text())
+            try:
+                query = self._exec_sql(
+                    f"""
+                    INSERT INTO {new_table} ({insert_columns})
+                    {select_from} WHERE {table}.rowid > ? ORDER BY {table}.rowid LIMIT ?
+                    """,
+                    [last_rowid, chunk_size],
+                )
+                inserted = query.numRowsAffected()
+                last_rowid = int(
+                    self._scalar(f"SELECT COALESCE(MAX(rowid), 0) FROM {new_table}")
+                )
+                if not self.db.commit():
+                    raise Exception(self.db.lastError().text())
+            except Exception:
+                self.db.rollback()
+                raise
+            copied += inserted
+            if progress_callback:
+                progress_callback(copied, remaining)
+            if inserted < chunk_size:
+                break
+        if not self.db.transaction():
+            raise Exception(self.db.lastError().text())
+        try:
+            self._exec_sql(f"DROP TABLE {table}")
+            self._exec_sql(f"ALTER TABLE {new_table} RENAME TO {table}")
+            if after_swap:
+                after_swap()
+            if not self.db.commit():
+                raise Exception(self.db.lastError().text())
+        except Exception:
+            self.db.rollback()
+            raise
+        logger.info(f"Table {table} reconstruite ({copied} lignes copiées).")
+
+    def _is_unique_index(self, index_name: str) -> bool:
+        query = QSqlQuery(self.db)
+        if not query.exec_("PRAGMA index_list(records)"):
+            return False
+        unique = False
+        while query.next():
+            if query.value(1) == index_name:
+                unique = bool(query.value(2))
+                break
+        query.finish()
+        return unique
+
+    def _insert_sql(self) -> str:
+        """Requête d'insertion : les doublons (question, réponse) sont ignorés par
+        l'index d'unicité quand il existe, sans requête préalable."""
+        conflict_clause = (
+            "ON CONFLICT (question, response) DO NOTHING" if self.unique_pairs else ""
+        )
+        return f"""
+            INSERT INTO records (UUID, media_file, question, response, creation_date, custom_media, attribution, media_hash, media_status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            {conflict_clause}
+        """
 
     def auto_generate_audio(
         self, question: str, response: str, language_code: str
@@ -61,6 +859,14 @@ class DatabaseManager:
         Tous les (?) de la question sont remplacés dans l'ordre par les réponses.
         Retourne le chemin du fichier généré.
         """
+        media_hash, path = self._generate_audio(question, response, language_code)
+        self.media_store.unpin([media_hash])
+        return path
+
+    @staticmethod
+    def tts_text(question: str, response: str) -> str:
+        """Texte lu par la synthèse vocale : la question, chaque (?) remplacé dans
+        l'ordre par les réponses séparées par ';'."""
         responses = [r.strip() for r in response.split(";") if r.strip()]
         if not responses:
             raise Exception("Aucune réponse fournie pour la génération audio.")
@@ -75,22 +881,87 @@ class DatabaseManager:
             )
 
         replace_nth.idx = 0
-        audio_text = re.sub(r"\(\?\)", replace_nth, q)
-
-        from common_methods import TextUtils
+        return re.sub(r"\(\?\)", replace_nth, q)
 
-        # Utiliser toute la chaîne si elle fait moins de 20 caractères
-        base_name = TextUtils.clean_filename(
-            responses[0][:20] if len(responses[0]) > 20 else responses[0]
-        )
-        file_name = f"{base_name}.mp3"
-        media_file_path = os.path.join(self.audio_dir, file_name)
-        tts = gTTS(text=audio_text, lang=language_code)
+    def _generate_audio(self, question: str, response: str, language_code: str):
+        """Comme auto_generate_audio, renvoie (hash, chemin) du fichier stocké,
+        épinglé (voir MediaStore.add_file)."""
+        audio_text = self.tts_text(question, response)
+        # Un texte déjà synthétisé (cache TTS partagé) n'est pas redemandé ; le
+        # fichier est lié dans le stockage sous le nom de son contenu
         try:
-            tts.save(media_file_path)
+            cached_path = shared_tts_cache().synthesize(audio_text, language_code)
+            return self.media_store.add_file(cached_path)
         except Exception as e:
             raise Exception(f"Échec de la génération de l'audio : {e}")
-        return media_file_path
+
+    def _validate_record(self, question: str, response: str, creation_date: str = None):
+        """Vérifie la cohérence question/réponses et retourne la date de création à utiliser."""
+        # Vérification du nombre de (?) et de réponses
+        nb_placeholders = question.count("(?)")
+        nb_reponses = len([r for r in response.split(";") if r.strip()])
+        if nb_placeholders != nb_reponses:
+            raise Exception(
+                f"Le nombre de '(?)' dans la question ({nb_placeholders}) ne correspond pas au nombre de réponses fournies ({nb_reponses})."
+            )
+        if creation_date:
+            try:
+                datetime.strptime(creation_date, "%Y-%m-%d")
+            except ValueError:
+                raise Exception("Le format de la date doit être 'YYYY-MM-DD'")
+            return creation_date
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def _prepare_media(
+        self,
+        media_file: str,
+        question: str,
+        response: str,
+        start_time_ms: int = None,
+        end_time_ms: int = None,
+        media_processed: bool = False,
+    ):
+        """Génère l'audio TTS ou traite le média fourni.
+        Retourne (chemin, custom_media, media_hash) ; le média est épinglé jusqu'à
+        l'écriture de l'entrée (MediaStore.unpin ou release).
+        `media_processed` : fichier temporaire déjà découpé ou converti, déplacé tel
+        quel dans le stockage."""
+        if not media_file:
+            media_hash, path = self._generate_audio(
+                question, response, self.language_code
+            )
+            return path, 0, media_hash
+        try:
+            if media_processed:
+                media_hash, path = self.media_store.add_file(media_file, move=True)
+            else:
+                media_hash, path = self.media_store.import_media(
+                    media_file, start_time_ms, end_time_ms
+                )
+        except Exception as e:
+            raise Exception(f"Erreur lors du traitement du média : {e}")
+        return path, 1, media_hash
+
+    def _existing_pairs(self, pairs) -> set:
+        """Retourne les couples (question, réponse) de `pairs` déjà présents dans la base."""
+        questions = list({question for question, _ in pairs})
+        existing = set()
+        query = QSqlQuery(self.db)
+        for start in range(0, len(questions), SQLITE_MAX_PARAMS):
+            chunk = questions[start : start + SQLITE_MAX_PARAMS]
+            placeholders = ",".join(["?"] * len(chunk))
+            query.prepare(
+                f"SELECT question, response FROM records WHERE question IN ({placeholders})"
+            )
+            for question in chunk:
+                query.addBindValue(question)
+            if not query.exec_():
+                raise Exception(
+                    f"Failed to check for duplicate records: {query.lastError().text()}"
+                )
+            while query.next():
+                existing.add((query.value(0), query.value(1)))
+        return existing
 
     def insert_record(
         self,
@@ -104,82 +975,208 @@ class DatabaseManager:
         attribution: str = "no-attribution",
     ):
         try:
-            # Vérification du nombre de (?) et de réponses
-            nb_placeholders = question.count("(?)")
-            nb_reponses = len([r for r in response.split(";") if r.strip()])
-            if nb_placeholders != nb_reponses:
-                raise Exception(
-                    f"Le nombre de '(?)' dans la question ({nb_placeholders}) ne correspond pas au nombre de réponses fournies ({nb_reponses})."
-                )
+            question = TextUtils.normalize_special_characters(question)
+            response = TextUtils.normalize_special_characters(response)
+            creation_date = self._validate_record(question, response, creation_date)
 
             # Vérifier si un entrée avec la même question et réponse existe déjà (AVANT toute opération)
-            query = QSqlQuery(self.db)
-            query.prepare(
-                """
-                SELECT COUNT(*) FROM records
-                WHERE question = ? AND response = ?
-                """
+            if self._existing_pairs([(question, response)]):
+                return INSERT_DUPLICATE
+
+            UUID = UUID or str(uuid.uuid4())
+            media_file, custom_media, media_hash = self._prepare_media(
+                media_file, question, response, start_time_ms, end_time_ms
             )
+
+            query = QSqlQuery(self.db)
+            query.prepare(self._insert_sql())
+            query.addBindValue(UUID)
+            query.addBindValue(media_file)
             query.addBindValue(question)
             query.addBindValue(response)
-            if not query.exec_():
-                raise Exception(
-                    f"Failed to check for duplicate record: {query.lastError().text()}"
+            query.addBindValue(creation_date)
+            query.addBindValue(custom_media)
+            query.addBindValue(attribution or "no-attribution")
+            query.addBindValue(media_hash)
+            query.addBindValue(MEDIA_READY)
+            inserted = query.exec_()
+            if not inserted:
+                # Échec réel (UUID déjà pris, contrainte, E/S) : pas un doublon
+                logger.error(
+                    f"Échec de l'insertion de '{question}' : {query.lastError().text()}"
                 )
-            query.next()
-            if query.value(0) > 0:
-                return 1
+            elif query.numRowsAffected() > 0:
+                self.media_store.unpin([media_hash])
+                return INSERT_OK
+            self.media_store.release([media_hash])
+            return INSERT_FAILED if not inserted else INSERT_DUPLICATE
+        except Exception:
+            raise
 
-            UUID = UUID or str(uuid.uuid4())
-            if creation_date:
-                try:
-                    datetime.strptime(creation_date, "%Y-%m-%d")
-                except ValueError:
-                    raise Exception("Le format de la date doit être 'YYYY-MM-DD'")
-            else:
-                creation_date = datetime.now().strftime("%Y-%m-%d")
+    def insert_records_batch(
+        self, rows, chunk_size: int = 500, progress_callback=None, defer_tts=False
+    ) -> list:
+        """Insère une liste d'entrées par lots, chaque lot dans une seule transaction.
+
+        `rows` est une liste de dicts acceptant les mêmes clés que les arguments de
+        insert_record (media_file, question, response, start_time_ms, end_time_ms,
+        UUID, creation_date, attribution), ainsi que media_processed (voir
+        _prepare_media).
+        Retourne un code de statut par entrée, dans l'ordre :
+        INSERT_OK, INSERT_DUPLICATE ou INSERT_FAILED.
+        `progress_callback(n)` est appelé après chaque lot validé (ou annulé) avec
+        le nombre d'entrées traitées.
+        Avec `defer_tts`, les entrées sans média sont insérées sans attendre la
+        synthèse vocale, à l'état MEDIA_PENDING (voir tts_backfill).
+        """
+        statuses = [INSERT_FAILED] * len(rows)
+        chunk_size = max(1, chunk_size)
+        for chunk_start in range(0, len(rows), chunk_size):
+            chunk = rows[chunk_start : chunk_start + chunk_size]
 
-            if not media_file:
-                media_file = self.auto_generate_audio(
-                    question, response, self.language_code
+            # 1. Validation et normalisation
+            candidates = []
+            for offset, row in enumerate(chunk):
+                index = chunk_start + offset
+                question = TextUtils.normalize_special_characters(
+                    row.get("question") or ""
+                )
+                response = TextUtils.normalize_special_characters(
+                    row.get("response") or ""
                 )
-                custom_media = 0
-            else:
                 try:
-                    media_file = MediaUtils.MediaFileProcessing.process_media_file(
-                        media_file, self.audio_dir, start_time_ms, end_time_ms
+                    creation_date = self._validate_record(
+                        question, response, row.get("creation_date")
                     )
                 except Exception as e:
-                    raise Exception(f"Erreur lors du traitement du média : {e}")
-                custom_media = 1
+                    logger.warning(f"Entrée invalide ignorée ({question}) : {e}")
+                    continue
+                candidates.append((index, row, question, response, creation_date))
 
-            query.prepare(
-                """
-                INSERT INTO records (UUID, media_file, question, response, creation_date, custom_media, attribution)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """
+            # 2. Doublons : dans le lot lui-même puis dans la base (une requête par lot)
+            try:
+                seen = self._existing_pairs([(c[2], c[3]) for c in candidates])
+            except Exception as e:
+                logger.error(f"Échec de la vérification des doublons : {e}")
+                if progress_callback:
+                    progress_callback(chunk_start + len(chunk))
+                continue
+            unique_candidates = []
+            for candidate in candidates:
+                pair = (candidate[2], candidate[3])
+                if pair in seen:
+                    statuses[candidate[0]] = INSERT_DUPLICATE
+                    continue
+                seen.add(pair)
+                unique_candidates.append(candidate)
+
+            # 3. Préparation des médias (hors transaction, opérations lentes)
+            values = [[] for _ in range(9)]
+            inserted_indexes = []
+            for index, row, question, response, creation_date in unique_candidates:
+                media_status = MEDIA_READY
+                try:
+                    if defer_tts and not row.get("media_file"):
+                        media_file, custom_media, media_hash = "", 0, None
+                        media_status = MEDIA_PENDING
+                    else:
+                        media_file, custom_media, media_hash = self._prepare_media(
+                            row.get("media_file") or "",
+                            question,
+                            response,
+                            row.get("start_time_ms"),
+                            row.get("end_time_ms"),
+                            row.get("media_processed", False),
+                        )
+                except Exception as e:
+                    logger.error(
+                        f"Échec de la préparation du média pour '{question}' : {e}"
+                    )
+                    continue
+                for column, value in enumerate(
+                    (
+                        row.get("UUID") or str(uuid.uuid4()),
+                        media_file,
+                        question,
+                        response,
+                        creation_date,
+                        custom_media,
+                        row.get("attribution") or "no-attribution",
+                        media_hash,
+                        media_status,
+                    )
+                ):
+                    values[column].append(value)
+                inserted_indexes.append(index)
+
+            # 4. Insertion groupée dans une seule transaction ; la progression n'avance
+            # qu'une fois le lot validé ou annulé
+            if inserted_indexes:
+                self._insert_chunk(values, inserted_indexes, statuses)
+                # Médias préparés pour des entrées finalement non insérées
+                self.media_store.release(values[7])
+            if progress_callback:
+                progress_callback(chunk_start + len(chunk))
+        return statuses
+
+    def _insert_chunk(self, values, indexes, statuses):
+        """Insère un lot préparé (une liste de valeurs par colonne) dans une transaction.
+        Si l'exécution groupée échoue (ex. UUID déjà présent), le lot est rejoué ligne
+        par ligne dans une nouvelle transaction pour isoler les entrées fautives.
+        Si aucune transaction ne peut être ouverte, rien n'est écrit : les entrées du
+        lot restent en échec plutôt que d'être insérées une à une hors transaction."""
+        insert_sql = self._insert_sql()
+        if not self.db.transaction():
+            logger.error(
+                f"Impossible d'ouvrir une transaction, lot non inséré : {self.db.lastError().text()}"
             )
-            query.addBindValue(UUID)
-            query.addBindValue(media_file)
-            from common_methods import TextUtils
+            return
+        query = QSqlQuery(self.db)
+        query.prepare(insert_sql)
+        for column in values:
+            query.addBindValue(column)
+        if query.execBatch() and self.db.commit():
+            for index in indexes:
+                statuses[index] = INSERT_OK
+            return
+        logger.warning(
+            f"Échec de l'insertion groupée, reprise ligne par ligne : {query.lastError().text()}"
+        )
+        self.db.rollback()
 
-            query.addBindValue(TextUtils.normalize_special_characters(question))
-            query.addBindValue(TextUtils.normalize_special_characters(response))
-            query.addBindValue(creation_date)
-            query.addBindValue(custom_media)
-            query.addBindValue(attribution or "no-attribution")
+        if not self.db.transaction():
+            logger.error(
+                f"Impossible d'ouvrir une transaction, lot non inséré : {self.db.lastError().text()}"
+            )
+            return
+        query = QSqlQuery(self.db)
+        query.prepare(insert_sql)
+        row_statuses = {}
+        for position, index in enumerate(indexes):
+            for column in values:
+                query.addBindValue(column[position])
             if not query.exec_():
-                return 1
-                raise Exception(f"Failed to insert record: {query.lastError().text()}")
+                logger.error(
+                    f"Échec de l'insertion de '{values[2][position]}' : {query.lastError().text()}"
+                )
+                row_statuses[index] = INSERT_FAILED
+            elif query.numRowsAffected() == 0:
+                row_statuses[index] = INSERT_DUPLICATE
             else:
-                return 0
-        except Exception:
-            raise
+                row_statuses[index] = INSERT_OK
+        if not self.db.commit():
+            self.db.rollback()
+            row_statuses = dict.fromkeys(indexes, INSERT_FAILED)
+        for index, status in row_statuses.items():
+            statuses[index] = status
 
     def _fetch_records(self, query_text: str, params: list = None) -> list:
-        """Méthode générique pour exécuter une requête SELECT et récupérer les résultats."""
+        """Méthode générique pour exécuter une requête SELECT (colonnes dans l'ordre
+        de RECORD_SELECT) et récupérer les résultats sous forme de Record."""
         try:
             query = QSqlQuery(self.db)
+            # Curseur en avant seulement : Qt ne met pas les lignes lues en cache
+            query.setForwardOnly(True)
             query.prepare(query_text)
             if params:
                 for param in params:
@@ -187,21 +1184,23 @@ class DatabaseManager:
             if not query.exec_():
                 raise Exception(f"Failed to execute query: {query.lastError().text()}")
 
+            value = query.value
+            make = Record._make
             records = []
             while query.next():
                 records.append(
-                    {
-                        "UUID": query.value(0),
-                        "media_file": query.value(1),
-                        "question": query.value(2),
-                        "response": query.value(3),
-                        "creation_date": query.value(4),
-                        "attribution": (
-                            query.value(6)
-                            if query.record().count() > 6
-                            else "no-attribution"
-                        ),
-                    }
+                    make(
+                        (
+                            value(0),
+                            value(1),
+                            value(2),
+                            value(3),
+                            value(4),
+                            value(5),
+                            value(6),
+                            value(7),
+                        )
+                    )
                 )
             return records
         except Exception:
@@ -209,47 +1208,207 @@ class DatabaseManager:
 
     def fetch_all_records(self):
         """Récupère tous les enregistrements de la base de données."""
-        query_text = """
-            SELECT UUID, media_file, question, response, creation_date, custom_media, attribution
+        query_text = f"""
+            SELECT {RECORD_SELECT}
             FROM records
         """
         return self._fetch_records(query_text)
 
     def fetch_record_by_creation_date(self, start: date, finish: date):
         """Récupère les enregistrements entre deux dates."""
-        query_text = """
-            SELECT UUID, media_file, question, response, creation_date, custom_media, attribution
+        query_text = f"""
+            SELECT {RECORD_SELECT}
             FROM records
             WHERE creation_date BETWEEN ? AND ?
         """
         params = [start.isoformat(), finish.isoformat()]
         return self._fetch_records(query_text, params)
 
+    @staticmethod
+    def _filter_clause(record_filter: dict = None):
+        """Traduit un filtre d'entrées en conditions SQL et paramètres.
+
+        Clés reconnues (toutes facultatives) : `start` et `end` (date ou chaîne ISO,
+        bornes incluses de creation_date) et `favorite` (bool). Un filtre ne contient
+        que des valeurs simples : il peut être enregistré en JSON avec une session.
+        """
+        record_filter = record_filter or {}
+        conditions, params = [], []
+        for key, operator in (("start", ">="), ("end", "<=")):
+            value = record_filter.get(key)
+            if value is not None:
+                conditions.append(f"creation_date {operator} ?")
+                params.append(
+                    value.isoformat() if hasattr(value, "isoformat") else value
+                )
+        if record_filter.get("favorite") is not None:
+            conditions.append("is_favorite = ?")
+            params.append(1 if record_filter["favorite"] else 0)
+        return conditions, params
+
+    def count_records(self, record_filter: dict = None) -> int:
+        """Nombre d'entrées correspondant au filtre."""
+        conditions, params = self._filter_clause(record_filter)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return int(self._scalar(f"SELECT COUNT(*) FROM records {where}", params))
+
+    def fetch_page(
+        self,
+        after_uuid: str = None,
+        after_rowid: int = None,
+        limit: int = 500,
+        record_filter: dict = None,
+    ):
+        """Page d'entrées par pagination sur clé (ordre d'insertion).
+
+        Renvoie `(records, next_rowid)` : `next_rowid` se passe en `after_rowid` pour
+        obtenir la page suivante et vaut None une fois la fin atteinte. Reprendre
+        après `after_uuid` suppose que cette entrée existe encore ; `after_rowid`
+        reste valable même si des entrées ont été supprimées entre deux pages.
+        """
+        conditions, params = self._filter_clause(record_filter)
+        if after_rowid is not None:
+            conditions.append("id > ?")
+            params.append(after_rowid)
+        elif after_uuid is not None:
+            conditions.append("id > (SELECT id FROM records WHERE UUID = ?)")
+            params.append(after_uuid)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = QSqlQuery(self.db)
+        query.setForwardOnly(True)
+        query.prepare(
+            f"SELECT {RECORD_SELECT}, id FROM records {where} ORDER BY id LIMIT ?"
+        )
+        for param in params + [limit]:
+            query.addBindValue(param)
+        if not query.exec_():
+            raise Exception(f"Failed to execute query: {query.lastError().text()}")
+        value = query.value
+        make = Record._make
+        records = []
+        last_rowid = None
+        while query.next():
+            records.append(make([value(i) for i in range(RECORD_FIELD_COUNT)]))
+            last_rowid = value(RECORD_FIELD_COUNT)
+        query.finish()
+        next_rowid = last_rowid if len(records) == limit else None
+        return records, next_rowid
+
+    def iter_records(self, record_filter: dict = None, batch_size: int = 1000):
+        """Parcourt les entrées une à une, en mémoire bornée.
+
+        Les lignes sont lues par pages de `batch_size` (curseur en avant seulement,
+        fermé avant de rendre la main) : l'appelant peut écrire dans la base pendant
+        le parcours sans garder de verrou de lecture ouvert.
+        """
+        records, next_rowid = self.fetch_page(
+            limit=batch_size, record_filter=record_filter
+        )
+        while True:
+            yield from records
+            if next_rowid is None:
+                return
+            records, next_rowid = self.fetch_page(
+                after_rowid=next_rowid, limit=batch_size, record_filter=record_filter
+            )
+
+    @staticmethod
+    def _fts_match_expression(text: str) -> str:
+        """Convertit la saisie en requête FTS5 : chaque mot, entre guillemets (ce qui
+        neutralise la syntaxe FTS5), est cherché comme préfixe ; tous sont requis."""
+        words = [word for word in text.split() if re.search(r"\w", word)]
+        return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+    def search_records(self, query: str, limit: int = 100, offset: int = 0) -> list:
+        """Recherche les entrées dont la question, la réponse ou l'attribution
+        contiennent tous les mots saisis (en début de mot, sans tenir compte de la
+        casse ni des accents), dans l'ordre d'insertion comme la table complète.
+        Le tri par rowid permet à FTS5 de s'arrêter dès `limit` résultats."""
+        match = self._fts_match_expression(query)
+        if not match:
+            return []
+        if self.fts_enabled:
+            query_text = """
+                SELECT r.UUID, r.media_file, r.question, r.response, r.creation_date, r.custom_media, r.attribution, r.is_favorite
+                FROM records_fts
+                JOIN records r ON r.id = records_fts.rowid
+                WHERE records_fts MATCH ?
+                ORDER BY records_fts.rowid
+                LIMIT ? OFFSET ?
+            """
+            return self._fetch_records(query_text, [match, limit, offset])
+        # Sans FTS5 : parcours de la table, sensible aux accents
+        words = query.split()
+        conditions = " AND ".join(
+            ["(question LIKE ? OR response LIKE ? OR attribution LIKE ?)"] * len(words)
+        )
+        params = [f"%{word}%" for word in words for _ in range(3)]
+        query_text = f"""
+            SELECT {RECORD_SELECT}
+            FROM records
+            WHERE {conditions}
+            ORDER BY id
+            LIMIT ? OFFSET ?
+        """
+        return self._fetch_records(query_text, params + [limit, offset])
+
     def fetch_record_by_uuid(self, uuid):
-        """Récupère un ou plusieurs enregistrements depuis la base de données par UUID ou liste d'UUIDs (optimisé)."""
+        """Récupère un ou plusieurs enregistrements depuis la base de données par UUID ou liste d'UUIDs.
+
+        Pour une liste, les entrées sont renvoyées dans l'ordre de `uuid` (les UUID
+        introuvables sont omis), quelle que soit sa longueur : au-delà de la limite de
+        paramètres liés, les UUID sont passés en un seul tableau JSON parcouru par
+        json_each (ou, sans extension JSON, en requêtes IN (...) découpées)."""
         if isinstance(uuid, list):
             if not uuid:
                 return []
-            # Une seule requête SQL avec IN (?, ?, ...)
-            placeholders = ",".join(["?"] * len(uuid))
-            query_text = f"""
-                SELECT UUID, media_file, question, response, creation_date, custom_media, attribution
-                FROM records
-                WHERE UUID IN ({placeholders})
-            """
-            records = self._fetch_records(query_text, uuid)
+            unique = list(dict.fromkeys(uuid))
+            if len(unique) > SQLITE_MAX_PARAMS and self._json_each_available():
+                query_text = f"""
+                    SELECT {RECORD_SELECT}
+                    FROM records
+                    WHERE UUID IN (SELECT value FROM json_each(?))
+                """
+                records = self._fetch_records(query_text, [json.dumps(unique)])
+            else:
+                records = []
+                for chunk in self._chunks(unique):
+                    placeholders = ",".join(["?"] * len(chunk))
+                    query_text = f"""
+                        SELECT {RECORD_SELECT}
+                        FROM records
+                        WHERE UUID IN ({placeholders})
+                    """
+                    records.extend(self._fetch_records(query_text, chunk))
             # Trie les résultats selon l'ordre de uuid
-            uuid_to_record = {rec["UUID"]: rec for rec in records}
+            uuid_to_record = {rec.UUID: rec for rec in records}
             return [uuid_to_record[u] for u in uuid if u in uuid_to_record]
         # Cas unique (str)
-        query_text = """
-            SELECT UUID, media_file, question, response, creation_date, custom_media, attribution
+        query_text = f"""
+            SELECT {RECORD_SELECT}
             FROM records
             WHERE UUID = ?
         """
         records = self._fetch_records(query_text, [uuid])
         return records[0] if records else None
 
+    def _json_each_available(self) -> bool:
+        """Vrai si le SQLite de Qt fournit json_each (extension JSON, intégrée par
+        défaut depuis SQLite 3.38)."""
+        if self._json_each is None:
+            query = QSqlQuery(self.db)
+            self._json_each = bool(
+                query.exec_("SELECT value FROM json_each('[1]')") and query.next()
+            )
+            query.finish()
+        return self._json_each
+
+    @staticmethod
+    def _chunks(items: list, size: int = SQLITE_MAX_PARAMS):
+        """Découpe une liste pour rester sous la limite de paramètres liés de SQLite."""
+        for start in range(0, len(items), size):
+            yield items[start : start + size]
+
     def update_record(
         self,
         record_id: str,
@@ -258,188 +1417,475 @@ class DatabaseManager:
         new_response: str,
         new_attribution: str = None,
     ) -> bool:
-        try:
-            """Met à jour un entrée existant dans la base de données."""
-            # Récupérer l'entrée existante
-            query = QSqlQuery(self.db)
+        """Met à jour un entrée existant dans la base de données."""
+        change = {
+            "UUID": record_id,
+            "media_file": new_media_file,
+            "question": new_question,
+            "response": new_response,
+            "attribution": new_attribution,
+        }
+        return self.update_records([change])[0] is not None
+
+    def update_records(self, changes: list, progress_callback=None) -> list:
+        """Met à jour plusieurs entrées en une seule transaction.
+
+        Chaque modification est un dict : UUID, media_file, question, response et
+        attribution (facultative). Les médias sont préparés avant la transaction
+        (nouveau fichier traité, ou audio régénéré quand le texte d'une entrée sans
+        média personnalisé change). Renvoie, dans l'ordre de `changes`, l'entrée
+        mise à jour (Record) ou None en cas d'échec.
+        """
+        results = [None] * len(changes)
+        existing = {}
+        query = QSqlQuery(self.db)
+        uuids = list({change["UUID"] for change in changes})
+        for chunk in self._chunks(uuids):
+            placeholders = ",".join(["?"] * len(chunk))
             query.prepare(
-                """
-                SELECT media_file, question, response, custom_media FROM records WHERE UUID = ?
-                """
+                f"SELECT UUID, media_file, question, response, custom_media, media_hash, media_status FROM records WHERE UUID IN ({placeholders})"
             )
-            query.addBindValue(record_id)
+            for record_id in chunk:
+                query.addBindValue(record_id)
             if not query.exec_():
-                raise Exception(f"Failed to fetch record: {query.lastError().text()}")
-
-            if not query.next():
-                raise Exception("Record not found")
-
-            old_media_file = query.value(0)
-            old_question = query.value(1)
-            old_response = query.value(2)
-            custom_media = query.value(3)
-            custom_deleted = False
-            if (
-                len(new_media_file) <= 2
-            ):  # en cas quelques espaces sont entrées par hasard
-                custom_media = 0
-                custom_deleted = True
-                logger.info(
-                    f"custom media for {record_id} is deleted. An automated audio file will be generated."
+                raise Exception(f"Failed to fetch records: {query.lastError().text()}")
+            while query.next():
+                existing[query.value(0)] = (
+                    query.value(1),
+                    query.value(2),
+                    query.value(3),
+                    query.value(4),
+                    query.value(5) or None,
+                    query.value(6),
                 )
-            else:
-                if new_media_file != old_media_file:
-                    try:
-                        new_media_file = (
-                            MediaUtils.MediaFileProcessing.process_media_file(
-                                new_media_file, self.audio_dir
-                            )
-                        )
-                    except Exception as e:
-                        raise Exception(
-                            f"Erreur lors du traitement du nouveau média : {e}"
-                        )
-                    custom_media = 1
+        query.finish()
 
-            # Vérifier si le média doit être régénéré
-            if custom_media != 1 and (
-                new_response != old_response
-                or new_question != old_question
-                or custom_deleted == True
-            ):
-                if os.path.exists(old_media_file):
-                    try:
-                        os.remove(old_media_file)  # Supprimer l'ancien fichier média
-                    except Exception as e:
-                        raise Exception(
-                            f"Échec de la suppression de l'ancien média : {e}"
-                        )
-                from common_methods import TextUtils
-
-                new_question = TextUtils.normalize_special_characters(new_question)
-                new_response = TextUtils.normalize_special_characters(new_response)
-                new_media_file = self.auto_generate_audio(
-                    new_question,
-                    new_response,
-                    self.language_code,
+        prepared = []
+        for index, change in enumerate(changes):
+            try:
+                prepared.append(
+                    (index, *self._prepare_update(change, existing.get(change["UUID"])))
                 )
+            except Exception as e:
+                logger.error(f"Mise à jour impossible pour {change['UUID']} : {e}")
+            if progress_callback:
+                progress_callback(index + 1)
+        if not prepared:
+            return results
 
-            # Mettre à jour l'entrée
-            query.prepare(
-                """
-                UPDATE records
-                SET media_file = ?, question = ?, response = ?, custom_media = ?, attribution = ?
-                WHERE UUID = ?
-                """
+        # Anciens et nouveaux médias : ceux qui ne sont plus référencés après la
+        # mise à jour sont effacés
+        pinned_media = [pinned for _, _, pinned in prepared]
+        touched_media = [values[5] for _, values, _ in prepared]
+        touched_media += [
+            existing[changes[index]["UUID"]][4] for index, _, _ in prepared
+        ]
+        updated = []
+        if not self.db.transaction():
+            raise Exception(self.db.lastError().text())
+        query.prepare(
+            """
+            UPDATE records
+            SET media_file = ?, question = ?, response = ?, custom_media = ?, attribution = ?,
+                media_hash = ?, media_status = ?
+            WHERE UUID = ?
+            """
+        )
+        for index, values, _ in prepared:
+            for value in values:
+                query.addBindValue(value)
+            # Un échec (p. ex. couple question/réponse déjà existant) n'annule que
+            # l'instruction concernée
+            if query.exec_():
+                updated.append(index)
+            else:
+                logger.error(
+                    f"Failed to update record {changes[index]['UUID']}: {query.lastError().text()}"
+                )
+        if not self.db.commit():
+            self.db.rollback()
+            logger.error(
+                f"Échec de la validation des mises à jour : {self.db.lastError().text()}"
             )
-            query.addBindValue(new_media_file)
-            query.addBindValue(new_question)
-            query.addBindValue(new_response)
-            query.addBindValue(custom_media)
-            query.addBindValue(new_attribution or "no-attribution")
-            query.addBindValue(record_id)
-            if not query.exec_():
-                raise Exception(f"Failed to update record: {query.lastError().text()}")
-            return True
-        except Exception:
-            return False
+            self.media_store.unpin(pinned_media)
+            self.media_store.collect_garbage(touched_media)
+            return results
+        self.media_store.unpin(pinned_media)
+        self.media_store.collect_garbage(touched_media)
+
+        records = {
+            record.UUID: record
+            for record in self.fetch_record_by_uuid(
+                [changes[index]["UUID"] for index in updated]
+            )
+        }
+        for index in updated:
+            results[index] = records.get(changes[index]["UUID"])
+        return results
+
+    def _prepare_update(self, change: dict, existing) -> tuple:
+        """Calcule les valeurs de l'UPDATE d'une entrée et prépare son média.
+        Renvoie (valeurs, empreinte du média épinglé ou None)."""
+        if existing is None:
+            raise Exception("Record not found")
+        record_id = change["UUID"]
+        new_media_file = change["media_file"]
+        new_question = change["question"]
+        new_response = change["response"]
+        (
+            old_media_file,
+            old_question,
+            old_response,
+            custom_media,
+            media_hash,
+            media_status,
+        ) = existing
+        custom_deleted = False
+        pinned_hash = None
+        if len(new_media_file) <= 2:  # en cas quelques espaces sont entrées par hasard
+            custom_media = 0
+            custom_deleted = True
+            logger.info(
+                f"custom media for {record_id} is deleted. An automated audio file will be generated."
+            )
+        else:
+            if new_media_file != old_media_file:
+                try:
+                    media_hash, new_media_file = self.media_store.import_media(
+                        new_media_file
+                    )
+                    pinned_hash = media_hash
+                    media_status = MEDIA_READY
+                except Exception as e:
+                    raise Exception(f"Erreur lors du traitement du nouveau média : {e}")
+                custom_media = 1
+
+        # Vérifier si le média doit être régénéré
+        if custom_media != 1 and (
+            new_response != old_response
+            or new_question != old_question
+            or custom_deleted == True
+        ):
+            # L'ancien média est effacé après la mise à jour s'il n'est plus référencé
+            new_question = TextUtils.normalize_special_characters(new_question)
+            new_response = TextUtils.normalize_special_characters(new_response)
+            media_hash, new_media_file = self._generate_audio(
+                new_question,
+                new_response,
+                self.language_code,
+            )
+            pinned_hash = media_hash
+            media_status = MEDIA_READY
+        values = (
+            new_media_file,
+            new_question,
+            new_response,
+            custom_media,
+            change.get("attribution") or "no-attribution",
+            media_hash,
+            media_status,
+            record_id,
+        )
+        return values, pinned_hash
 
     def delete_record(self, record_id: str) -> bool:
+        """Supprime un entrée de la base de données. Renvoie False si aucune entrée
+        n'a été supprimée (UUID introuvable ou erreur)."""
         try:
-            """Supprime un entrée de la base de données."""
-            # D'abord récupérer le chemin du fichier média
-            query = QSqlQuery(self.db)
-            query.prepare("SELECT media_file FROM records WHERE UUID = ?")
-            query.addBindValue(record_id)
+            return bool(self.delete_records([record_id]))
+        except Exception:
+            return False
 
+    def delete_records(self, uuids: list) -> set:
+        """Supprime plusieurs entrées en une seule transaction et renvoie les UUID
+        effectivement supprimés. Les fichiers média qui ne sont plus référencés par
+        aucune entrée sont ensuite effacés (compteur de références de la table media).
+        """
+        uuids = list(dict.fromkeys(uuids))
+        media_by_uuid = {}
+        query = QSqlQuery(self.db)
+        for chunk in self._chunks(uuids):
+            placeholders = ",".join(["?"] * len(chunk))
+            query.prepare(
+                f"SELECT UUID, media_hash FROM records WHERE UUID IN ({placeholders})"
+            )
+            for record_id in chunk:
+                query.addBindValue(record_id)
             if not query.exec_():
                 raise Exception(
                     f"Échec de la récupération du fichier média: {query.lastError().text()}"
                 )
+            while query.next():
+                media_by_uuid[query.value(0)] = query.value(1)
+        query.finish()
+        if not media_by_uuid:
+            return set()
 
-            media_file_path = None
-            if query.next():
-                media_file_path = query.value(0)
-
-            # Ensuite supprimer l'entrée de la base de données
-            query = QSqlQuery(self.db)
-            query.prepare("DELETE FROM records WHERE UUID = ?")
-            query.addBindValue(record_id)
-            if not query.exec_():
-                raise Exception(f"Failed to delete record: {query.lastError().text()}")
-            self.db.commit()  # Valider les modifications
-
-            # Vérifier s'il reste d'autres entrées qui utilisent le même fichier média
-            if media_file_path:
-                query = QSqlQuery(self.db)
-                query.prepare("SELECT COUNT(*) FROM records WHERE media_file = ?")
-                query.addBindValue(media_file_path)
+        if not self.db.transaction():
+            raise Exception(self.db.lastError().text())
+        try:
+            for chunk in self._chunks(list(media_by_uuid)):
+                placeholders = ",".join(["?"] * len(chunk))
+                query.prepare(f"DELETE FROM records WHERE UUID IN ({placeholders})")
+                for record_id in chunk:
+                    query.addBindValue(record_id)
                 if not query.exec_():
                     raise Exception(
-                        f"Échec de la vérification des références du média: {query.lastError().text()}"
+                        f"Failed to delete records: {query.lastError().text()}"
                     )
-                if query.next() and query.value(0) == 0:
-                    # Personne d'autre ne référence ce fichier, on peut le supprimer
-                    if os.path.exists(media_file_path):
-                        try:
-                            os.remove(media_file_path)
-                            print(f"Fichier média supprimé: {media_file_path}")
-                        except Exception as e:
-                            print(f"Échec de la suppression du fichier média: {e}")
-            return True
+            if not self.db.commit():
+                raise Exception(self.db.lastError().text())
         except Exception:
-            return False
+            self.db.rollback()
+            raise
+        deleted = set(media_by_uuid)
+        if self._favorites is not None:
+            self._favorites -= deleted
+        self.media_store.collect_garbage(media_by_uuid.values())
+        return deleted
 
-    def set_favorite(self, entry_uuid, is_fav: bool):
-        """Marque ou démarque une entrée comme favorite dans la base."""
+    def move_records(self, records: list, target) -> tuple:
+        """Déplace des entrées (dicts acceptant les arguments de insert_record) vers
+        la base `target`. Une entrée n'est supprimée d'ici que si elle a été insérée
+        dans la cible, ou si la cible contient déjà la même question et réponse.
+        Retourne (UUID déplacés, UUID restés dans cette base)."""
+        rows = [
+            {
+                "media_file": record.get("media_file") or "",
+                "question": record["question"],
+                "response": record["response"],
+                "UUID": record["UUID"],
+                "creation_date": record.get("creation_date"),
+                "attribution": record.get("attribution"),
+            }
+            for record in records
+        ]
+        try:
+            statuses = target.insert_records_batch(rows)
+        except Exception as e:
+            logger.error(f"Échec du déplacement des entrées : {e}")
+            statuses = [INSERT_FAILED] * len(rows)
+        # Un doublon au sein de la sélection n'est dans la cible que si son
+        # équivalent y a bien été inséré : on le vérifie avant de supprimer
+        pairs = [
+            (
+                TextUtils.normalize_special_characters(row["question"]),
+                TextUtils.normalize_special_characters(row["response"]),
+            )
+            for row in rows
+        ]
+        duplicates = [
+            pair for pair, status in zip(pairs, statuses) if status == INSERT_DUPLICATE
+        ]
+        in_target = target._existing_pairs(duplicates) if duplicates else set()
+        moved, failed = [], []
+        for row, pair, status in zip(rows, pairs, statuses):
+            if status == INSERT_OK or (
+                status == INSERT_DUPLICATE and pair in in_target
+            ):
+                moved.append(row["UUID"])
+            else:
+                failed.append(row["UUID"])
+        deleted = self.delete_records(moved) if moved else set()
+        return [uuid for uuid in moved if uuid in deleted], failed
+
+    def pending_media(self, limit: int = 100) -> list:
+        """Entrées en attente d'audio TTS, par ordre d'insertion :
+        liste de (UUID, question, response)."""
         query = QSqlQuery(self.db)
-        query.prepare("UPDATE records SET is_favorite=? WHERE UUID=?")
-        query.addBindValue(1 if is_fav else 0)
-        query.addBindValue(entry_uuid)
+        query.setForwardOnly(True)
+        query.prepare(
+            "SELECT UUID, question, response FROM records WHERE media_status = ? ORDER BY id LIMIT ?"
+        )
+        query.addBindValue(MEDIA_PENDING)
+        query.addBindValue(limit)
         if not query.exec_():
             raise Exception(
-                f"Erreur lors de la mise à jour du favori: {query.lastError().text()}"
+                f"Failed to fetch pending media: {query.lastError().text()}"
             )
-        self.db.commit()
+        pending = []
+        while query.next():
+            pending.append((query.value(0), query.value(1), query.value(2)))
+        query.finish()
+        return pending
 
-    def is_favorite(self, entry_uuid):
-        """Retourne True si l'entrée est favorite."""
+    def count_pending_media(self) -> int:
+        return int(
+            self._scalar(
+                "SELECT COUNT(*) FROM records WHERE media_status = ?", [MEDIA_PENDING]
+            )
+        )
+
+    def attach_generated_media(self, generated: list) -> list:
+        """Attache à leurs entrées des fichiers audio générés en arrière-plan.
+
+        `generated` est une liste de (UUID, chemin du fichier généré) ; les fichiers
+        sont ajoutés au stockage et les entrées mises à jour en une transaction.
+        Une entrée modifiée ou supprimée entre-temps n'est plus en attente : son
+        fichier est alors écarté. Renvoie les (UUID, chemin) attachés.
+        """
+        if not generated:
+            return []
+        attached = []
+        hashes = []
+        if not self.db.transaction():
+            raise Exception(self.db.lastError().text())
+        try:
+            query = QSqlQuery(self.db)
+            query.prepare(
+                "UPDATE records SET media_file = ?, media_hash = ?, custom_media = 0, media_status = ? WHERE UUID = ? AND media_status = ?"
+            )
+            for entry_uuid, generated_path in generated:
+                try:
+                    media_hash, path = self.media_store.add_file(generated_path)
+                except Exception as e:
+                    logger.error(f"Audio généré non stocké pour {entry_uuid} : {e}")
+                    continue
+                hashes.append(media_hash)
+                for value in (path, media_hash, MEDIA_READY, entry_uuid, MEDIA_PENDING):
+                    query.addBindValue(value)
+                if not query.exec_():
+                    raise Exception(query.lastError().text())
+                if query.numRowsAffected() > 0:
+                    attached.append((entry_uuid, path))
+            self.media_store.unpin(hashes)
+            if not self.db.commit():
+                raise Exception(self.db.lastError().text())
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self.media_store.collect_garbage(hashes)
+        return attached
+
+    def replace_media(self, old_hash: str, new_path: str) -> tuple:
+        """Remplace un média stocké par une autre version (fichier temporaire, par
+        exemple sa conversion compacte) pour toutes les entrées qui le référencent,
+        en une transaction ; l'ancien fichier est effacé une fois plus référencé.
+        Renvoie (nouveau hash, chemin stocké, entrées mises à jour)."""
+        hashes = [old_hash]
+        if not self.db.transaction():
+            raise Exception(self.db.lastError().text())
+        try:
+            media_hash, path = self.media_store.add_file(new_path, move=True)
+            hashes.append(media_hash)
+            query = self._exec_sql(
+                "UPDATE records SET media_hash = ?, media_file = ? WHERE media_hash = ?",
+                [media_hash, path, old_hash],
+            )
+            updated = query.numRowsAffected()
+            self.media_store.unpin([media_hash])
+            if not self.db.commit():
+                raise Exception(self.db.lastError().text())
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self.media_store.collect_garbage(hashes)
+        return media_hash, path, updated
+
+    def mark_media_failed(self, uuids: list):
+        """Passe à MEDIA_FAILED les entrées dont l'audio n'a pu être généré."""
         query = QSqlQuery(self.db)
-        query.prepare("SELECT is_favorite FROM records WHERE UUID=?")
-        query.addBindValue(entry_uuid)
-        if not query.exec_():
+        for chunk in self._chunks(list(uuids)):
+            placeholders = ",".join(["?"] * len(chunk))
+            query.prepare(
+                f"UPDATE records SET media_status = ? WHERE media_status = ? AND UUID IN ({placeholders})"
+            )
+            for value in (MEDIA_FAILED, MEDIA_PENDING, *chunk):
+                query.addBindValue(value)
+            if not query.exec_():
+                logger.error(
+                    f"Échec du marquage des audios en échec : {query.lastError().text()}"
+                )
+
+    def requeue_failed_media(self) -> int:
+        """Remet en attente les entrées dont la génération avait échoué."""
+        query = self._exec_sql(
+            "UPDATE records SET media_status = ? WHERE media_status = ?",
+            [MEDIA_PENDING, MEDIA_FAILED],
+        )
+        return query.numRowsAffected()
+
+    def set_favorite(self, entry_uuid, is_fav: bool):
+        """Marque ou démarque une entrée comme favorite dans la base."""
+        self.set_favorites([entry_uuid], is_fav)
+
+    def set_favorites(self, uuids: list, is_fav: bool) -> int:
+        """Marque ou démarque plusieurs entrées en une seule transaction ; renvoie le
+        nombre d'entrées modifiées."""
+        uuids = list(dict.fromkeys(uuids))
+        changed = 0
+        query = QSqlQuery(self.db)
+        if not self.db.transaction():
+            raise Exception(self.db.lastError().text())
+        try:
+            for chunk in self._chunks(uuids):
+                placeholders = ",".join(["?"] * len(chunk))
+                query.prepare(
+                    f"UPDATE records SET is_favorite = ? WHERE UUID IN ({placeholders})"
+                )
+                query.addBindValue(1 if is_fav else 0)
+                for entry_uuid in chunk:
+                    query.addBindValue(entry_uuid)
+                if not query.exec_():
+                    raise Exception(
+                        f"Erreur lors de la mise à jour du favori: {query.lastError().text()}"
+                    )
+                changed += max(query.numRowsAffected(), 0)
+            if not self.db.commit():
+                raise Exception(self.db.lastError().text())
+        except Exception:
+            self.db.rollback()
+            raise
+        if self._favorites is not None:
+            if changed != len(uuids):
+                # UUID absents de la base : on ne sait pas lesquels, le cache est relu
+                self._favorites = None
+            elif is_fav:
+                self._favorites.update(uuids)
+            else:
+                self._favorites.difference_update(uuids)
+        return changed
+
+    def favorite_uuids(self) -> set:
+        """Ensemble des UUID favoris, lu une seule fois (index partiel) puis mis à jour
+        par set_favorite et delete_record. Ne pas le modifier directement."""
+        if self._favorites is None:
+            query = QSqlQuery(self.db)
+            query.setForwardOnly(True)
+            if not query.exec_("SELECT UUID FROM records WHERE is_favorite = 1"):
+                raise Exception(
+                    f"Erreur lors de la lecture des favoris: {query.lastError().text()}"
+                )
+            favorites = set()
+            while query.next():
+                favorites.add(query.value(0))
+            self._favorites = favorites
+        return self._favorites
+
+    def is_favorite(self, entry_uuid):
+        """Retourne True si l'entrée est favorite (sans requête une fois le cache chargé)."""
+        try:
+            return entry_uuid in self.favorite_uuids()
+        except Exception:
             return False
-        if query.next():
-            return bool(query.value(0))
-        return False
 
     def fetch_favorite_records(self):
-        """Retourne tous les enregistrements favoris sous forme de liste de dicts."""
-        query_text = """
-            SELECT UUID, media_file, question, response, creation_date, custom_media, attribution
+        """Retourne tous les enregistrements favoris (liste de Record)."""
+        query_text = f"""
+            SELECT {RECORD_SELECT}
             FROM records
             WHERE is_favorite=1
         """
         return self._fetch_records(query_text)
 
     def close_connection(self):
-        """Ferme la connexion à la base de données."""
-        # Attendre que toutes les requêtes soient terminées avant de fermer la base
-        QSqlDatabase.database(self.connection_name).transaction()
-        QSqlDatabase.database(self.connection_name).commit()
-
-        if self.db.isOpen():
-            self.db.close()  # Fermer la connexion
-
-        # Nettoyer explicitement les requêtes actives
-        QSqlQuery(self.db).clear()
+        """Ferme les connexions à la base de données (de tous les threads).
 
-        # S'assurer que la connexion est supprimée proprement
-        if QSqlDatabase.contains(self.connection_name):
-            try:
-                QSqlDatabase.removeDatabase(self.connection_name)
-                logger.info(f"{self.db_name} closed.")
-            except RuntimeError as e:
-                logger.warning(
-                    f"Erreur lors de la suppression de la connexion avec {self.db_path} : {e}"
-                )
+        Réservé au propriétaire du gestionnaire, une fois ses threads de travail
+        arrêtés (fermeture de main.py) : une connexion Qt SQL ne doit pas être
+        fermée depuis un autre thread que le sien. Une fenêtre qui partage le
+        gestionnaire de l'application ne l'appelle pas."""
+        self._connections.close_all()
+        logger.info(f"{self.db_name} closed.")
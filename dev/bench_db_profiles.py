@@ -0,0 +1,86 @@
+"""Mesure la latence d'écriture de DatabaseManager selon le profil SQLite.
+
+Chaque écriture unitaire (set_favorite) est validée immédiatement, comme dans
+l'application. Lancer sur le disque réellement utilisé par la base :
+
+    python dev/bench_db_profiles.py --dir /chemin/vers/dossier/synchronise
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+from PySide6.QtSql import QSqlQuery  # noqa: E402
+from db import DatabaseManager, DATABASE_PROFILES  # noqa: E402
+
+
+def bench_profile(profile, directory, rows, writes):
+    db_path = os.path.join(directory, f"bench-{profile}-{uuid.uuid4().hex[:8]}.db")
+    manager = DatabaseManager(db_path, "fr", {"profile": profile})
+    try:
+        # Remplissage en une transaction, hors mesure
+        manager.db.transaction()
+        query = QSqlQuery(manager.db)
+        query.prepare(
+            "INSERT INTO records (UUID, media_file, question, response, creation_date) VALUES (?, '', ?, ?, '2024-01-01')"
+        )
+        uuids = []
+        for i in range(rows):
+            entry_uuid = str(uuid.uuid4())
+            uuids.append(entry_uuid)
+            query.addBindValue(entry_uuid)
+            query.addBindValue(f"Question {i} (?)")
+            query.addBindValue(f"réponse {i}")
+            query.exec_()
+        manager.db.commit()
+
+        latencies = []
+        for i in range(writes):
+            start = time.perf_counter()
+            manager.set_favorite(uuids[i % rows], i % 2 == 0)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        return {
+            "moyenne": statistics.mean(latencies),
+            "médiane": statistics.median(latencies),
+            "p95": latencies[int(len(latencies) * 0.95) - 1],
+            "total": sum(latencies),
+        }
+    finally:
+        manager.close_connection()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dir", default=None, help="dossier de la base (défaut : dossier temporaire)"
+    )
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--writes", type=int, default=500)
+    args = parser.parse_args(argv[1:])
+    directory = args.dir or tempfile.mkdtemp(prefix="coucou-bench-")
+    # DatabaseManager crée son dossier audio relativement au répertoire courant
+    os.chdir(directory)
+    print(f"{args.writes} écritures unitaires sur {args.rows} lignes dans {directory}")
+    print(f"{'profil':<10}{'moyenne':>10}{'médiane':>10}{'p95':>10}{'total':>12}")
+    for profile in DATABASE_PROFILES:
+        result = bench_profile(profile, directory, args.rows, args.writes)
+        print(
+            f"{profile:<10}{result['moyenne']:>8.3f}ms{result['médiane']:>8.3f}ms"
+            f"{result['p95']:>8.3f}ms{result['total']:>10.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv)  # requis par QtSql
+    main(sys.argv)
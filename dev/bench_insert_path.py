@@ -0,0 +1,89 @@
+"""Mesure le débit d'insertion des entrées avec génération de l'audio TTS.
+
+Le moteur factice (section [tts], backend = "fake") remplace gTTS : aucune requête
+réseau, des audios déterministes, et une latence par requête réglable (--delay)
+pour reproduire celle d'un service distant. Deux chemins sont comparés :
+
+- synchrone : insert_records_batch synthétise chaque audio avant l'insertion ;
+- différé : insertion immédiate (defer_tts=True), puis TtsBackfillThread.
+
+    python dev/bench_insert_path.py --rows 500 --delay 0.05 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+import tts_cache  # noqa: E402
+from db import DatabaseManager  # noqa: E402
+from tts_backends import configure_tts  # noqa: E402
+from tts_backfill import TtsBackfillThread  # noqa: E402
+
+
+def make_rows(rows):
+    return [
+        {"media_file": "", "question": f"Question {i} (?)", "response": f"réponse {i}"}
+        for i in range(rows)
+    ]
+
+
+def bench_path(deferred, directory, rows):
+    db_path = os.path.join(directory, f"bench-insert-{uuid.uuid4().hex[:8]}.db")
+    # Cache TTS vide et propre à chaque mesure (le cache partagé de l'application
+    # n'est pas touché)
+    tts_cache._shared_cache = tts_cache.TtsCache(
+        os.path.join(directory, f"tts-{uuid.uuid4().hex[:8]}")
+    )
+    manager = DatabaseManager(db_path, "fr")
+    try:
+        start = time.perf_counter()
+        manager.insert_records_batch(make_rows(rows), defer_tts=deferred)
+        inserted = time.perf_counter() - start
+        if deferred:
+            thread = TtsBackfillThread(manager, retry_delay=0)
+            thread.start()
+            thread.wait()
+        total = time.perf_counter() - start
+        assert manager.count_pending_media() == 0
+        return inserted, total
+    finally:
+        manager.close_connection()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dir", default=None, help="dossier de travail (défaut : dossier temporaire)"
+    )
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="latence simulée par requête (s)"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv[1:])
+    directory = args.dir or tempfile.mkdtemp(prefix="coucou-bench-")
+    # DatabaseManager crée son dossier audio relativement au répertoire courant
+    os.chdir(directory)
+    configure_tts({"backend": "fake", "delay": args.delay, "workers": args.workers})
+    print(
+        f"{args.rows} entrées, latence TTS {args.delay * 1000:.0f} ms, "
+        f"{args.workers} requête(s) simultanée(s), dans {directory}"
+    )
+    print(f"{'chemin':<12}{'insertion':>12}{'total':>12}{'entrées/s':>12}")
+    for name, deferred in (("synchrone", False), ("différé", True)):
+        inserted, total = bench_path(deferred, directory, args.rows)
+        print(
+            f"{name:<12}{inserted * 1000:>10.1f}ms{total * 1000:>10.1f}ms"
+            f"{args.rows / total:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv)  # requis par QtSql
+    main(sys.argv)
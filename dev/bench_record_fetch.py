@@ -0,0 +1,102 @@
+"""Compare fetch_all_records (Record, curseur en avant seulement) à l'ancien
+chargement en dicts : durée et mémoire retenue pour une base de N entrées.
+
+    python dev/bench_record_fetch.py --rows 100000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+from PySide6.QtSql import QSqlQuery  # noqa: E402
+from db import DatabaseManager  # noqa: E402
+
+
+def build_database(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE records (UUID TEXT PRIMARY KEY, media_file TEXT NOT NULL, question TEXT NOT NULL, response TEXT NOT NULL, creation_date TEXT NOT NULL, custom_media INTEGER DEFAULT 0, attribution TEXT NOT NULL DEFAULT 'no-attribution', is_favorite INTEGER DEFAULT 0)"
+    )
+    conn.executemany(
+        "INSERT INTO records (UUID, media_file, question, response, creation_date) VALUES (?, ?, ?, ?, '2024-01-01')",
+        (
+            (
+                f"{i:08d}-0000-0000-0000-000000000000",
+                f"assets/audio/bench-audio/reponse_{i}.mp3",
+                f"Question numéro {i} à compléter (?)",
+                f"réponse {i}",
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def fetch_as_dicts(manager):
+    """Ancienne implémentation de _fetch_records (un dict par ligne)."""
+    query = QSqlQuery(manager.db)
+    query.exec_(
+        "SELECT UUID, media_file, question, response, creation_date, custom_media, attribution FROM records"
+    )
+    records = []
+    while query.next():
+        records.append(
+            {
+                "UUID": query.value(0),
+                "media_file": query.value(1),
+                "question": query.value(2),
+                "response": query.value(3),
+                "creation_date": query.value(4),
+                "attribution": (
+                    query.value(6) if query.record().count() > 6 else "no-attribution"
+                ),
+            }
+        )
+    return records
+
+
+def measure(label, fetch):
+    # Durée mesurée sans tracemalloc, qui ralentit fortement les allocations
+    start = time.perf_counter()
+    records = fetch()
+    elapsed = time.perf_counter() - start
+    del records
+    tracemalloc.start()
+    records = fetch()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10}{elapsed * 1000:>10.1f} ms{retained / len(records):>10.0f} o/entrée"
+    )
+    return records
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args(argv[1:])
+
+    directory = tempfile.mkdtemp(prefix="coucou-bench-")
+    # DatabaseManager crée son dossier audio relativement au répertoire courant
+    os.chdir(directory)
+    db_path = os.path.join(directory, "bench.db")
+    build_database(db_path, args.rows)
+    manager = DatabaseManager(db_path, "fr")
+    print(f"{args.rows} entrées, {db_path}")
+    print(f"{'méthode':<10}{'durée':>13}{'mémoire':>19}")
+    measure("dict", lambda: fetch_as_dicts(manager))
+    measure("Record", manager.fetch_all_records)
+    manager.close_connection()
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv)  # requis par QtSql
+    main(sys.argv)
@@ -0,0 +1,111 @@
+"""Compare les recherches d'entrées par liste d'UUID : ancienne requête IN (...)
+unique, requêtes IN (...) découpées et tableau JSON parcouru par json_each, jusqu'à
+1M d'UUID. L'ancienne requête échoue au-delà de la limite de paramètres liés de
+SQLite (32766 depuis 3.32, 999 avant) : elle ne trouve alors aucune entrée.
+
+    python dev/bench_uuid_lookup.py --rows 1000000 --sizes 100,1000,10000,100000,1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+from db import RECORD_SELECT, DatabaseManager  # noqa: E402
+
+
+def build_database(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE records (UUID TEXT PRIMARY KEY, media_file TEXT NOT NULL, question TEXT NOT NULL, response TEXT NOT NULL, creation_date TEXT NOT NULL, custom_media INTEGER DEFAULT 0, attribution TEXT NOT NULL DEFAULT 'no-attribution', is_favorite INTEGER DEFAULT 0)"
+    )
+    conn.executemany(
+        "INSERT INTO records (UUID, media_file, question, response, creation_date) VALUES (?, ?, ?, ?, '2024-01-01')",
+        (
+            (uuid_of(i), "", f"Question numéro {i} (?)", f"réponse {i}")
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def uuid_of(i):
+    return f"{i:08d}-0000-0000-0000-000000000000"
+
+
+def single_in(manager, uuids):
+    """Ancienne implémentation : un paramètre lié par UUID dans une seule requête."""
+    placeholders = ",".join(["?"] * len(uuids))
+    return manager._fetch_records(
+        f"SELECT {RECORD_SELECT} FROM records WHERE UUID IN ({placeholders})", uuids
+    )
+
+
+def chunked_in(manager, uuids):
+    records = []
+    for chunk in manager._chunks(uuids):
+        placeholders = ",".join(["?"] * len(chunk))
+        records.extend(
+            manager._fetch_records(
+                f"SELECT {RECORD_SELECT} FROM records WHERE UUID IN ({placeholders})",
+                chunk,
+            )
+        )
+    return records
+
+
+def json_each(manager, uuids):
+    return manager._fetch_records(
+        f"SELECT {RECORD_SELECT} FROM records WHERE UUID IN (SELECT value FROM json_each(?))",
+        [json.dumps(uuids)],
+    )
+
+
+def measure(label, lookup, uuids):
+    start = time.perf_counter()
+    try:
+        found = len(lookup(uuids))
+    except Exception as e:
+        print(f"  {label:<22}{'échec':>12}  {e}")
+        return
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22}{elapsed * 1000:>9.1f} ms{found:>10} trouvées")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--sizes", default="100,1000,10000,100000,1000000")
+    args = parser.parse_args(argv[1:])
+
+    directory = tempfile.mkdtemp(prefix="coucou-bench-")
+    # DatabaseManager crée son dossier audio relativement au répertoire courant
+    os.chdir(directory)
+    db_path = os.path.join(directory, "bench.db")
+    build_database(db_path, args.rows)
+    manager = DatabaseManager(db_path, "fr")
+    print(f"{args.rows} entrées, {db_path}")
+    rng = random.Random(0)
+    for size in (int(size) for size in args.sizes.split(",")):
+        # Ordre aléatoire, comme une session mélangée ; 1 % d'UUID absents
+        uuids = [uuid_of(rng.randrange(int(args.rows * 1.01))) for _ in range(size)]
+        unique = list(dict.fromkeys(uuids))
+        print(f"{size} UUID ({len(unique)} distincts)")
+        measure("IN unique", lambda u: single_in(manager, u), unique)
+        measure("IN découpé", lambda u: chunked_in(manager, u), unique)
+        measure("json_each", lambda u: json_each(manager, u), unique)
+        measure("fetch_record_by_uuid", manager.fetch_record_by_uuid, uuids)
+    manager.close_connection()
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv)  # requis par QtSql
+    main(sys.argv)
@@ -13,7 +13,8 @@ print(f"{len(uuids)} UUIDs à migrer.")
 conn = sqlite3.connect(db_path)
 cur = conn.cursor()
 
-# 3. Vérifier que la colonne existe (sinon, l'ajouter)
+# 3. Vérifier que la colonne existe (sinon, l'ajouter) ; une base déjà ouverte par
+#    Coucou l'a reçue via les migrations de DatabaseManager (db.py)
 cur.execute("PRAGMA table_info(records)")
 columns = [row[1] for row in cur.fetchall()]
 if "is_favorite" not in columns:
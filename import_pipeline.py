@@ -0,0 +1,773 @@
+"""Import de fichiers CSV en pipeline, hors du thread de l'interface.
+
+Les étapes sont reliées par des files bornées (la mémoire ne dépend pas de la
+taille des fichiers) :
+
+1. lecture : les CSV sont lus en flux, ligne à ligne, et chaque ligne est validée
+   (chemin du média, temps de découpe, réponse vide) ;
+2. médias : les découpes et conversions (pydub/ffmpeg) sont confiées à un groupe
+   de processus, un par cœur, tous fichiers confondus ; les segments d'une même
+   source audio sont regroupés (clip_engine), les découpes vidéo passent par un
+   groupe borné de tâches ffmpeg et un fichier audio non découpé passe sans
+   traitement ;
+3. écriture : un seul thread insère les entrées par lots transactionnels ;
+4. TTS : l'audio des entrées sans média est généré par tts_backfill, relancé à
+   chaque lot écrit (signal audio_pending).
+
+Après chaque lot écrit, un point de reprise (ImportCheckpoint) enregistre pour
+chaque fichier son empreinte, la position (en octets) qui suit la dernière ligne
+traitée et les compteurs : un import interrompu (fermeture, plantage) reprend à
+cette position, sans relire ni revérifier les lignes déjà importées.
+"""
+
+import csv
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PySide6.QtCore import QThread, Signal
+from logger import logger
+from clip_engine import (
+    CLIP_CACHE_BYTES,
+    compact_media_file,
+    configure_clip_engine,
+    ffmpeg_jobs,
+    media_config,
+    shared_clip_engine,
+    should_compact,
+)
+from common_methods import MediaUtils, TextUtils, TimeUtils
+from db import INSERT_OK, INSERT_DUPLICATE
+from media_store import AUDIO_EXTENSIONS, MediaStore
+
+REQUIRED_COLUMNS = ("media_path", "question")
+# Processus de découpe des médias
+MEDIA_WORKERS = os.cpu_count() or 1
+# Lignes en attente entre deux étapes
+QUEUE_SIZE = 256
+# Segments d'une même source audio extraits par un même travail. Tous les travaux
+# d'une source vont au même processus, qui la garde décodée : une source découpée
+# en 300 clips est décodée une fois, pas une fois par groupe ni par processus
+CLIP_GROUP_SIZE = 32
+# Entrées insérées par transaction ; un lot incomplet est écrit après
+# WRITE_FLUSH_DELAY secondes sans nouvelle entrée
+WRITE_BATCH_SIZE = 200
+WRITE_FLUSH_DELAY = 0.5
+# Intervalle minimal entre deux signaux de progression (secondes)
+PROGRESS_INTERVAL = 0.1
+# Unité de la progression (octets) : une barre Qt est limitée à 2**31 - 1
+PROGRESS_UNIT = 1024
+
+IMPORT_CHECKPOINT_FILE = os.path.join(
+    os.path.dirname(__file__), "tmp", ".import_checkpoint.json"
+)
+
+_DONE = object()  # fin de flux, transmise d'une étape à la suivante
+
+# Compteurs d'un fichier, repris dans le résumé de l'import
+FILE_COUNTERS = ("imported", "failed", "pending_audio")
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0  # erreur signalée à la lecture
+
+
+def first_media_path(csv_path: str):
+    """Premier media_path non vide d'un CSV (lecture arrêtée dès qu'il est trouvé)."""
+    with open(csv_path, "r", encoding="utf-8") as csv_file:
+        for row in csv.DictReader(csv_file):
+            candidate = (row.get("media_path") or "").strip()
+            if candidate:
+                return candidate
+    return None
+
+
+def csv_row_to_record(row: dict, audio_base_dir: str = None) -> dict:
+    """Convertit une ligne CSV en dict accepté par insert_records_batch."""
+    file_path = (row.get("media_path") or "").strip()
+    if audio_base_dir and file_path and not os.path.isabs(file_path):
+        file_path = os.path.join(audio_base_dir, file_path)
+    return {
+        "media_file": file_path,
+        "question": row.get("question") or "",
+        "response": row.get("response") or "",
+        "start_time_ms": TimeUtils.parse_time_to_ms(row.get("start_time")),
+        "end_time_ms": TimeUtils.parse_time_to_ms(row.get("end_time")),
+        "UUID": (row.get("UUID") or "").strip() or None,  # UUID optionnel
+        "creation_date": (row.get("creation_date") or "").strip()
+        or None,  # creation_date optionnel
+        "attribution": row.get("attribution", "no-attribution"),
+    }
+
+
+def needs_processing(record: dict) -> bool:
+    """Vrai si le média doit être découpé ou converti avant d'être stocké."""
+    media_file = record["media_file"]
+    if not media_file:
+        return False
+    return (
+        record["start_time_ms"] is not None
+        or record["end_time_ms"] is not None
+        or os.path.splitext(media_file)[1].lower() not in AUDIO_EXTENSIONS
+        or should_compact(media_file)
+    )
+
+
+def is_audio_clip(record: dict) -> bool:
+    """Vrai pour un segment à extraire d'un fichier audio."""
+    return os.path.splitext(record["media_file"])[1].lower() in AUDIO_EXTENSIONS and (
+        record["start_time_ms"] is not None or record["end_time_ms"] is not None
+    )
+
+
+def _process_media(src_path, work_dir, start_time_ms, end_time_ms):
+    """Découpe ou convertit un média, puis le compacte si le profil de stockage le
+    demande. Un audio non découpé est compacté directement depuis la source (qui
+    est renvoyée telle quelle si la conversion échoue)."""
+    ext = os.path.splitext(src_path)[1].lower()
+    if ext in AUDIO_EXTENSIONS and start_time_ms is None and end_time_ms is None:
+        return compact_media_file(src_path, work_dir)
+    processed = MediaUtils.MediaFileProcessing.process_media_file(
+        src_path, work_dir, start_time_ms, end_time_ms
+    )
+    return compact_media_file(processed, work_dir, remove_source=True)
+
+
+def _process_clips(src_path, work_dir, segments):
+    """Exécuté dans un processus du groupe : extrait tous les segments d'une même
+    source audio en une passe. Renvoie, pour chacun, le chemin ou l'exception."""
+    base = TextUtils.clean_filename(os.path.splitext(os.path.basename(src_path))[0])
+    dest_paths = []
+    for _ in segments:
+        handle, path = tempfile.mkstemp(
+            prefix=f"{base}_clip_", suffix=".mp3", dir=work_dir
+        )
+        os.close(handle)
+        dest_paths.append(path)
+    errors = shared_clip_engine().extract(src_path, segments, dest_paths)
+    return [
+        error or compact_media_file(path, work_dir, remove_source=True)
+        for error, path in zip(errors, dest_paths)
+    ]
+
+
+class _ClipGroup:
+    """Segments d'une même source audio, extraits par un seul travail du groupe de
+    processus (la source n'est décodée qu'une fois)."""
+
+    def __init__(self, src_path):
+        self.src_path = src_path
+        self.segments = []
+        self.future = None
+
+
+class _GroupedClip:
+    """Résultat d'un segment d'un _ClipGroup, utilisé comme un Future."""
+
+    def __init__(self, group, index):
+        self.group = group
+        self.index = index
+
+    def done(self) -> bool:
+        return self.group.future is not None and self.group.future.done()
+
+    def cancel(self):
+        if self.group.future is not None:
+            self.group.future.cancel()
+
+    def result(self):
+        result = self.group.future.result()[self.index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class ImportCheckpoint:
+    """Point de reprise d'un import, propre à une base.
+
+    `files` associe à chaque CSV son état : empreinte (hash), position qui suit la
+    dernière ligne traitée (offset), lignes traitées (rows), compteurs et fin de
+    lecture (done). Le fichier JSON reste de taille constante d'un lot à l'autre.
+
+    Les entrées à compléter manuellement sont ajoutées, à chaque enregistrement, à
+    un journal séparé (`missing_path`, une ligne JSON par entrée). À la relecture,
+    seules les lignes couvertes par la position enregistrée de leur fichier sont
+    reprises (une ligne écrite juste avant un plantage sera relue avec son lot).
+    """
+
+    def __init__(self, db_path: str, path: str = IMPORT_CHECKPOINT_FILE):
+        self.db_path = db_path
+        self.path = path
+        self.missing_path = path + ".missing"
+        self.csv_paths = []
+        self.audio_base_dirs = {}
+        self.files = {}
+        self.missing_responses = {}  # csv_path -> entrées à compléter
+        self._unsaved_missing = []
+        # Un nouveau point de reprise repart d'un journal vide
+        self._missing_started = False
+
+    @classmethod
+    def load(cls, db_path: str, path: str = IMPORT_CHECKPOINT_FILE):
+        """Point de reprise enregistré pour cette base, ou None."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Point de reprise d'import illisible : {e}")
+            return None
+        if os.path.abspath(data.get("db_path", "")) != os.path.abspath(db_path):
+            return None
+        checkpoint = cls(db_path, path)
+        checkpoint.csv_paths = data.get("csv_paths", [])
+        checkpoint.audio_base_dirs = data.get("audio_base_dirs", {})
+        checkpoint.files = data.get("files", {})
+        checkpoint._load_missing()
+        return checkpoint
+
+    def _load_missing(self):
+        self._missing_started = True
+        seen = set()
+        try:
+            with open(self.missing_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        csv_path, file_hash, offset, entry = json.loads(line)
+                    except ValueError:
+                        # Ligne tronquée par un arrêt brutal
+                        break
+                    state = self.files.get(csv_path)
+                    if (
+                        state is None
+                        or state["hash"] != file_hash
+                        or offset > state["offset"]
+                        or (csv_path, offset) in seen
+                    ):
+                        continue
+                    seen.add((csv_path, offset))
+                    self.missing_responses.setdefault(csv_path, []).append(entry)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def new_file_state(file_hash: str) -> dict:
+        return {
+            "hash": file_hash,
+            "offset": 0,
+            "rows": 0,
+            **{key: 0 for key in FILE_COUNTERS},
+            "done": False,
+        }
+
+    def rows_done(self) -> int:
+        return sum(state["rows"] for state in self.files.values())
+
+    def add_missing(self, csv_path: str, offset: int, entry: dict):
+        """Note une entrée à compléter ; écrite au journal par le prochain `save`."""
+        self.missing_responses.setdefault(csv_path, []).append(entry)
+        self._unsaved_missing.append(
+            [csv_path, self.files[csv_path]["hash"], offset, entry]
+        )
+
+    def save(self):
+        """Ajoute les entrées à compléter au journal, puis écrit le point de reprise
+        (remplacement atomique)."""
+        data = {
+            "db_path": self.db_path,
+            "csv_paths": self.csv_paths,
+            "audio_base_dirs": self.audio_base_dirs,
+            "files": self.files,
+        }
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        if self._unsaved_missing or not self._missing_started:
+            # Le journal est écrit avant la position qui le couvre
+            with open(
+                self.missing_path,
+                "a" if self._missing_started else "w",
+                encoding="utf-8",
+            ) as f:
+                for line in self._unsaved_missing:
+                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            self._missing_started = True
+            self._unsaved_missing = []
+        handle, tmp_path = tempfile.mkstemp(suffix=".json", dir=directory)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def clear(self):
+        for path in (self.path, self.missing_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class _OffsetLines:
+    """Lignes décodées d'un fichier ouvert en binaire. `offset` suit la dernière
+    ligne lue : csv.reader ne lisant jamais au-delà de l'enregistrement en cours,
+    c'est la position de l'enregistrement suivant (tell() est indisponible pendant
+    l'itération d'un fichier texte)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset = self.f.tell()
+        return line.decode("utf-8")
+
+    def seek(self, offset: int):
+        self.f.seek(offset)
+        self.offset = offset
+
+
+class ImportPipeline(QThread):
+    progress = Signal(int, int)  # Kio des CSV traités, taille totale (Kio)
+    audio_pending = Signal(int)  # entrées écrites dont l'audio TTS est à générer
+    import_finished = Signal(object)  # résumé (dict, voir __init__)
+
+    def __init__(
+        self,
+        db_manager,
+        csv_paths,
+        audio_base_dirs: dict = None,
+        media_workers: int = MEDIA_WORKERS,
+        batch_size: int = WRITE_BATCH_SIZE,
+        resume: bool = False,
+        checkpoint_path: str = IMPORT_CHECKPOINT_FILE,
+    ):
+        super().__init__()
+        self.db_manager = db_manager
+        self.csv_paths = list(csv_paths)
+        # csv_path -> dossier parent des chemins relatifs de media_path
+        self.audio_base_dirs = audio_base_dirs or {}
+        # Avec `resume`, les fichiers inchangés reprennent au point enregistré
+        self.checkpoint = (
+            resume and ImportCheckpoint.load(db_manager.db_path, checkpoint_path)
+        ) or ImportCheckpoint(db_manager.db_path, checkpoint_path)
+        self.checkpoint.csv_paths = self.csv_paths
+        self.checkpoint.audio_base_dirs = self.audio_base_dirs
+        self.media_workers = max(1, media_workers)
+        self.batch_size = max(1, batch_size)
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        # Progression en octets : position de la dernière ligne écrite de chaque
+        # fichier (celle du point de reprise) sur la taille des fichiers
+        self._bytes_done = {}
+        self._total_bytes = sum(_file_size(path) for path in self.csv_paths)
+        self._last_progress = 0.0
+        self.summary = {
+            "files": 0,
+            "imported": 0,
+            "failed": 0,
+            "pending_audio": 0,
+            "resumed_rows": 0,  # lignes traitées lors d'une session précédente
+            "missing_responses": [],  # entrées à compléter manuellement
+            "file_errors": [],  # (csv_path, message)
+            "found_uuid": False,
+            "found_creation_date": False,
+            "cancelled": False,
+        }
+
+    def cancel(self):
+        """Interrompt l'import : les lots déjà écrits restent dans la base."""
+        self._cancel.set()
+
+    def run(self):
+        rows = queue.Queue(QUEUE_SIZE)
+        ready = queue.Queue(QUEUE_SIZE)
+        work_dir = tempfile.mkdtemp(dir=self.db_manager.media_store.staging_dir())
+        self._save_checkpoint()
+        reader = threading.Thread(target=self._read, args=(rows,), daemon=True)
+        writer = threading.Thread(target=self._write, args=(ready,), daemon=True)
+        reader.start()
+        writer.start()
+        try:
+            self._dispatch(rows, ready, work_dir)
+        except Exception as e:
+            logger.critical(f"Échec de l'import en masse : {e}")
+            self.cancel()
+            # Débloque la lecture si elle attend de la place dans la file
+            while reader.is_alive() or not rows.empty():
+                try:
+                    rows.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            ready.put(_DONE)
+        finally:
+            reader.join()
+            writer.join()
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self.summary["cancelled"] = self._cancel.is_set()
+            # Point de reprise conservé tant qu'un fichier n'a pas été lu en entier
+            if not self.summary["cancelled"] and all(
+                state["done"] for state in self.checkpoint.files.values()
+            ):
+                self.checkpoint.clear()
+            self._advance(force=True)
+            logger.info(
+                f"Importation terminée: {self.summary['imported']} entrées importées, {self.summary['failed']} échecs sur {self.summary['files']} fichiers."
+            )
+            self.import_finished.emit(self.summary)
+
+    # Chaque étape consomme sa file jusqu'à _DONE, même après une annulation (les
+    # lignes sont alors ignorées) : aucune étape ne reste bloquée sur une file pleine.
+
+    def _read(self, rows):
+        try:
+            self._advance(force=True)
+            for csv_path in self.csv_paths:
+                if self._cancel.is_set():
+                    break
+                try:
+                    logger.info(f"Début d'importation depuis {csv_path}")
+                    self._read_file(csv_path, rows)
+                except Exception as e:
+                    logger.critical(
+                        f"Échec de la lecture du fichier CSV {csv_path} : {e}"
+                    )
+                    self._add("file_errors", (csv_path, str(e)))
+                    self._file_read(csv_path)
+                self._add("files", 1)
+        finally:
+            rows.put(_DONE)
+
+    def _read_file(self, csv_path, rows):
+        with open(csv_path, "rb") as csv_file:
+            lines = _OffsetLines(csv_file)
+            reader = csv.DictReader(lines)
+            fieldnames = reader.fieldnames or []
+            if not set(REQUIRED_COLUMNS).issubset(fieldnames):
+                logger.error(f"Colonnes CSV manquantes dans {csv_path}")
+                self._add(
+                    "file_errors",
+                    (
+                        csv_path,
+                        "le fichier ne contient pas les colonnes requises ('media_path', 'question') et a été ignoré",
+                    ),
+                )
+                self._file_read(csv_path)
+                return
+            with self._lock:
+                self.summary["found_uuid"] |= "UUID" in fieldnames
+                self.summary["found_creation_date"] |= "creation_date" in fieldnames
+
+            state = self._start_file(csv_path)
+            if state["done"]:
+                return
+            if state["offset"]:
+                lines.seek(state["offset"])
+
+            audio_base_dir = self.audio_base_dirs.get(csv_path)
+            for row in reader:
+                if self._cancel.is_set():
+                    return
+                record = csv_row_to_record(row, audio_base_dir)
+                record["_source"] = csv_path
+                record["_offset"] = lines.offset
+                # Réponse vide : entrée mise de côté pour la saisie manuelle
+                if not record["response"].strip():
+                    logger.warning(
+                        f"Entrée ignorée - réponse vide pour question: '{record['question']}'"
+                    )
+                    record["_skip"] = "missing"
+                rows.put(record)
+            # Fin du fichier, enregistrée dans le point de reprise par l'écriture
+            rows.put({"_source": csv_path, "_offset": lines.offset, "_skip": "eof"})
+
+    def _start_file(self, csv_path) -> dict:
+        """État du fichier dans le point de reprise : repris s'il n'a pas changé
+        depuis l'interruption, sinon remis à zéro."""
+        file_hash = MediaStore.file_hash(csv_path)
+        with self._lock:
+            state = self.checkpoint.files.get(csv_path)
+            resumed = state is not None and state["hash"] == file_hash
+            if resumed:
+                for key in FILE_COUNTERS:
+                    self.summary[key] += state[key]
+                self.summary["missing_responses"].extend(
+                    self.checkpoint.missing_responses.get(csv_path, [])
+                )
+                self.summary["resumed_rows"] += state["rows"]
+            else:
+                if state is not None:
+                    logger.warning(
+                        f"{csv_path} a changé depuis l'importation interrompue : reprise depuis le début"
+                    )
+                state = ImportCheckpoint.new_file_state(file_hash)
+                self.checkpoint.files[csv_path] = state
+                self.checkpoint.missing_responses[csv_path] = []
+        if resumed:
+            logger.info(f"Reprise de {csv_path} après {state['rows']} lignes")
+            with self._lock:
+                self._bytes_done[csv_path] = state["offset"]
+            self._advance(force=True)
+        return state
+
+    def _dispatch(self, rows, ready, work_dir):
+        """Étape des médias : soumet les découpes aux processus et transmet les
+        entrées à l'écriture dans l'ordre des fichiers. Les segments audio d'une
+        même source sont regroupés (CLIP_GROUP_SIZE au plus par travail) et
+        toujours confiés au même processus ; le budget mémoire des sources
+        décodées (CLIP_CACHE_BYTES) est partagé entre les processus."""
+        # Processus de découpe, un par part des sources : une source reste sur le
+        # processus qui la garde décodée
+        shards = [None] * self.media_workers
+        shard_of = {}  # source -> indice de son processus
+        # Découpes vidéo et conversions compactes : le travail est fait par ffmpeg,
+        # des threads suffisent ; leur nombre borne les ffmpeg simultanés
+        video_pool = None
+        in_flight = deque()  # (entrée, future ou None), dans l'ordre de lecture
+        open_groups = {}  # source -> _ClipGroup pas encore soumis
+        finished = False
+
+        def submit(src_path, function, *args):
+            # Sources réparties à tour de rôle, dans l'ordre de leur première découpe
+            index = shard_of.setdefault(src_path, len(shard_of) % len(shards))
+            if shards[index] is None:
+                # Réglages [media] transmis aux processus (profil de stockage)
+                config = dict(
+                    media_config(), memory_budget=CLIP_CACHE_BYTES // len(shards)
+                )
+                shards[index] = ProcessPoolExecutor(
+                    1, initializer=configure_clip_engine, initargs=(config,)
+                )
+            return shards[index].submit(function, *args)
+
+        def submit_video(*args):
+            nonlocal video_pool
+            if video_pool is None:
+                video_pool = ThreadPoolExecutor(ffmpeg_jobs())
+            return video_pool.submit(_process_media, *args)
+
+        def submit_group(group):
+            del open_groups[group.src_path]
+            group.future = submit(
+                group.src_path,
+                _process_clips,
+                group.src_path,
+                work_dir,
+                group.segments,
+            )
+
+        try:
+            while not finished or in_flight:
+                if not finished and len(in_flight) < QUEUE_SIZE:
+                    record = rows.get()
+                    if record is _DONE:
+                        finished = True
+                    elif not self._cancel.is_set():
+                        future = None
+                        if record.get("_skip") or not needs_processing(record):
+                            pass
+                        elif is_audio_clip(record):
+                            src_path = record["media_file"]
+                            group = open_groups.get(src_path)
+                            if group is None:
+                                group = open_groups[src_path] = _ClipGroup(src_path)
+                            future = _GroupedClip(group, len(group.segments))
+                            group.segments.append(
+                                (record["start_time_ms"], record["end_time_ms"])
+                            )
+                            if len(group.segments) >= CLIP_GROUP_SIZE:
+                                submit_group(group)
+                        else:
+                            future = submit_video(
+                                record["media_file"],
+                                work_dir,
+                                record["start_time_ms"],
+                                record["end_time_ms"],
+                            )
+                        in_flight.append((record, future))
+                # File pleine ou lecture finie : plus de segment à attendre pour
+                # compléter les groupes
+                if finished or len(in_flight) >= QUEUE_SIZE:
+                    for group in list(open_groups.values()):
+                        submit_group(group)
+                # Transmet les entrées prêtes en tête de file ; attend la plus
+                # ancienne seulement si la file est pleine ou la lecture finie
+                while in_flight:
+                    record, future = in_flight[0]
+                    if self._cancel.is_set():
+                        in_flight.popleft()
+                        if future is not None:
+                            future.cancel()
+                        continue
+                    if not (
+                        finished
+                        or len(in_flight) >= QUEUE_SIZE
+                        or future is None
+                        or future.done()
+                    ):
+                        break
+                    in_flight.popleft()
+                    if future is not None:
+                        try:
+                            processed = future.result()
+                        except Exception as e:
+                            logger.error(
+                                f"Échec de la préparation du média pour '{record['question']}' : {e}"
+                            )
+                            ready.put(dict(record, _skip="failed"))
+                            continue
+                        record = dict(
+                            record,
+                            media_file=processed,
+                            # Source renvoyée telle quelle (conversion en échec) :
+                            # liée, pas déplacée
+                            media_processed=processed != record["media_file"],
+                            start_time_ms=None,
+                            end_time_ms=None,
+                        )
+                    ready.put(record)
+        finally:
+            for executor in (*shards, video_pool):
+                if executor is not None:
+                    executor.shutdown(wait=True, cancel_futures=True)
+        ready.put(_DONE)
+
+    def _write(self, ready):
+        """Étape d'écriture : seul thread qui insère dans la base."""
+        batch = []
+        record = None
+        try:
+            while True:
+                try:
+                    record = ready.get(timeout=WRITE_FLUSH_DELAY)
+                except queue.Empty:
+                    record = None
+                if record is _DONE:
+                    break
+                if self._cancel.is_set():
+                    batch = []
+                    continue
+                if record is not None:
+                    batch.append(record)
+                if batch and (record is None or len(batch) >= self.batch_size):
+                    self._write_batch(batch)
+                    batch = []
+            if batch and not self._cancel.is_set():
+                self._write_batch(batch)
+        except Exception as e:
+            logger.critical(f"Échec de l'écriture des entrées importées : {e}")
+            self.cancel()
+            while record is not _DONE:
+                record = ready.get()
+        finally:
+            self.db_manager.release_connection()
+
+    def _write_batch(self, batch):
+        # L'audio TTS des entrées sans média est généré ensuite en arrière-plan
+        records = [record for record in batch if not record.get("_skip")]
+        statuses = (
+            self.db_manager.insert_records_batch(
+                records, chunk_size=len(records), defer_tts=True
+            )
+            if records
+            else []
+        )
+        status_of = {id(record): status for record, status in zip(records, statuses)}
+        pending_audio = 0
+        with self._lock:
+            for record in batch:
+                state = self.checkpoint.files[record["_source"]]
+                state["offset"] = record["_offset"]
+                self._bytes_done[record["_source"]] = record["_offset"]
+                skip = record.get("_skip")
+                if skip == "eof":
+                    state["done"] = True
+                    continue
+                state["rows"] += 1
+                if skip == "missing":
+                    missing = {
+                        key: value
+                        for key, value in record.items()
+                        if key != "media_file" and not key.startswith("_")
+                    }
+                    missing["media_path"] = record["media_file"]
+                    self.checkpoint.add_missing(
+                        record["_source"], record["_offset"], missing
+                    )
+                    self.summary["missing_responses"].append(missing)
+                    self._count(state, "failed")
+                    continue
+                status = status_of.get(id(record))
+                if status == INSERT_DUPLICATE:
+                    logger.warning(
+                        f"{record['question']},{record['response']} est déjà présent dans la base de données et n'est pas ajouté à nouveau"
+                    )
+                elif skip is None and status != INSERT_OK:
+                    logger.error(
+                        f"Échec de l'enregistrement des données pour '{record['media_file']}'"
+                    )
+                if status != INSERT_OK:
+                    self._count(state, "failed")
+                    continue
+                self._count(state, "imported")
+                if not record["media_file"]:
+                    self._count(state, "pending_audio")
+                    pending_audio += 1
+        # Enregistré après la validation du lot : au pire, une reprise après un
+        # plantage entre les deux revoit ce lot, et ses entrées sont des doublons
+        self._save_checkpoint()
+        self._advance()
+        if pending_audio:
+            self.audio_pending.emit(pending_audio)
+
+    def _count(self, state, key):
+        # Appelé sous self._lock
+        state[key] += 1
+        self.summary[key] += 1
+
+    def _save_checkpoint(self):
+        with self._lock:
+            try:
+                self.checkpoint.save()
+            except Exception as e:
+                logger.error(f"Point de reprise de l'import non enregistré : {e}")
+
+    def _add(self, key, value):
+        with self._lock:
+            if isinstance(self.summary[key], list):
+                self.summary[key].append(value)
+            else:
+                self.summary[key] += value
+
+    def _file_read(self, csv_path):
+        """Fichier ignoré ou illisible : compté comme entièrement traité."""
+        with self._lock:
+            self._bytes_done[csv_path] = _file_size(csv_path)
+        self._advance()
+
+    def _advance(self, force=False):
+        """Signale la progression, en Kio des CSV traités ; un signal au plus par
+        PROGRESS_INTERVAL."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_progress < PROGRESS_INTERVAL:
+                return
+            self._last_progress = now
+            done = sum(self._bytes_done.values())
+            total = max(self._total_bytes, done)
+        self.progress.emit(-(-done // PROGRESS_UNIT), -(-total // PROGRESS_UNIT))
@@ -28,8 +28,23 @@ from massImporter import MassImporter  # Importer MassImporter
 from db import DatabaseManager  # Importer DatabaseManager
 from conjugator import ConjugatorApp  # Importer ConjugatorApp
 from logger import logger  # Importer le logger centralisé
-from usage_statistics import StatisticsApp  # Importer la fenêtre de statistiques
+from usage_statistics import (  # Importer la fenêtre de statistiques
+    StatisticsApp,
+    stop_review_log,
+)
 from common_methods import DialogUtils
+from tts_backfill import start_tts_backfill, stop_tts_backfill
+from tts_backends import configure_tts
+from clip_engine import configure_clip_engine
+from autosave import configure_autosave
+from media_compaction import start_media_compaction, stop_media_compaction
+from addition_queue import (
+    JOB_ERROR,
+    JOB_PENDING,
+    AdditionQueue,
+    start_addition_queue,
+    stop_addition_queue,
+)
 
 
 class MainApp(QMainWindow):
@@ -37,15 +52,40 @@ class MainApp(QMainWindow):
         print(f"[DEBUG] MainApp.__init__ called, selected_db_path={selected_db_path}")
         super().__init__()
         self.setWindowTitle("Coucou")
-        self.font_size, self.username, self.language_code, self.database_path = (
-            self.load_config()
-        )
+        (
+            self.font_size,
+            self.username,
+            self.language_code,
+            self.database_path,
+            self.database_config,
+            self.tts_config,
+            self.media_config,
+            self.autosave_config,
+        ) = self.load_config()
+        configure_tts(self.tts_config)  # Moteur TTS de la section [tts]
+        configure_clip_engine(self.media_config)  # Découpe des médias, [media]
+        configure_autosave(self.autosave_config)  # Brouillons, [autosave]
         # Si un chemin de base de données a été sélectionné, on l'utilise en priorité
         if selected_db_path:
             self.database_path = selected_db_path
         print(f"[DEBUG] MainApp: database_path={self.database_path}")
-        self.db_manager = DatabaseManager(self.database_path, self.language_code)
+        self.db_manager = DatabaseManager(
+            self.database_path, self.language_code, self.database_config
+        )
         logger.info("Application démarrée")
+        # Reprendre la génération des audios TTS en attente ou en échec (aucune
+        # tâche d'écriture en arrière-plan sur une base en lecture seule)
+        if not self.db_manager.read_only:
+            self.db_manager.requeue_failed_media()
+        if not self.db_manager.read_only and self.db_manager.count_pending_media():
+            start_tts_backfill(self.db_manager)
+        # Profil de stockage compact : convertir les médias stockés auparavant
+        if (
+            not self.db_manager.read_only
+            and self.media_config.get("storage_profile") == "compact"
+        ):
+            compaction = start_media_compaction(self.db_manager)
+            compaction.compaction_finished.connect(self._on_media_compacted)
         self.show_resume_manual_button = False
         self.resume_manual_button = None  # Référence au bouton
         self._pending_manual_entries = None
@@ -98,11 +138,15 @@ class MainApp(QMainWindow):
                 config.get("username", ""),
                 config.get("language_code", "fr"),
                 config.get("database_path", "data.db"),
+                config.get("database", {}),
+                config.get("tts", {}),
+                config.get("media", {}),
+                config.get("autosave", {}),
             )
             # 12, "" sont les valeurs par défaut si non trouvée
         except Exception as e:
             logger.error(f"Erreur lors du chargement de la configuration: {e}")
-            return 12, ""  # Valeur par défaut en cas d'erreur
+            return 12, "", "fr", "data.db", {}, {}, {}, {}  # Valeurs par défaut en cas d'erreur
 
     def save_font_size_to_config(self, font_size):
         """Sauvegarde la taille de police dans le fichier config.toml."""
@@ -290,7 +334,7 @@ class MainApp(QMainWindow):
 
     def open_statistics_window(self):
         """Ouvre la fenêtre des statistiques d'utilisation."""
-        self.statistics_window = StatisticsApp(self.font_size, self)
+        self.statistics_window = StatisticsApp(self.db_manager, self.font_size, self)
         self.statistics_window.show()
         logger.info("Ouverture de la fenêtre de statistiques")
 
@@ -355,49 +399,38 @@ class MainApp(QMainWindow):
                 self.resume_manual_button.hide()
 
     def _check_addition_queue_on_startup(self):
-        """Vérifie s'il y a des entrées en attente dans la file d'attente d'addition et informe l'utilisateur."""
-        queue_file = os.path.join(
-            os.path.dirname(__file__), "tmp", ".addition_queue.json"
-        )
-
-        if os.path.exists(queue_file):
-            try:
-                with open(queue_file, "r", encoding="utf-8") as f:
-                    queue_data = json.load(f)
-
-                # Compter les entrées en attente et en erreur
-                pending_count = sum(
-                    1 for entry in queue_data if entry.get("status") == "pending"
-                )
-                error_count = sum(
-                    1 for entry in queue_data if entry.get("status") == "error"
-                )
-
-                if pending_count > 0 or error_count > 0:
-                    from PySide6.QtWidgets import QMessageBox
+        """Reprend en arrière-plan la file d'attente d'addition et informe
+        l'utilisateur des entrées en attente ou en erreur."""
+        if self.db_manager.read_only:
+            return
+        try:
+            # Anciennes files JSON et travaux interrompus repris au démarrage du thread
+            start_addition_queue(self.db_manager)
+            counts = AdditionQueue(self.db_manager).counts()
+            pending_count = counts[JOB_PENDING]
+            error_count = counts[JOB_ERROR]
 
-                    message = "File d'attente d'ajout détectée :\n"
-                    if pending_count > 0:
-                        message += (
-                            f"• {pending_count} entrée(s) en attente de traitement\n"
-                        )
-                    if error_count > 0:
-                        message += f"• {error_count} entrée(s) en erreur\n"
-                    message += (
-                        "\nLe traitement reprendra automatiquement en arrière-plan."
-                    )
+            if pending_count > 0 or error_count > 0:
+                from PySide6.QtWidgets import QMessageBox
 
-                    QMessageBox.information(self, "Reprise du traitement", message)
+                message = "File d'attente d'ajout détectée :\n"
+                if pending_count > 0:
+                    message += f"• {pending_count} entrée(s) en attente de traitement\n"
+                if error_count > 0:
+                    message += f"• {error_count} entrée(s) en erreur\n"
+                message += "\nLe traitement reprendra automatiquement en arrière-plan."
 
-                    logger.info(
-                        f"File d'attente d'addition trouvée : {pending_count} en attente, {error_count} en erreur"
-                    )
+                QMessageBox.information(self, "Reprise du traitement", message)
 
-            except Exception as e:
-                logger.error(
-                    f"Erreur lors de la vérification de la file d'attente d'addition : {e}"
+                logger.info(
+                    f"File d'attente d'addition trouvée : {pending_count} en attente, {error_count} en erreur"
                 )
 
+        except Exception as e:
+            logger.error(
+                f"Erreur lors de la vérification de la file d'attente d'addition : {e}"
+            )
+
     def close_all_windows(self):
         """Ferme et détruit toutes les fenêtres secondaires ouvertes."""
         windows = [
@@ -420,12 +453,34 @@ class MainApp(QMainWindow):
                         pass
                 setattr(self, window_name, None)
 
+    def _on_media_compacted(self, summary):
+        if summary["converted"]:
+            self.statusBar().showMessage(
+                f"{summary['converted']} média(s) converti(s) au format compact, "
+                f"{summary['bytes_saved'] / (1024 * 1024):.1f} Mo économisé(s)",
+                10000,
+            )
+
     def closeEvent(self, event):
         """Fermer proprement l'application et toutes les fenêtres secondaires."""
         logger.info("Fermeture de l'application")
         self.close_all_windows()  # Fermer toutes les fenêtres secondaires
+        stopped = all(
+            [
+                stop_tts_backfill(),  # Les audios non générés restent en attente
+                stop_media_compaction(),  # Les médias restants seront convertis plus tard
+                stop_addition_queue(),  # Les ajouts non traités restent dans la file
+            ]
+        )
+        stop_review_log()  # Écrit les dernières statistiques de révision
         if hasattr(self, "db_manager"):
-            self.db_manager.close_connection()  # Fermer la base de données
+            if stopped:
+                self.db_manager.close_connection()  # Fermer la base de données
+            else:
+                # Un thread utilise encore la base : elle sera fermée avec le processus
+                logger.warning(
+                    "Traitement en arrière-plan toujours actif : base laissée ouverte."
+                )
         event.accept()
         super().closeEvent(event)
 
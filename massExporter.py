@@ -70,10 +70,11 @@ class massExporter(QWidget):
 
         # Récupérer les entrées depuis la base de données
         try:
-            records = self.db_manager.fetch_all_records()
-            if not records:
+            if self.db_manager.count_records() == 0:
                 QMessageBox.information(self, "Info", "Aucun entrée trouvé à exporter.")
                 return
+            # Parcours par pages : la table n'est jamais chargée entièrement
+            records = self.db_manager.iter_records()
 
             # Définir les colonnes à inclure
             if include_metadata:
@@ -110,8 +111,3 @@ class massExporter(QWidget):
             QMessageBox.critical(
                 self, "Erreur", f"Échec de l'exportation des données : {e}"
             )
-
-    def closeEvent(self, event):
-        """Fermer proprement la connexion à la base de données."""
-        self.db_manager.close_connection()
-        super().closeEvent(event)
@@ -1,4 +1,3 @@
-import csv
 import os
 from PySide6.QtWidgets import (
     QFileDialog,
@@ -8,13 +7,16 @@ from PySide6.QtWidgets import (
     QWidget,
     QLabel,
 )
+from PySide6.QtCore import Qt
 from PySide6.QtGui import (
     QShortcut,
     QKeySequence,
 )
 from logger import logger
 from missing_responses_dialog import MissingResponsesDialog
-from common_methods import TimeUtils, ProgressBarHelper
+from common_methods import ProgressBarHelper
+from import_pipeline import ImportCheckpoint, ImportPipeline, first_media_path
+from tts_backfill import start_tts_backfill
 
 
 class MassImporter(QWidget):
@@ -23,6 +25,7 @@ class MassImporter(QWidget):
         self.setWindowTitle("Importer des données en masse")
         self.db_manager = db_manager  # Utiliser l'instance partagée de DatabaseManager
         self.font_size = font_size  # Stocker la taille de police
+        self.pipeline = None  # ImportPipeline en cours
         self.setStyleSheet(
             f"* {{ font-size: {self.font_size}px; }}"
         )  # Appliquer la taille de police
@@ -56,6 +59,17 @@ class MassImporter(QWidget):
         self.progress_helper = ProgressBarHelper(parent_layout=layout)
         self.progress_helper.hide()
 
+        # Annulation de l'import en cours (les lots déjà écrits sont conservés)
+        self.cancel_button = QPushButton("Annuler l'importation")
+        self.cancel_button.clicked.connect(self.cancel_import)
+        self.cancel_button.hide()
+        layout.addWidget(self.cancel_button)
+
+        # Progression de la génération des audios TTS, faite en arrière-plan
+        self.tts_status_label = QLabel()
+        self.tts_status_label.hide()
+        layout.addWidget(self.tts_status_label)
+
         # Bouton pour fermer la fenêtre
         close_button = QPushButton("Fermer (Ctrl+W)")
         close_button.clicked.connect(self.close)
@@ -64,6 +78,28 @@ class MassImporter(QWidget):
         self.setLayout(layout)
 
     def import_csv(self):
+        if self.pipeline is not None and self.pipeline.isRunning():
+            QMessageBox.information(
+                self, "Importation en cours", "Une importation est déjà en cours."
+            )
+            return
+
+        # Importation interrompue (fermeture, plantage) : proposer de la reprendre
+        checkpoint = ImportCheckpoint.load(self.db_manager.db_path)
+        if checkpoint is not None:
+            reply = QMessageBox.question(
+                self,
+                "Reprendre l'importation ?",
+                f"Une importation interrompue a été détectée ({len(checkpoint.csv_paths)} fichier(s), {checkpoint.rows_done()} lignes déjà traitées).\n\nVoulez-vous la reprendre là où elle s'était arrêtée ?",
+                QMessageBox.Yes | QMessageBox.No,
+            )
+            if reply == QMessageBox.Yes:
+                self._start_pipeline(
+                    checkpoint.csv_paths, checkpoint.audio_base_dirs, resume=True
+                )
+                return
+            checkpoint.clear()
+
         # Ouvre une boîte de dialogue pour sélectionner plusieurs fichiers CSV
         file_dialog = QFileDialog(
             self, "Sélectionner des fichiers CSV", "", "Fichiers CSV (*.csv)"
@@ -80,181 +116,75 @@ class MassImporter(QWidget):
         if not csv_paths:
             return
 
-        total_imported = 0
-        total_failed = 0
-        processed_files = 0
-        total_files = len(csv_paths)
-
-        # Initialisation pour l'avertissement des métadonnées
-        found_uuid = False
-        found_creation_date = False
-
-        # Traiter chaque fichier CSV sélectionné
-        missing_responses = []  # Pour stocker les entrées à compléter manuellement
+        # Chemins audio relatifs : demandés avant le lancement, le pipeline
+        # travaillant hors du thread de l'interface
+        audio_base_dirs = {}
         for csv_path in csv_paths:
             try:
-                logger.info(f"Début d'importation depuis {csv_path}")
-                with open(csv_path, "r", encoding="utf-8") as csv_file:
-                    reader = csv.DictReader(csv_file)
-                    if not {"media_path", "question"}.issubset(reader.fieldnames):
-                        logger.error(f"Colonnes CSV manquantes dans {csv_path}")
-                        QMessageBox.warning(
-                            self,
-                            "Avertissement",
-                            f"Le fichier {csv_path} ne contient pas les colonnes requises ('media_path', 'question') et sera ignoré.",
-                        )
-                        processed_files += 1
-                        continue
-
-                    # Vérifier si les colonnes optionnelles sont présentes
-                    if "UUID" in reader.fieldnames:
-                        found_uuid = True
-                    if "creation_date" in reader.fieldnames:
-                        found_creation_date = True
-                    # --- Ajout pour start_time et end_time ---
-                    has_start_time = "start_time" in reader.fieldnames
-                    has_end_time = "end_time" in reader.fieldnames
-
-                    rows = list(reader)
-                    total_rows = len(rows)
-                    logger.info(
-                        f"Nombre d'entrées à importer dans {csv_path}: {total_rows}"
-                    )
-
-                    # --- Nouvelle logique pour gérer les chemins relatifs media_path ---
-                    audio_base_dir = None
-                    if rows:
-                        # Trouver le premier media_path non vide
-                        first_media_path = None
-                        for row in rows:
-                            candidate = row.get("media_path", "").strip()
-                            if candidate:
-                                first_media_path = candidate
-                                break
-
-                        if (
-                            first_media_path
-                            and not os.path.isabs(first_media_path)
-                            and not os.path.exists(first_media_path)
-                        ):
-                            reply = QMessageBox.question(
-                                self,
-                                "Chemin audio relatif ?",
-                                f"Le fichier audio '{first_media_path}' n'a pas été trouvé.\n\nEst-ce que les chemins audio de ce CSV sont relatifs à un dossier ?",
-                                QMessageBox.Yes | QMessageBox.No,
-                            )
-                            if reply == QMessageBox.Yes:
-                                folder = QFileDialog.getExistingDirectory(
-                                    self,
-                                    "Sélectionner le dossier parent des fichiers audio",
-                                )
-                                if folder:
-                                    audio_base_dir = folder
-
-                    # Mettre à jour la barre de progression pour ce fichier
-                    self.progress_helper.show(total_rows)
-
-                    failed_insertion_count = 0
-                    for index, row in enumerate(rows, start=1):
-                        file_path = row["media_path"].strip()
-                        if (
-                            audio_base_dir
-                            and file_path
-                            and not os.path.isabs(file_path)
-                        ):
-                            file_path = os.path.join(audio_base_dir, file_path)
-                        question = row["question"]
-                        response = row.get("response", "")
-                        attribution = row.get("attribution", "no-attribution")
-
-                        start_time_ms = (
-                            TimeUtils.parse_time_to_ms(row["start_time"])
-                            if has_start_time
-                            else None
-                        )
-                        end_time_ms = (
-                            TimeUtils.parse_time_to_ms(row["end_time"])
-                            if has_end_time
-                            else None
-                        )
-
-                        # Ignorer les entrées avec réponse vide, mais les stocker pour saisie manuelle
-                        if not response.strip():
-                            failed_insertion_count += 1
-                            logger.warning(
-                                f"Entrée ignorée - réponse vide pour question: '{question}'"
-                            )
-                            missing_responses.append(
-                                {
-                                    "media_path": file_path,
-                                    "question": question,
-                                    "response": response,
-                                    "UUID": row.get("UUID", "").strip() or None,
-                                    "creation_date": row.get(
-                                        "creation_date", ""
-                                    ).strip()
-                                    or None,
-                                    "start_time_ms": start_time_ms,
-                                    "end_time_ms": end_time_ms,
-                                    "attribution": attribution,
-                                }
-                            )
-                            self.progress_helper.set_value(index)
-                            continue
-
-                        uuid = row.get("UUID", "").strip() or None  # UUID optionnel
-                        creation_date = (
-                            row.get("creation_date", "").strip() or None
-                        )  # creation_date optionnel
-
-                        # Enregistrer les données dans la base de données
-                        try:
-                            insertion_status_code = self.db_manager.insert_record(
-                                file_path,
-                                question,
-                                response,
-                                start_time_ms,
-                                end_time_ms,
-                                uuid,
-                                creation_date,
-                                attribution,
-                            )
-                            if insertion_status_code != 0:
-                                failed_insertion_count += insertion_status_code
-                                logger.warning(
-                                    f"{question},{response} est déjà présent dans la base de données et n'est pas ajouté à nouveau"
-                                )
-                        except Exception as e:
-                            logger.error(
-                                f"Échec de l'enregistrement des données pour '{file_path}': {e}"
-                            )
-                            continue
-
-                        self.progress_helper.set_value(index)
-
-                    total_imported += total_rows - failed_insertion_count
-                    total_failed += failed_insertion_count
-                    processed_files += 1
-
-                    # Afficher un aperçu de la progression totale
-                    logger.info(
-                        f"Fichier {processed_files}/{total_files} traité: {csv_path}"
+                first_media = first_media_path(csv_path)
+            except Exception:
+                continue  # erreur signalée par le pipeline
+            if (
+                first_media
+                and not os.path.isabs(first_media)
+                and not os.path.exists(first_media)
+            ):
+                reply = QMessageBox.question(
+                    self,
+                    "Chemin audio relatif ?",
+                    f"Le fichier audio '{first_media}' n'a pas été trouvé.\n\nEst-ce que les chemins audio de ce CSV sont relatifs à un dossier ?",
+                    QMessageBox.Yes | QMessageBox.No,
+                )
+                if reply == QMessageBox.Yes:
+                    folder = QFileDialog.getExistingDirectory(
+                        self,
+                        "Sélectionner le dossier parent des fichiers audio",
                     )
+                    if folder:
+                        audio_base_dirs[csv_path] = folder
 
-            except Exception as e:
-                logger.critical(f"Échec de la lecture du fichier CSV {csv_path} : {e}")
-                QMessageBox.warning(
-                    self, "Erreur", f"Échec de la lecture du fichier {csv_path} : {e}"
-                )
-                processed_files += 1
-                continue
+        self._start_pipeline(csv_paths, audio_base_dirs)
 
+    def _start_pipeline(self, csv_paths, audio_base_dirs, resume=False):
+        self.pipeline = ImportPipeline(
+            self.db_manager, csv_paths, audio_base_dirs, resume=resume
+        )
+        self.pipeline.progress.connect(self._on_import_progress)
+        self.pipeline.audio_pending.connect(self._start_tts_backfill)
+        self.pipeline.import_finished.connect(self._on_import_finished)
+        self.progress_helper.show(0)
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.show()
+        self.pipeline.start()
+
+    def cancel_import(self):
+        if self.pipeline is not None and self.pipeline.isRunning():
+            self.pipeline.cancel()
+            self.cancel_button.setEnabled(False)
+
+    def _on_import_progress(self, done, total):
+        self.progress_helper.widget().setMaximum(total)
+        self.progress_helper.set_value(done)
+
+    def _on_import_finished(self, summary):
         self.progress_helper.hide()
+        self.cancel_button.hide()
+        if summary["file_errors"]:
+            QMessageBox.warning(
+                self,
+                "Avertissement",
+                "\n\n".join(
+                    f"{csv_path} : {message}"
+                    for csv_path, message in summary["file_errors"]
+                ),
+            )
 
         # Si des réponses sont manquantes, proposer une interface de saisie
-        if missing_responses:
-            self.prompt_missing_responses(missing_responses)
+        if summary["missing_responses"]:
+            self.prompt_missing_responses(summary["missing_responses"])
         # Message final avec le résumé
+        found_uuid = summary["found_uuid"]
+        found_creation_date = summary["found_creation_date"]
         custom_metadata_warning = ""
         if not found_uuid and not found_creation_date:
             custom_metadata_warning = (
@@ -271,19 +201,58 @@ class MassImporter(QWidget):
                 "(UUID) et (creation_date) de coutume sont détectées et bien traitées."
             )
 
-        logger.info(
-            f"Importation terminée: {total_imported} entrées importées, {total_failed} échecs sur {processed_files} fichiers."
-        )
+        total_pending_audio = summary["pending_audio"]
         QMessageBox.information(
             self,
             "Complèt",
-            f"Importation en masse terminée !\n\n"
-            f"{total_files} fichiers traités\n"
-            f"{total_imported} entrées importées avec succès\n"
-            f"{total_failed} entrées problèmatiques en attendant de correction manuel\n"
-            f"{custom_metadata_warning}",
+            (
+                "Importation annulée : les entrées déjà enregistrées sont conservées, elle pourra être reprise.\n\n"
+                if summary["cancelled"]
+                else "Importation en masse terminée !\n\n"
+            )
+            + (
+                f"{summary['resumed_rows']} lignes traitées avant l'interruption (incluses ci-dessous)\n"
+                if summary["resumed_rows"]
+                else ""
+            )
+            + f"{summary['files']} fichiers traités\n"
+            f"{summary['imported']} entrées importées avec succès\n"
+            f"{summary['failed']} entrées problèmatiques en attendant de correction manuel\n"
+            + (
+                f"{total_pending_audio} audios générés en arrière-plan\n"
+                if total_pending_audio
+                else ""
+            )
+            + f"{custom_metadata_warning}",
         )
 
+    def closeEvent(self, event):
+        # Les lots déjà écrits sont conservés ; le reste de l'import est abandonné
+        if self.pipeline is not None and self.pipeline.isRunning():
+            self.pipeline.cancel()
+            self.pipeline.wait()
+        super().closeEvent(event)
+
+    def _start_tts_backfill(self, *_):
+        thread = start_tts_backfill(self.db_manager)
+        thread.progress.connect(self._on_tts_progress, Qt.UniqueConnection)
+        thread.backfill_finished.connect(
+            self._on_tts_backfill_finished, Qt.UniqueConnection
+        )
+        self.tts_status_label.setText("Génération des audios en arrière-plan…")
+        self.tts_status_label.show()
+
+    def _on_tts_progress(self, done, total):
+        self.tts_status_label.setText(
+            f"Génération des audios en arrière-plan : {done}/{total}"
+        )
+
+    def _on_tts_backfill_finished(self, succeeded, failed):
+        message = f"Audios générés : {succeeded}"
+        if failed:
+            message += f", {failed} échec(s) (nouvel essai au prochain démarrage)"
+        self.tts_status_label.setText(message)
+
     def prompt_missing_responses(self, missing_responses):
         """
         Affiche une boîte de dialogue non bloquante pour compléter les réponses manquantes.
@@ -0,0 +1,118 @@
+"""Conversion en arrière-plan des médias déjà stockés au profil compact.
+
+Avec storage_profile = "compact" (section [media]), les nouveaux médias
+personnalisés sont convertis en Opus dès leur ajout (clip_engine). Un
+MediaCompactionThread par base convertit les médias stockés auparavant : chaque
+fichier est converti dans le dossier temporaire du stockage puis remplace
+l'original pour toutes ses entrées en une transaction (DatabaseManager.
+replace_media). Une conversion qui ne réduit pas la taille est écartée.
+"""
+
+import os
+import shutil
+import tempfile
+from PySide6.QtCore import QThread, Signal
+from logger import logger
+from clip_engine import compact_media_file
+
+
+class MediaCompactionThread(QThread):
+    progress = Signal(int, int)  # médias traités, total
+    compaction_finished = Signal(dict)  # bilan (voir run)
+
+    def __init__(self, db_manager):
+        super().__init__()
+        self.db_manager = db_manager
+        self._stop_requested = False
+
+    def stop(self):
+        """Interrompt la conversion ; les médias restants le seront au prochain
+        démarrage."""
+        self._stop_requested = True
+
+    def run(self):
+        summary = {
+            "converted": 0,
+            "skipped": 0,
+            "failed": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "bytes_saved": 0,
+        }
+        store = self.db_manager.media_store
+        work_dir = None
+        try:
+            candidates = store.compaction_candidates()
+            if candidates:
+                work_dir = tempfile.mkdtemp(dir=store.staging_dir())
+            for done, (media_hash, path, size) in enumerate(candidates, 1):
+                if self._stop_requested:
+                    break
+                self._compact(media_hash, path, size, work_dir, summary)
+                self.progress.emit(done, len(candidates))
+        except Exception as e:
+            logger.error(f"Arrêt de la conversion des médias : {e}")
+        finally:
+            if work_dir is not None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            self.db_manager.release_connection()
+            summary["bytes_saved"] = summary["bytes_before"] - summary["bytes_after"]
+            logger.info(
+                f"Conversion des médias terminée : {summary['converted']} convertie(s), "
+                f"{summary['skipped']} écartée(s), {summary['failed']} échec(s), "
+                f"{summary['bytes_saved']} octet(s) économisé(s)."
+            )
+            self.compaction_finished.emit(summary)
+
+    def _compact(self, media_hash, path, size, work_dir, summary):
+        if not os.path.exists(path):
+            summary["failed"] += 1
+            logger.error(f"Média introuvable, non converti : {path}")
+            return
+        compacted = compact_media_file(path, work_dir)
+        if compacted == path:
+            summary["failed"] += 1
+            return
+        compacted_size = os.path.getsize(compacted)
+        if compacted_size >= size:
+            os.remove(compacted)
+            summary["skipped"] += 1
+            return
+        try:
+            self.db_manager.replace_media(media_hash, compacted)
+        except Exception as e:
+            summary["failed"] += 1
+            logger.error(f"Média converti non enregistré ({path}) : {e}")
+            if os.path.exists(compacted):
+                os.remove(compacted)
+            return
+        summary["converted"] += 1
+        summary["bytes_before"] += size
+        summary["bytes_after"] += compacted_size
+
+
+# Une conversion au plus par base (clé : chemin de la base)
+_compaction_threads = {}
+
+
+def start_media_compaction(db_manager) -> MediaCompactionThread:
+    """Lance la conversion des médias de `db_manager` (sauf si elle est déjà en
+    cours) et renvoie le thread."""
+    thread = _compaction_threads.get(db_manager.db_path)
+    if thread is not None and thread.isRunning():
+        return thread
+    thread = MediaCompactionThread(db_manager)
+    _compaction_threads[db_manager.db_path] = thread
+    thread.start()
+    return thread
+
+
+def stop_media_compaction(timeout_ms: int = 5000) -> bool:
+    """Arrête les conversions en cours (fermeture de l'application). Renvoie False
+    si un thread tourne encore après `timeout_ms` : sa base ne doit pas être fermée."""
+    for thread in _compaction_threads.values():
+        thread.stop()
+    for db_path, thread in list(_compaction_threads.items()):
+        if thread.wait(timeout_ms):
+            del _compaction_threads[db_path]
+    return not _compaction_threads
@@ -0,0 +1,311 @@
+"""Stockage des médias adressé par contenu.
+
+Chaque fichier média d'une base est enregistré une seule fois dans son dossier
+audio, sous le nom de son empreinte SHA-256, et décrit par une ligne de la table
+`media` (hash, chemin, taille, nombre de références). Les entrées de `records`
+le référencent par `media_hash` ; des déclencheurs tiennent le compteur à jour,
+et un fichier n'est effacé que lorsque plus aucune entrée ne le référence.
+
+Entre `add_file` et l'écriture de l'entrée, le média n'a encore aucune
+référence : `add_file` l'épingle (colonne `pins`) et l'appelant retire l'épingle
+une fois l'entrée écrite (`unpin`, ou `release` qui ramasse aussi les médias
+restés sans référence). Le ramasse-miettes d'un autre thread ignore les médias
+épinglés.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import Counter
+from PySide6.QtSql import QSqlQuery
+from logger import logger
+from common_methods import MediaUtils
+from clip_engine import compact_media_file, should_compact
+
+# Formats copiés tels quels (sans découpage) : lien physique vers la source
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+# Taille des blocs lus pour calculer l'empreinte d'un fichier
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class MediaStore:
+    def __init__(self, db_manager):
+        # Les requêtes passent par db_manager.db : connexion propre au thread appelant
+        self.db_manager = db_manager
+
+    @property
+    def directory(self) -> str:
+        return self.db_manager.audio_dir
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def create_schema(self):
+        """Crée (idempotent) la table media, la colonne records.media_hash et les
+        déclencheurs qui maintiennent le nombre de références."""
+        db = self.db_manager
+        db._exec_sql(
+            """
+            CREATE TABLE IF NOT EXISTS media (
+                hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        if "media_hash" not in db._table_columns("records"):
+            db._exec_sql("ALTER TABLE records ADD COLUMN media_hash TEXT")
+        db._exec_sql(
+            "CREATE INDEX IF NOT EXISTS idx_records_media_hash ON records (media_hash)"
+        )
+        db._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS records_media_ai AFTER INSERT ON records BEGIN
+                UPDATE media SET refcount = refcount + 1 WHERE hash = new.media_hash;
+            END
+            """
+        )
+        db._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS records_media_ad AFTER DELETE ON records BEGIN
+                UPDATE media SET refcount = refcount - 1 WHERE hash = old.media_hash;
+            END
+            """
+        )
+        db._exec_sql(
+            """
+            CREATE TRIGGER IF NOT EXISTS records_media_au
+            AFTER UPDATE OF media_hash ON records
+            WHEN old.media_hash IS NOT new.media_hash BEGIN
+                UPDATE media SET refcount = refcount - 1 WHERE hash = old.media_hash;
+                UPDATE media SET refcount = refcount + 1 WHERE hash = new.media_hash;
+            END
+            """
+        )
+
+    def backfill(self) -> list:
+        """Enregistre dans la table media les fichiers des entrées qui n'ont pas encore
+        d'empreinte. Les entrées dont le fichier a le même contenu qu'un autre sont
+        redirigées vers un seul exemplaire ; renvoie les chemins devenus inutiles
+        (copies situées dans le dossier audio), à effacer une fois la transaction
+        validée. Les entrées dont le fichier est introuvable restent sans empreinte.
+        """
+        query = QSqlQuery(self.db_manager.db)
+        query.setForwardOnly(True)
+        if not query.exec_(
+            "SELECT DISTINCT media_file FROM records WHERE media_hash IS NULL"
+        ):
+            raise Exception(query.lastError().text())
+        paths = []
+        while query.next():
+            paths.append(query.value(0))
+        query.finish()
+
+        directory = os.path.abspath(self.directory)
+        duplicates = []
+        # Les fichiers du dossier audio sont préférés comme exemplaire conservé
+        for path in sorted(
+            paths, key=lambda p: os.path.dirname(os.path.abspath(p)) != directory
+        ):
+            if not path or not os.path.isfile(path):
+                continue
+            media_hash = self.file_hash(path)
+            canonical = self.path_for_hash(media_hash)
+            if canonical is None:
+                canonical = path
+                self.db_manager._exec_sql(
+                    "INSERT INTO media (hash, path, size, refcount) VALUES (?, ?, ?, 0)",
+                    [media_hash, path, os.path.getsize(path)],
+                )
+            elif os.path.dirname(os.path.abspath(path)) == directory:
+                duplicates.append(path)
+            self.db_manager._exec_sql(
+                "UPDATE records SET media_hash = ?, media_file = ? WHERE media_file = ?",
+                [media_hash, canonical, path],
+            )
+        return duplicates
+
+    def path_for_hash(self, media_hash: str):
+        return self.db_manager._scalar(
+            "SELECT path FROM media WHERE hash = ?", [media_hash]
+        )
+
+    def hash_for_path(self, path: str):
+        return self.db_manager._scalar("SELECT hash FROM media WHERE path = ?", [path])
+
+    def staging_dir(self) -> str:
+        """Dossier temporaire dans le dossier audio (même système de fichiers que le
+        stockage, les fichiers y sont ensuite déplacés sans copie)."""
+        staging_dir = os.path.join(self.directory, ".staging")
+        os.makedirs(staging_dir, exist_ok=True)
+        return staging_dir
+
+    def add_file(self, path: str, move: bool = False) -> tuple:
+        """Enregistre un fichier et renvoie (hash, chemin stocké).
+
+        Un contenu déjà présent n'est ni copié ni lié : le chemin existant est
+        renvoyé. Sinon le fichier est déplacé (`move`, fichier temporaire), lié
+        physiquement ou, à défaut (autre système de fichiers), copié. La ligne media
+        est épinglée : l'appelant retire l'épingle (`unpin` ou `release`) une fois
+        l'entrée qui la référence écrite.
+        """
+        media_hash = self.file_hash(path)
+        ext = os.path.splitext(path)[1].lower()
+        dest_path = os.path.join(self.directory, media_hash + ext)
+        # L'épingle est posée avant de vérifier le fichier : un effacement en cours
+        # (verrou d'écriture tenu, voir collect_garbage) est alors terminé, et aucun
+        # autre ne peut commencer
+        self.db_manager._exec_sql(
+            """
+            INSERT INTO media (hash, path, size, refcount, pins) VALUES (?, ?, ?, 0, 1)
+            ON CONFLICT (hash) DO UPDATE SET pins = pins + 1
+            """,
+            [media_hash, dest_path, os.path.getsize(path)],
+        )
+        known = self.path_for_hash(media_hash)
+        if known and os.path.exists(known):
+            if move and os.path.abspath(path) != os.path.abspath(known):
+                os.remove(path)
+            return media_hash, known
+
+        if os.path.abspath(path) != os.path.abspath(dest_path):
+            if move:
+                os.replace(path, dest_path)
+            elif not os.path.exists(dest_path):
+                try:
+                    os.link(path, dest_path)
+                except OSError:
+                    shutil.copy2(path, dest_path)
+        if known != dest_path:
+            # Fichier connu mais introuvable : la ligne désigne le nouvel exemplaire
+            self.db_manager._exec_sql(
+                "UPDATE media SET path = ?, size = ? WHERE hash = ?",
+                [dest_path, os.path.getsize(dest_path), media_hash],
+            )
+        return media_hash, dest_path
+
+    def unpin(self, hashes):
+        """Retire les épingles posées par add_file : une par occurrence d'une
+        empreinte dans `hashes`."""
+        for media_hash, count in Counter(h for h in hashes if h).items():
+            self.db_manager._exec_sql(
+                "UPDATE media SET pins = max(pins - ?, 0) WHERE hash = ?",
+                [count, media_hash],
+            )
+
+    def release(self, hashes) -> int:
+        """Retire les épingles de `hashes` puis efface ceux qui ne sont pas référencés
+        (médias préparés pour des entrées finalement non écrites)."""
+        hashes = list(hashes)
+        self.unpin(hashes)
+        return self.collect_garbage(hashes)
+
+    def reset_pins(self):
+        """Retire les épingles laissées par un arrêt brutal (au démarrage)."""
+        self.db_manager._exec_sql("UPDATE media SET pins = 0 WHERE pins <> 0")
+
+    def import_media(
+        self, src_path: str, start_time_ms: int = None, end_time_ms: int = None
+    ) -> tuple:
+        """Ajoute un média fourni par l'utilisateur ; renvoie (hash, chemin stocké).
+        Un fichier audio non découpé est lié tel quel, les autres cas passent par
+        MediaFileProcessing dans un dossier temporaire. Avec le profil de stockage
+        compact, le résultat est converti en Opus avant d'être stocké."""
+        ext = os.path.splitext(src_path)[1].lower()
+        untrimmed = start_time_ms is None and end_time_ms is None
+        if ext in AUDIO_EXTENSIONS and untrimmed and not should_compact(src_path):
+            return self.add_file(src_path)
+        work_dir = tempfile.mkdtemp(dir=self.staging_dir())
+        try:
+            if ext in AUDIO_EXTENSIONS and untrimmed:
+                processed = src_path
+            else:
+                processed = MediaUtils.MediaFileProcessing.process_media_file(
+                    src_path, work_dir, start_time_ms, end_time_ms
+                )
+            processed = compact_media_file(processed, work_dir)
+            return self.add_file(processed, move=processed != src_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def compaction_candidates(self) -> list:
+        """Médias personnalisés encore référencés que le profil de stockage compact
+        convertirait : liste de (hash, chemin, taille)."""
+        query = QSqlQuery(self.db_manager.db)
+        query.setForwardOnly(True)
+        if not query.exec_(
+            """
+            SELECT hash, path, size FROM media
+            WHERE refcount > 0 AND hash IN (
+                SELECT media_hash FROM records WHERE custom_media = 1
+            )
+            ORDER BY hash
+            """
+        ):
+            raise Exception(query.lastError().text())
+        candidates = []
+        while query.next():
+            path = query.value(1)
+            if should_compact(path):
+                candidates.append((query.value(0), path, query.value(2)))
+        query.finish()
+        return candidates
+
+    def collect_garbage(self, hashes) -> int:
+        """Efface les fichiers des empreintes données qui ne sont plus référencées
+        (et leur ligne media). Renvoie le nombre de fichiers supprimés."""
+        hashes = [media_hash for media_hash in set(hashes) if media_hash]
+        unreferenced = []
+        query = QSqlQuery(self.db_manager.db)
+        for chunk in self.db_manager._chunks(hashes):
+            placeholders = ",".join(["?"] * len(chunk))
+            query.prepare(
+                f"SELECT hash, path FROM media WHERE refcount <= 0 AND pins <= 0 AND hash IN ({placeholders})"
+            )
+            for media_hash in chunk:
+                query.addBindValue(media_hash)
+            if not query.exec_():
+                logger.error(
+                    f"Échec de la recherche des médias non référencés : {query.lastError().text()}"
+                )
+                return 0
+            while query.next():
+                unreferenced.append((query.value(0), query.value(1)))
+        query.finish()
+
+        removed = 0
+        db = self.db_manager.db
+        for media_hash, path in unreferenced:
+            # Ligne et fichier sont effacés dans une même transaction : add_file, qui
+            # épingle la ligne avant de vérifier le fichier, attend la validation
+            if not db.transaction():
+                logger.error(
+                    f"Médias non référencés non effacés : {db.lastError().text()}"
+                )
+                break
+            # Le compteur est revérifié : une entrée a pu référencer ce média entre-temps
+            query.prepare(
+                "DELETE FROM media WHERE hash = ? AND refcount <= 0 AND pins <= 0"
+            )
+            query.addBindValue(media_hash)
+            if not query.exec_() or query.numRowsAffected() == 0:
+                db.rollback()
+                continue
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                    removed += 1
+                    print(f"Fichier média supprimé: {path}")
+                except Exception as e:
+                    print(f"Échec de la suppression du fichier média: {e}")
+            if not db.commit():
+                db.rollback()
+        return removed
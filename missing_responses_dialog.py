@@ -12,7 +12,6 @@ from PySide6.QtWidgets import (
 
 import os
 import json
-import tempfile
 
 from PySide6.QtGui import (
     QShortcut,
@@ -25,22 +24,25 @@ from common_methods import TimeUtils, MediaUtils
 from PySide6.QtWidgets import QDialogButtonBox
 
 from common_methods import ProgressBarHelper
+from db import INSERT_FAILED
+from tts_cache import shared_tts_cache
+from autosave import AutosaveWriter
 
 
 class MissingResponsesDialog(QDialog):
-    # Utiliser le répertoire temporaire système pour les fichiers TTS
-    APP_TMP_DIR = tempfile.gettempdir()
     PROGRESS_FILE = os.path.join(
         os.path.dirname(__file__), "tmp", ".missing_responses_progress.json"
     )
 
-    _tts_cache = {}  # Cache local pour éviter les doublons
-
     def __init__(
         self, parent, entries, prompt_on_load=True, db_manager=None, language_code="fr"
     ):
         super().__init__(parent)
         self.setWindowTitle("Compléter les réponses manquantes")
+        # Sauvegarde du progrès différée et écrite hors du thread de l'interface
+        self._autosave = AutosaveWriter(
+            self.PROGRESS_FILE, self._progress_state, parent=self
+        )
         self.entries = entries
         self.current_index = 0
         self.db_manager = db_manager  # Ajout de la référence à la base
@@ -71,8 +73,9 @@ class MissingResponsesDialog(QDialog):
     def tts(self, entry):
         """
         Génère un TTS à partir de la question/réponse de l'entrée.
-        Utilise un cache local pour éviter de régénérer un audio identique.
-        Retourne le chemin du fichier audio généré (dans le dossier tmp).
+        Passe par le cache TTS partagé : un audio identique n'est jamais régénéré,
+        y compris d'une session à l'autre.
+        Retourne le chemin du fichier audio (dans le dossier du cache).
         """
         question = entry.get("question") or entry.get("original_question") or ""
         response = entry.get("response", "")
@@ -82,19 +85,7 @@ class MissingResponsesDialog(QDialog):
             tts_text = question
         if not tts_text.strip():
             return None
-        # Utiliser le hash du texte comme clé de cache
-        cache_key = f"{self.language_code}:{tts_text.strip()}"
-        if cache_key in self._tts_cache:
-            return self._tts_cache[cache_key]
-        from gtts import gTTS
-
-        audio_filename = f"tts_{abs(hash(cache_key))}.mp3"
-        file_path = os.path.join(self.APP_TMP_DIR, audio_filename)
-        if not os.path.exists(file_path):
-            tts = gTTS(tts_text, lang=self.language_code)
-            tts.save(file_path)
-        self._tts_cache[cache_key] = file_path
-        return file_path
+        return shared_tts_cache().synthesize(tts_text, self.language_code)
 
     # --- UI ---
     def _init_ui(self):
@@ -425,47 +416,43 @@ class MissingResponsesDialog(QDialog):
         if self.db_manager is not None:
             progress = ProgressBarHelper(parent_layout=self.layout)
             progress.show(len(self.entries))
-            count = 0
-            for idx, entry in enumerate(self.entries, start=1):
-                if entry.get("response", "").strip():
-                    try:
-                        self.db_manager.insert_record(
-                            entry.get("media_path", ""),
-                            entry.get("question", ""),
-                            entry.get("response", ""),
-                            entry.get("start_time_ms"),
-                            entry.get("end_time_ms"),
-                            entry.get("UUID"),
-                            entry.get("creation_date"),
-                        )
-                        count += 1
-                    except Exception as e:
-                        print(f"Erreur lors de l'insertion manuelle: {e}")
-                progress.set_value(idx)
+            rows = [
+                {
+                    "media_file": entry.get("media_path", ""),
+                    "question": entry.get("question", ""),
+                    "response": entry.get("response", ""),
+                    "start_time_ms": entry.get("start_time_ms"),
+                    "end_time_ms": entry.get("end_time_ms"),
+                    "UUID": entry.get("UUID"),
+                    "creation_date": entry.get("creation_date"),
+                    "attribution": entry.get("attribution"),
+                }
+                for entry in self.entries
+                if entry.get("response", "").strip()
+            ]
+            statuses = self.db_manager.insert_records_batch(
+                rows, progress_callback=progress.set_value
+            )
+            failed = sum(1 for status in statuses if status == INSERT_FAILED)
+            if failed:
+                print(
+                    f"Erreur lors de l'insertion manuelle: {failed} entrée(s) en échec"
+                )
             progress.hide()
             # Supprimer le fichier de progrès uniquement après succès
-            if os.path.exists(self.PROGRESS_FILE):
-                try:
-                    os.remove(self.PROGRESS_FILE)
-                except Exception as e:
-                    print(f"Erreur lors de la suppression du fichier de progrès: {e}")
+            self._autosave.discard()
         self.accept()
 
     def save_and_quit(self):
         self.save_current()
-        try:
-            with open(self.PROGRESS_FILE, "w", encoding="utf-8") as f:
-                json.dump(
-                    {"entries": self.entries, "current_index": self.current_index},
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                )
-        except Exception as e:
+        # Écriture immédiate de l'état en attente
+        if not self._autosave.flush() or self._autosave.error is not None:
             box = QMessageBox(self)
             box.setIcon(QMessageBox.Warning)
             box.setWindowTitle("Erreur")
-            box.setText(f"Erreur lors de la sauvegarde du progrès: {e}")
+            box.setText(
+                f"Erreur lors de la sauvegarde du progrès: {self._autosave.error}"
+            )
             box.setStandardButtons(QMessageBox.Ok)
             box.show()  # Non bloquant
         self.reject()
@@ -524,16 +511,7 @@ class MissingResponsesDialog(QDialog):
         def on_text_selected(text):
             if text.strip() == "DELETE":
                 # Suppression du fichier de progrès partiel si présent
-                if os.path.exists(self.PROGRESS_FILE):
-                    try:
-                        os.remove(self.PROGRESS_FILE)
-                    except Exception as e:
-                        box = QMessageBox(self)
-                        box.setIcon(QMessageBox.Warning)
-                        box.setWindowTitle("Erreur")
-                        box.setText(f"Erreur lors de la suppression du progrès : {e}")
-                        box.setStandardButtons(QMessageBox.Ok)
-                        box.show()  # Non bloquant
+                self._autosave.discard()
                 # Vider la liste des entrées
                 self.entries.clear()
                 self.reject()
@@ -552,27 +530,25 @@ class MissingResponsesDialog(QDialog):
 
     # --- Sauvegarde et reprise du progrès ---
     def save_progress(self):
-        """Sauvegarde automatique du progrès courant."""
-        try:
-            with open(self.PROGRESS_FILE, "w", encoding="utf-8") as f:
-                json.dump(
-                    {"entries": self.entries, "current_index": self.current_index},
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                )
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde automatique du progrès: {e}")
+        """Sauvegarde automatique du progrès courant (différée, voir autosave)."""
+        self._autosave.schedule()
+
+    def _progress_state(self) -> dict:
+        # Copie des entrées : elles sont sérialisées par le thread d'écriture
+        return {
+            "entries": [dict(entry) for entry in self.entries],
+            "current_index": self.current_index,
+        }
+
+    def done(self, result):
+        # accept()/reject() ne passent pas par closeEvent
+        self._autosave.close()
+        super().done(result)
 
     def closeEvent(self, event):
-        # Nettoyer le cache TTS à la fermeture de la fenêtre et supprimer les fichiers audio générés
-        for path in self._tts_cache.values():
-            try:
-                if path and os.path.exists(path):
-                    os.remove(path)
-            except Exception:
-                pass  # On ignore les erreurs de suppression
-        self._tts_cache.clear()
+        self._autosave.flush()
+        # Les audios TTS restent dans le cache partagé (éviction par taille)
+        shared_tts_cache().flush()
         super().closeEvent(event)
 
     def load_progress_if_exists(self):
@@ -603,7 +579,7 @@ class MissingResponsesDialog(QDialog):
                         warn_box.setStandardButtons(QMessageBox.Ok)
                         warn_box.show()  # Non bloquant
                 else:
-                    os.remove(self.PROGRESS_FILE)
+                    self._autosave.discard()
                 box.deleteLater()
                 return False
 
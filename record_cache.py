@@ -0,0 +1,69 @@
+"""Cache LRU des entrées d'une session de révision.
+
+Une session ne garde que l'ordre des UUID de ses entrées (voir session_journal).
+Les entrées complètes sont relues depuis la base au moment de les afficher, par
+paquets de `chunk_size` UUID en avance sur la carte courante, et gardées dans un
+cache borné à `capacity` entrées : la mémoire reste constante quelle que soit la
+taille de la session, et une session restaurée démarre sans tout relire.
+"""
+
+from collections import OrderedDict
+
+REVIEW_CACHE_SIZE = 256
+REHYDRATE_CHUNK = 64
+
+
+class RecordCache:
+    def __init__(
+        self, db_manager, capacity=REVIEW_CACHE_SIZE, chunk_size=REHYDRATE_CHUNK
+    ):
+        self.db_manager = db_manager
+        # Un paquet relu doit tenir entièrement dans le cache
+        self.capacity = max(capacity, chunk_size)
+        self.chunk_size = chunk_size
+        self._records = OrderedDict()  # UUID -> entrée, la plus récente en dernier
+        self.fetches = 0  # Requêtes de relecture, pour le suivi
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, uuid):
+        return uuid in self._records
+
+    def put(self, records):
+        """Ajoute des entrées déjà lues (page chargée depuis la base)."""
+        for record in records:
+            self._store(record.get("UUID"), record)
+
+    def get(self, uuids, index=0):
+        """Entrée de `uuids[index]`, ou None si elle n'existe plus dans la base.
+
+        Si elle n'est pas en cache, les UUID absents parmi les `chunk_size`
+        suivants sont relus en une seule requête."""
+        uuid = uuids[index]
+        record = self._records.get(uuid)
+        if record is None:
+            window = uuids[index : index + self.chunk_size]
+            missing = list(dict.fromkeys(u for u in window if u not in self._records))
+            fetched = self.db_manager.fetch_record_by_uuid(missing)
+            self.fetches += 1
+            # Ordre inverse : les entrées les plus proches sont évincées en dernier
+            for fetched_record in reversed(fetched):
+                self._store(fetched_record.get("UUID"), fetched_record)
+            record = self._records.get(uuid)
+            if record is None:
+                return None
+        self._records.move_to_end(uuid)
+        return record
+
+    def invalidate(self):
+        """Oublie toutes les entrées ; elles seront relues à la demande."""
+        self._records.clear()
+
+    def _store(self, uuid, record):
+        if uuid is None:
+            return
+        self._records[uuid] = record
+        self._records.move_to_end(uuid)
+        while len(self._records) > self.capacity:
+            self._records.popitem(last=False)
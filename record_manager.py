@@ -10,7 +10,7 @@ from PySide6.QtWidgets import (
     QHeaderView,
     QLabel,
 )
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt, QSize, QTimer
 from PySide6.QtGui import QKeySequence, QShortcut, QIcon
 import csv
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
@@ -20,6 +20,13 @@ import os
 
 
 class RecordManagerApp(QWidget):
+    # Nombre maximal d'entrées affichées pour une recherche
+    SEARCH_RESULT_LIMIT = 500
+    # Entrées chargées par page ; la suite est lue en arrivant au bas de la table
+    PAGE_SIZE = 500
+    # Délai sans frappe avant de lancer la recherche (ms)
+    SEARCH_DELAY_MS = 300
+
     def __init__(self, db_manager, font_size=12):
         super().__init__()
         self.setWindowTitle("Gérer les entrées")
@@ -31,6 +38,10 @@ class RecordManagerApp(QWidget):
             + "\nQToolTip { color: #fff; background-color: #222; border: 1px solid #555; font-size: 13px; }"
         )
         self.changed_lines = set()
+        self._page_filter = None
+        self._next_rowid = None
+        self._searched_text = ""  # Texte de la recherche affichée dans la table
+        self._discard_dialog = None
         self.setup_ui()
         self.showMaximized()
 
@@ -53,7 +64,13 @@ class RecordManagerApp(QWidget):
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Rechercher... (CTRL+F)")
-        self.search_input.textChanged.connect(self.search_records)
+        # Recherche lancée après une pause dans la frappe, pas à chaque touche
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._run_pending_search)
+        self.search_input.textChanged.connect(self._search_timer.start)
+        self.search_input.returnPressed.connect(self._run_pending_search)
         search_layout.addWidget(self.search_input)
         layout.addLayout(search_layout)
 
@@ -91,6 +108,7 @@ class RecordManagerApp(QWidget):
             ]
         )
         self.table.itemChanged.connect(self.track_changes)
+        self.table.verticalScrollBar().valueChanged.connect(self._on_table_scrolled)
         layout.addWidget(self.table)
 
         self.resize_table_columns()
@@ -146,6 +164,15 @@ class RecordManagerApp(QWidget):
                 "label": "&R",
                 "accessible": "Effacer les erreurs",
             },
+            {
+                "icon": "assets/icons/favorite.png",
+                "tooltip": "Favori / annuler favori pour la sélection (Alt+V)",
+                "color": "#b5197e",
+                "callback": self.toggle_selected_favorites,
+                "shortcut": "Alt+V",
+                "label": "&V",
+                "accessible": "Favori pour la sélection",
+            },
             {
                 "icon": "assets/icons/cut.png",
                 "tooltip": "Déplacer records (Alt+M)",
@@ -221,88 +248,100 @@ class RecordManagerApp(QWidget):
             event.accept()
 
     def save_changes(self):
-        visible_uuids = set()
-        for row in range(self.table.rowCount()):
-            if not self.table.isRowHidden(row):
-                uuid_item = self.table.item(row, 0)
-                if uuid_item:
-                    visible_uuids.add(uuid_item.text())
-
-        changed_lines_copy = list(self.changed_lines)
-        total_changes = len(changed_lines_copy)
-        if total_changes == 0:
+        rows = [
+            row
+            for row in sorted(self.changed_lines)
+            if self.table.item(row, 0) is not None
+            and self.table.item(row, 2) is not None
+            and self.table.item(row, 3) is not None
+        ]
+        if not rows:
+            self.changed_lines.clear()
             QMessageBox.information(self, "Info", "Aucune modification à enregistrer.")
-            self.load_records()
+            self.reload_records()
             return
 
-        self.progress_helper.show(total_changes)
-        for i, row in enumerate(changed_lines_copy):
-            if (
-                self.table.item(row, 0) is None
-                or self.table.item(row, 2) is None
-                or self.table.item(row, 3) is None
-            ):
-                self.changed_lines.discard(row)
-                continue
-
-            record_id = self.table.item(row, 0).text()
-            new_media_file = self.table.item(row, 1).text()
-            new_question = self.table.item(row, 2).text()
-            new_response = self.table.item(row, 3).text()
-            new_attribution = (
-                self.table.item(row, 5).text()
-                if self.table.item(row, 5)
-                else "no-attribution"
+        changes = [
+            {
+                "UUID": self.table.item(row, 0).text(),
+                "media_file": self.table.item(row, 1).text(),
+                "question": self.table.item(row, 2).text(),
+                "response": self.table.item(row, 3).text(),
+                "attribution": (
+                    self.table.item(row, 5).text()
+                    if self.table.item(row, 5)
+                    else "no-attribution"
+                ),
+            }
+            for row in rows
+        ]
+        # Toutes les modifications sont écrites en une transaction ; seules les
+        # lignes concernées sont ensuite rafraîchies
+        self.progress_helper.show(len(changes))
+        try:
+            results = self.db_manager.update_records(
+                changes, progress_callback=self.progress_helper.set_value
             )
-
-            try:
-                success = self.db_manager.update_record(
-                    record_id,
-                    new_media_file,
-                    new_question,
-                    new_response,
-                    new_attribution,
-                )
-                self.changed_lines.discard(row)
-                if success:
-                    logger.info(
-                        f"entry UUID={record_id} is successfully modified by user."
-                    )
-                else:
-                    raise Exception(f"Échec de la mise à jour pour UUID: {record_id}")
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", str(e))
-                pass
-
-            self.progress_helper.set_value(i + 1)
-
+        except Exception as e:
+            self.progress_helper.hide()
+            QMessageBox.critical(self, "Erreur", str(e))
+            return
         self.progress_helper.hide()
+        self.changed_lines.clear()
 
-        if not self.changed_lines:
-            QMessageBox.information(
-                self, "Succès", "Toutes les modifications ont été enregistrées."
-            )
+        failed = []
         self.table.blockSignals(True)
-        self.load_records()
+        for row, change, record in zip(rows, changes, results):
+            if record is None:
+                failed.append(change["UUID"])
+                continue
+            self._fill_row(row, record)
+            logger.info(f"entry UUID={record.UUID} is successfully modified by user.")
         self.table.blockSignals(False)
 
-        for row in range(self.table.rowCount()):
-            uuid_item = self.table.item(row, 0)
-            if uuid_item and uuid_item.text() in visible_uuids:
-                self.table.setRowHidden(row, False)
-            else:
-                self.table.setRowHidden(row, True)
-
-        if self.search_input.text():
-            self.search_records(self.search_input.text())
+        if failed:
+            QMessageBox.critical(
+                self,
+                "Erreur",
+                "Échec de la mise à jour pour UUID: " + ", ".join(failed),
+            )
+        else:
+            QMessageBox.information(
+                self, "Succès", "Toutes les modifications ont été enregistrées."
+            )
 
     def load_records(self):
-        records = self.db_manager.fetch_all_records()
-        self._render_table(records)
+        self._load_first_page(None)
 
     def load_favorite_records(self):
-        records = self.db_manager.fetch_favorite_records()
+        self._load_first_page({"favorite": True})
+
+    def _load_first_page(self, record_filter):
+        """Affiche la première page d'entrées correspondant au filtre."""
+        self._page_filter = record_filter
+        records, self._next_rowid = self.db_manager.fetch_page(
+            limit=self.PAGE_SIZE, record_filter=record_filter
+        )
         self._render_table(records)
+        return records
+
+    def load_more_records(self):
+        """Ajoute la page suivante au bas de la table, s'il en reste une."""
+        if self._next_rowid is None:
+            return False
+        records, self._next_rowid = self.db_manager.fetch_page(
+            after_rowid=self._next_rowid,
+            limit=self.PAGE_SIZE,
+            record_filter=self._page_filter,
+        )
+        self._append_rows(records)
+        return bool(records)
+
+    def _on_table_scrolled(self, value):
+        # maximum() vaut 0 pendant la réinitialisation de la table : rien à charger
+        maximum = self.table.verticalScrollBar().maximum()
+        if maximum and value >= maximum:
+            self.load_more_records()
 
     def reload_records(self):
         """
@@ -321,7 +360,6 @@ class RecordManagerApp(QWidget):
             self.filter_by_date_range(start, end)
             self._filter_date_active = True
         elif self.search_input.text():
-            self.load_records()
             self.search_records(self.search_input.text())
         else:
             self.load_records()
@@ -342,43 +380,121 @@ class RecordManagerApp(QWidget):
             )
             return
 
-        rows_to_delete = sorted([index.row() for index in selected_rows], reverse=True)
-        self.table.blockSignals(True)
-        for row in rows_to_delete:
-            record_id = self.table.item(row, 0).text()
-            success = self.db_manager.delete_record(record_id)
-            if not success:
-                QMessageBox.critical(
-                    self,
-                    "Erreur",
-                    f"Échec de la suppression de l'entrée UUID: {record_id}.",
-                )
-                self.table.blockSignals(False)
-                return
-            self.changed_lines.discard(row)
-            self.changed_lines = set(
-                (i - 1 if i > row else i) for i in self.changed_lines
+        uuids = [self.table.item(index.row(), 0).text() for index in selected_rows]
+        try:
+            deleted = self.db_manager.delete_records(uuids)
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Erreur", f"Échec de la suppression des entrées : {e}"
             )
-
-        self.table.blockSignals(False)
+            return
+        self._remove_rows(deleted)
         QMessageBox.information(self, "Succès", "entrée(s) supprimé(s) avec succès.")
-        self.load_records()
 
-    def search_records(self, keyword):
-        # Affiche les lignes contenant tous les mots-clés, même dispersés dans plusieurs colonnes
-        keywords = [k.strip().lower() for k in keyword.split() if k.strip()]
+    def _remove_rows(self, uuids):
+        """Retire de la table les lignes des UUID donnés, sans recharger le reste."""
         self.table.blockSignals(True)
-        for row in range(self.table.rowCount()):
-            row_texts = []
-            for column in range(self.table.columnCount()):
-                item = self.table.item(row, column)
-                if item:
-                    row_texts.append(item.text().lower())
-            # Pour chaque mot-clé, il doit être présent dans au moins une colonne
-            match = all(any(kw in cell for cell in row_texts) for kw in keywords)
-            self.table.setRowHidden(row, not match)
+        for row in range(self.table.rowCount() - 1, -1, -1):
+            uuid_item = self.table.item(row, 0)
+            if uuid_item and uuid_item.text() in uuids:
+                self.table.removeRow(row)
+                self.changed_lines.discard(row)
+                self.changed_lines = set(
+                    (i - 1 if i > row else i) for i in self.changed_lines
+                )
         self.table.blockSignals(False)
 
+    def toggle_selected_favorites(self):
+        """Marque les entrées sélectionnées comme favorites (ou les retire des favoris
+        si elles le sont toutes déjà), en une seule écriture."""
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(
+                self,
+                "Erreur",
+                "Veuillez sélectionner un ou plusieurs entrées par CLIQUER sur les NUMÉROs des lignes.",
+            )
+            return
+        rows = {
+            self.table.item(index.row(), 0).text(): index.row()
+            for index in selected_rows
+        }
+        is_fav = not all(self.db_manager.is_favorite(uuid) for uuid in rows)
+        try:
+            self.db_manager.set_favorites(list(rows), is_fav)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", str(e))
+            return
+        for uuid, row in rows.items():
+            self.table.setCellWidget(
+                row, 7, self._create_fav_button({"UUID": uuid, "is_favorite": is_fav})
+            )
+
+    def search_records(self, keyword):
+        # Recherche plein texte dans la base (question, réponse, attribution) : seules
+        # les entrées contenant tous les mots-clés sont affichées
+        self._searched_text = keyword
+        if not keyword.strip():
+            self.load_records()
+            return
+        self._next_rowid = None
+        records = self.db_manager.search_records(
+            keyword, limit=self.SEARCH_RESULT_LIMIT
+        )
+        if len(records) == self.SEARCH_RESULT_LIMIT:
+            logger.info(
+                f"Recherche '{keyword}' : affichage limité aux {self.SEARCH_RESULT_LIMIT} premiers résultats"
+            )
+        self._render_table(records)
+
+    def _run_pending_search(self):
+        """Lance la recherche du texte saisi, après confirmation si des
+        modifications de la table ne sont pas enregistrées."""
+        self._search_timer.stop()
+        if not self.changed_lines:
+            self.search_records(self.search_input.text())
+            return
+        if self._discard_dialog is not None:
+            # Question déjà posée : la réponse portera sur le texte saisi d'ici là
+            return
+        self._confirm_discard_changes()
+
+    def _confirm_discard_changes(self):
+        """La table va être réaffichée : propose, sans bloquer, d'enregistrer les
+        modifications en cours. En cas d'annulation, le champ de recherche reprend
+        le texte de la recherche affichée."""
+        msg_box = QMessageBox(self)
+        msg_box.setIcon(QMessageBox.Question)
+        msg_box.setWindowTitle("Modifications non sauvegardées")
+        msg_box.setText(
+            "Voulez-vous sauvegarder les modifications avant de lancer la recherche?"
+        )
+        msg_box.setStandardButtons(
+            QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
+        )
+        msg_box.setDefaultButton(QMessageBox.Save)
+        msg_box.setWindowModality(Qt.NonModal)
+        msg_box.finished.connect(
+            lambda result: self._handle_discard_response(msg_box, result)
+        )
+        self._discard_dialog = msg_box
+        msg_box.show()
+
+    def _handle_discard_response(self, msg_box, result):
+        self._discard_dialog = None
+        msg_box.deleteLater()
+        if result == QMessageBox.Save:
+            self.save_changes()
+        elif result == QMessageBox.Discard:
+            self.changed_lines.clear()
+        else:
+            # Annulé : la table garde la recherche affichée, le champ aussi
+            self.search_input.blockSignals(True)
+            self.search_input.setText(self._searched_text)
+            self.search_input.blockSignals(False)
+            return
+        self.search_records(self.search_input.text())
+
     def go_to_line(self):
         line_number_str = self.line_input.text()
         if not line_number_str.isdigit():
@@ -388,6 +504,9 @@ class RecordManagerApp(QWidget):
             return
 
         line_number = int(line_number_str)
+        # Charger les pages nécessaires pour atteindre la ligne demandée
+        while line_number > self.table.rowCount() and self.load_more_records():
+            pass
         if line_number < 1 or line_number > self.table.rowCount():
             QMessageBox.warning(
                 self,
@@ -405,15 +524,10 @@ class RecordManagerApp(QWidget):
         try:
             with open("entry_error.csv", "r", encoding="utf-8") as file:
                 reader = csv.reader(file)
-                error_uuids = {row[0] for row in reader}
-            self.table.blockSignals(True)
-            for row in range(self.table.rowCount()):
-                uuid_item = self.table.item(row, 0)
-                if uuid_item and uuid_item.text() in error_uuids:
-                    self.table.setRowHidden(row, False)
-                else:
-                    self.table.setRowHidden(row, True)
-            self.table.blockSignals(False)
+                error_uuids = list(dict.fromkeys(row[0] for row in reader if row))
+            # Les entrées signalées peuvent se trouver hors des pages déjà chargées
+            self._next_rowid = None
+            self._render_table(self.db_manager.fetch_record_by_uuid(error_uuids))
             self._filter_error_active = True
             QMessageBox.information(self, "Info", "Filtrage des erreurs terminé.")
         except FileNotFoundError:
@@ -447,14 +561,13 @@ class RecordManagerApp(QWidget):
                 self._filter_date_active = False
                 return
             start, end = result
-        records = self.db_manager.fetch_record_by_creation_date(start, end)
+        records = self._load_first_page({"start": start, "end": end})
         if not records:
             QMessageBox.information(
                 self, "Info", "Aucune entrée trouvée pour cette plage de dates."
             )
             self._filter_date_active = False
             return
-        self._render_table(records)
         self._filter_date_active = True
         self._last_date_range = (start, end)
 
@@ -496,6 +609,7 @@ class RecordManagerApp(QWidget):
                         if self.table.item(row, 5)
                         else "no-attribution"
                     ),
+                    "is_favorite": not is_fav,
                 }
                 self.table.setCellWidget(row, 7, self._create_fav_button(record))
                 break
@@ -527,49 +641,49 @@ class RecordManagerApp(QWidget):
             return
         from db import DatabaseManager
 
-        moved = 0
-        # Créer une connexion temporaire à la base cible
-        target_db = DatabaseManager(target_db_path)
+        records = []
         for index in selected_rows:
             row = index.row()
-            record = {
-                "UUID": self.table.item(row, 0).text(),
-                "media_file": self.table.item(row, 1).text(),
-                "question": self.table.item(row, 2).text(),
-                "response": self.table.item(row, 3).text(),
-                "creation_date": self.table.item(row, 4).text(),
-                "attribution": (
-                    self.table.item(row, 5).text()
-                    if self.table.item(row, 5)
-                    else "no-attribution"
-                ),
-            }
+            records.append(
+                {
+                    "UUID": self.table.item(row, 0).text(),
+                    "media_file": self.table.item(row, 1).text(),
+                    "question": self.table.item(row, 2).text(),
+                    "response": self.table.item(row, 3).text(),
+                    "creation_date": self.table.item(row, 4).text(),
+                    "attribution": (
+                        self.table.item(row, 5).text()
+                        if self.table.item(row, 5)
+                        else "no-attribution"
+                    ),
+                }
+            )
+        # Connexion temporaire à la base cible (elle gère le chemin audio) ; seules
+        # les entrées présentes dans la cible sont supprimées de la base courante
+        try:
+            target_db = DatabaseManager(
+                target_db_path, database_config=self.db_manager.database_config
+            )
             try:
-                # Utiliser DatabaseManager pour insérer dans la base cible (il gère le chemin audio)
-                target_db.insert_record(
-                    media_file=record["media_file"],
-                    question=record["question"],
-                    response=record["response"],
-                    UUID=record["UUID"],
-                    creation_date=record["creation_date"],
-                    attribution=record["attribution"],
-                )
-                # Supprimer de la base courante
-                self.db_manager.delete_record(record["UUID"])
-                moved += 1
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    "Erreur",
-                    f"Erreur lors du déplacement de l'entrée UUID: {record['UUID']}\n{e}",
-                )
-        if moved:
-            QMessageBox.information(
-                self,
-                "Succès",
-                f"{moved} entrée(s) déplacée(s) avec succès. Les fichiers audio ont été déplacés automatiquement.",
+                moved, failed = self.db_manager.move_records(records, target_db)
+            finally:
+                target_db.close_connection()
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Erreur", f"Échec du déplacement des entrées : {e}"
             )
-        self.load_records()
+            return
+        self._remove_rows(set(moved))
+        message = f"{len(moved)} entrée(s) déplacée(s) avec succès. Les fichiers audio ont été déplacés automatiquement."
+        if failed:
+            message += (
+                f"\n{len(failed)} entrée(s) non déplacée(s), conservée(s) dans la base courante :\n"
+                + "\n".join(failed[:10])
+                + ("\n…" if len(failed) > 10 else "")
+            )
+            QMessageBox.warning(self, "Déplacement incomplet", message)
+        else:
+            QMessageBox.information(self, "Succès", message)
 
     def _button_with_label(self, button, label):
         # Retourne un widget horizontal avec le bouton et un QLabel transparent pour accessibilité Alt+()
@@ -589,7 +703,10 @@ class RecordManagerApp(QWidget):
                 logger.error(f"Icône non trouvée: {path}")
             return QIcon(path)
 
-        is_fav = self.db_manager.is_favorite(record["UUID"])
+        # L'état favori accompagne l'entrée lue en base ; sinon, cache du DatabaseManager
+        is_fav = record.get("is_favorite")
+        if is_fav is None:
+            is_fav = self.db_manager.is_favorite(record["UUID"])
         fav_btn = QPushButton()
         fav_btn.setIconSize(QSize(32, 32))
         if is_fav:
@@ -623,43 +740,50 @@ class RecordManagerApp(QWidget):
 
     def _render_table(self, records):
         """Affiche la table avec la liste d'enregistrements fournie."""
-        self.table.blockSignals(True)
         self.table.setRowCount(0)
-        self.table.setRowCount(len(records))
-        for row, record in enumerate(records):
-            uuid_item = QTableWidgetItem(record["UUID"])
-            uuid_item.setFlags(uuid_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 0, uuid_item)
-            self.table.setItem(row, 1, QTableWidgetItem(record["media_file"]))
-            self.table.setItem(row, 2, QTableWidgetItem(record["question"]))
-            self.table.setItem(row, 3, QTableWidgetItem(record["response"]))
-            creation_date_item = QTableWidgetItem(record["creation_date"])
-            creation_date_item.setFlags(creation_date_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 4, creation_date_item)
-            self.table.setItem(
-                row, 5, QTableWidgetItem(record.get("attribution", "no-attribution"))
-            )
-            # Bouton Lire
-            play_btn = QPushButton()
-            play_btn.setIcon(QIcon("assets/icons/play.png"))
-            play_btn.setIconSize(QSize(32, 32))
-            play_btn.setToolTip("Lire le média (Alt+A)")
-            play_btn.setAccessibleName("Lire le média")
-            play_btn.clicked.connect(
-                lambda checked, media_file=record["media_file"]: self.play_media_file(
-                    media_file
-                )
-            )
-            play_btn.setShortcut(QKeySequence("Alt+A"))
-            play_btn.setStyleSheet(
-                "background-color: #3c697d; border-radius: 8px; margin: 2px;"
-            )
-            play_label = QLabel("&A")
-            play_label.setVisible(False)
-            self.table.setCellWidget(
-                row, 6, self._button_with_label(play_btn, play_label)
-            )
-            # Bouton Favori
-            self.table.setCellWidget(row, 7, self._create_fav_button(record))
+        self._append_rows(records)
+
+    def _append_rows(self, records):
+        """Ajoute des enregistrements à la suite des lignes déjà affichées."""
+        self.table.blockSignals(True)
+        first_row = self.table.rowCount()
+        self.table.setRowCount(first_row + len(records))
+        for row, record in enumerate(records, start=first_row):
+            self._fill_row(row, record)
         self.resize_table_columns()
         self.table.blockSignals(False)
+
+    def _fill_row(self, row, record):
+        """Remplit (ou remplace) le contenu d'une ligne de la table."""
+        uuid_item = QTableWidgetItem(record["UUID"])
+        uuid_item.setFlags(uuid_item.flags() & ~Qt.ItemIsEditable)
+        self.table.setItem(row, 0, uuid_item)
+        self.table.setItem(row, 1, QTableWidgetItem(record["media_file"]))
+        self.table.setItem(row, 2, QTableWidgetItem(record["question"]))
+        self.table.setItem(row, 3, QTableWidgetItem(record["response"]))
+        creation_date_item = QTableWidgetItem(record["creation_date"])
+        creation_date_item.setFlags(creation_date_item.flags() & ~Qt.ItemIsEditable)
+        self.table.setItem(row, 4, creation_date_item)
+        self.table.setItem(
+            row, 5, QTableWidgetItem(record.get("attribution", "no-attribution"))
+        )
+        # Bouton Lire
+        play_btn = QPushButton()
+        play_btn.setIcon(QIcon("assets/icons/play.png"))
+        play_btn.setIconSize(QSize(32, 32))
+        play_btn.setToolTip("Lire le média (Alt+A)")
+        play_btn.setAccessibleName("Lire le média")
+        play_btn.clicked.connect(
+            lambda checked, media_file=record["media_file"]: self.play_media_file(
+                media_file
+            )
+        )
+        play_btn.setShortcut(QKeySequence("Alt+A"))
+        play_btn.setStyleSheet(
+            "background-color: #3c697d; border-radius: 8px; margin: 2px;"
+        )
+        play_label = QLabel("&A")
+        play_label.setVisible(False)
+        self.table.setCellWidget(row, 6, self._button_with_label(play_btn, play_label))
+        # Bouton Favori
+        self.table.setCellWidget(row, 7, self._create_fav_button(record))
@@ -10,9 +10,9 @@
 
 import difflib
 import os
+import time
 import unicodedata
 import string
-import json  # Importer le module JSON pour la sauvegarde et la restauration
 import csv  # Importer le module CSV pour enregistrer les erreurs
 from PySide6.QtWidgets import (
     QPushButton,
@@ -41,16 +41,34 @@ from PySide6.QtGui import (
 from logger import logger  # Remplacer l'import de logging par le logger centralisé
 import re
 from common_methods import FavoritesManager, DialogUtils, TextUtils, MediaUtils
+from record_cache import RecordCache
+from session_journal import SESSION_FILE, SessionJournal
+from usage_statistics import MODE_RETRIEVAL, MODE_REVIEW, start_review_log
 
 
 class RetrievalApp(QWidget):
+    # Entrées gardées en mémoire pendant une session ; la suite est lue au fil de l'eau
+    REVIEW_PAGE_SIZE = 200
+
     # --- Initialisation et configuration générale ---
     def __init__(self, db_manager, font_size=12, review_mode=False):
         super().__init__()
         self.db_manager = db_manager
         self.font_size = font_size
         self.review_mode = review_mode
-        self.records = None
+        # Ordre des entrées de la session (UUID) ; les entrées sont relues à la demande
+        self.session_uuids = None
+        self._record_cache = RecordCache(db_manager)
+        self.current_record = None
+        # Entrées de la session pas encore chargées : filtre, position, nombre restant
+        self._record_source = None
+        # Ordre des entrées journalisé pour reprendre la session après un arrêt
+        self._journal = SessionJournal()
+        # Réponses vérifiées, écrites par lots dans la base (review_events)
+        self._review_log = (
+            None if db_manager.read_only else start_review_log(db_manager)
+        )
+        self._card_shown_at = None
         self.current_record_index = 0
         self.current_dialog = None
         self.autoplay_enabled = False
@@ -107,10 +125,14 @@ class RetrievalApp(QWidget):
         self.media_player.playbackStateChanged.connect(self.on_audio_state_changed)
 
     # --- Gestion des fichiers de session (sauvegarde/restauration) ---
-    def save_records_to_file(self, file_path="saved_records.json"):
+    def save_records_to_file(self, file_path=SESSION_FILE):
         try:
-            with open(file_path, "w", encoding="utf-8") as file:
-                json.dump(self.records, file, ensure_ascii=False, indent=4)
+            # Seuls l'ordre des UUID et la position dans la base sont sauvegardés ;
+            # les entrées sont relues depuis la base à la restauration
+            if file_path == self._journal.path:
+                self._journal.compact()
+            else:
+                self._journal.save_as(file_path)
             logger.info(f"Enregistrements sauvegardés dans {file_path}")
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde des enregistrements: {e}")
@@ -118,11 +140,18 @@ class RetrievalApp(QWidget):
                 self, "Erreur", "Impossible de sauvegarder les enregistrements!"
             )
 
-    def load_records_from_file(self, file_path="saved_records.json"):
+    def load_records_from_file(self, file_path=SESSION_FILE):
         try:
             if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as file:
-                    self.records = json.load(file)
+                # Seuls les UUID sont repris, y compris d'un fichier de l'ancien format
+                # (entrées complètes) : le contenu est relu depuis la base à l'affichage
+                journal = SessionJournal.load(file_path)
+                self.session_uuids = list(journal.uuids)
+                self._record_source = journal.source
+                self._record_cache.invalidate()
+                self.current_record_index = 0
+                # La reprise continue dans le journal de session (compacté)
+                self._journal.start(journal.uuids, journal.source)
                 logger.info(f"Enregistrements chargés depuis {file_path}")
                 return True
             else:
@@ -151,10 +180,7 @@ class RetrievalApp(QWidget):
         return False
 
     def saved_session_overwirte_warning(self):
-        if (
-            os.path.exists("saved_records.json")
-            and os.path.getsize("saved_records.json") > 0
-        ):
+        if os.path.exists(SESSION_FILE) and os.path.getsize(SESSION_FILE) > 0:
             overwrite_warning = QMessageBox.question(
                 self,
                 "Attention",
@@ -168,10 +194,7 @@ class RetrievalApp(QWidget):
 
     # --- Sélection et chargement des enregistrements (UI d'entrée) ---
     def show_setup_dialog(self):
-        if (
-            os.path.exists("saved_records.json")
-            and os.path.getsize("saved_records.json") > 0
-        ):
+        if os.path.exists(SESSION_FILE) and os.path.getsize(SESSION_FILE) > 0:
             reply = QMessageBox.question(
                 self,
                 "Session précédente détectée",
@@ -180,7 +203,6 @@ class RetrievalApp(QWidget):
             )
             if reply == QMessageBox.Yes:
                 if self.load_records_from_file():
-                    self.refresh_records_from_db()
                     self.initialize_ui()
                     return
 
@@ -227,8 +249,7 @@ class RetrievalApp(QWidget):
         if not result:
             return
         start, end = result
-        self.records = self.db_manager.fetch_record_by_creation_date(start, end)
-        if self.records:
+        if self._start_session({"start": start.isoformat(), "end": end.isoformat()}):
             self.initialize_ui()
         else:
             QMessageBox.information(self, "Info", "Aucun entrée trouvé.")
@@ -238,8 +259,7 @@ class RetrievalApp(QWidget):
         if self.saved_session_overwirte_warning():
             return
         dialog.accept()
-        self.records = self.db_manager.fetch_all_records()
-        if self.records:
+        if self._start_session(None):
             self.initialize_ui()
         else:
             QMessageBox.information(
@@ -263,8 +283,7 @@ class RetrievalApp(QWidget):
             success = self.load_records_from_file()
 
         if success:
-            if self.records:
-                self.refresh_records_from_db()
+            if self.session_uuids:
                 self.initialize_ui()
             else:
                 QMessageBox.information(
@@ -277,6 +296,86 @@ class RetrievalApp(QWidget):
             )
             self.show_setup_dialog()
 
+    # --- Chargement progressif des entrées de la session ---
+    def _start_session(self, record_filter):
+        """Démarre une session sur les entrées du filtre, chargées par pages.
+        Renvoie False si aucune entrée ne correspond."""
+        pending = self.db_manager.count_records(record_filter)
+        self.session_uuids = []
+        self._record_cache.invalidate()
+        self.current_record_index = 0
+        self._record_source = {
+            "filter": record_filter,
+            "after_rowid": None,
+            "pending": pending,
+        }
+        self._initial_record_count = pending
+        self._journal.start([], self._record_source)
+        self._fill_records()
+        if not self.session_uuids:
+            self._journal_call(self._journal.clear)
+        return bool(self.session_uuids)
+
+    def _fill_records(self):
+        """Complète les entrées en mémoire depuis la base tant qu'il en reste."""
+        source = self._record_source
+        while source and len(self.session_uuids) < self.REVIEW_PAGE_SIZE:
+            page, next_rowid = self.db_manager.fetch_page(
+                after_rowid=source["after_rowid"],
+                limit=self.REVIEW_PAGE_SIZE,
+                record_filter=source["filter"],
+            )
+            uuids = [record.get("UUID") for record in page]
+            self.session_uuids.extend(uuids)
+            self._record_cache.put(page)
+            source["pending"] = max(0, source["pending"] - len(page))
+            source["after_rowid"] = next_rowid
+            if next_rowid is None:
+                self._record_source = source = None
+            self._journal_call(self._journal.extend, uuids, self._record_source)
+
+    def _pop_current(self, skipped=False):
+        """Retire l'entrée courante de la session (terminée ou sautée)."""
+        uuid = self.session_uuids.pop(self.current_record_index)
+        self._journal_call(self._journal.pop, uuid, skipped)
+        return uuid
+
+    def _requeue_current(self):
+        """Remet l'entrée courante en fin de session."""
+        uuid = self.session_uuids.pop(self.current_record_index)
+        self.session_uuids.append(uuid)
+        self._journal_call(self._journal.requeue, uuid)
+
+    def _load_current_record(self):
+        """Entrée courante, relue depuis la base par paquets si elle n'est plus en
+        cache. Les entrées supprimées entre-temps sont retirées de la session.
+        Renvoie None en fin de session."""
+        while True:
+            self._fill_records()
+            if not self.session_uuids:
+                return None
+            record = self._record_cache.get(
+                self.session_uuids, self.current_record_index
+            )
+            if record is not None:
+                return record
+            logger.info(
+                f"Entrée {self.session_uuids[self.current_record_index]} introuvable "
+                "dans la base, retirée de la session"
+            )
+            self._pop_current()
+
+    def _journal_call(self, method, *args):
+        # Le journal ne sert qu'à la reprise : une erreur d'écriture n'interrompt pas
+        try:
+            method(*args)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'écriture du journal de session: {e}")
+
+    def _remaining_record_count(self):
+        pending = self._record_source["pending"] if self._record_source else 0
+        return len(self.session_uuids) + pending
+
     # --- Interface principale de révision ---
     def initialize_ui(self):
         self.showMaximized()
@@ -293,18 +392,18 @@ class RetrievalApp(QWidget):
             if widget:
                 widget.setParent(None)
 
+        self.current_record = self._load_current_record()
         # Fin de session : plus d'enregistrements
-        if not self.records:
-            self.update_usage_stats()
-            if os.path.exists("saved_records.json"):
+        if self.current_record is None:
+            if os.path.exists(self._journal.path):
                 try:
-                    os.remove("saved_records.json")
+                    self._journal.clear()
                     logger.info(
-                        "Fichier saved_records.json supprimé après la fin de la session."
+                        f"Fichier {self._journal.path} supprimé après la fin de la session."
                     )
                 except Exception as e:
                     logger.error(
-                        f"Erreur lors de la suppression de saved_records.json: {e}"
+                        f"Erreur lors de la suppression de {self._journal.path}: {e}"
                     )
             self.play_media("assets/audio_effects/félicitations.ogg")
             # --- Effet de félicitations amélioré ---
@@ -368,13 +467,14 @@ class RetrievalApp(QWidget):
             self.center_layout.addStretch(1)
             return
 
-        record = self.records[self.current_record_index]
+        record = self.current_record
+        self._card_shown_at = time.monotonic()
 
         # Calcul de la progression
         if not hasattr(self, "_initial_record_count"):
-            self._initial_record_count = len(self.records)
+            self._initial_record_count = self._remaining_record_count()
         progress = (
-            1 - (len(self.records) / self._initial_record_count)
+            1 - (self._remaining_record_count() / self._initial_record_count)
             if self._initial_record_count
             else 1
         )
@@ -388,6 +488,11 @@ class RetrievalApp(QWidget):
         responses = [r.strip() for r in record["response"].split(";") if r.strip()]
         media_path = record["media_file"]
         entry_uuid = record.get("UUID", "unknown_uuid")
+        if not media_path:
+            # Entrée importée sans attendre la synthèse vocale (voir tts_backfill)
+            pending_label = QLabel("Audio en cours de génération")
+            pending_label.setAlignment(Qt.AlignRight)
+            self.center_layout.addWidget(pending_label)
 
         # Mode révision : affichage direct des réponses
         if self.review_mode:
@@ -470,7 +575,6 @@ class RetrievalApp(QWidget):
                 if first_input is None:
                     first_input = response_input
         self._add_normal_mode_controls(media_path, entry_uuid, responses)
-        self.save_records_to_file()  # sauvegarder progrès en cas de crash
         self.play_media(media_path)
 
     def cancel_favorite(self, entry_uuid=None):
@@ -663,19 +767,18 @@ class RetrievalApp(QWidget):
 
     # --- Actualisation et gestion des entrées ---
     def refresh_records_from_db(self):
-        # Rafraîchir les entrées existantes par leurs UUIDs (plus efficace)
-        if not self.records:
+        # Les entrées sont relues depuis la base à l'affichage, par paquets ; les
+        # entrées supprimées entre-temps sont alors retirées de la session
+        if not self.session_uuids:
             return
-        uuids = [rec.get("UUID") for rec in self.records if rec.get("UUID")]
-        self.records = self.db_manager.fetch_record_by_uuid(uuids)
+        self._record_cache.invalidate()
         self.current_record_index = 0
         self.display_next_item()
 
     # --- Signalement d'erreur sur une entrée ---
     def report_error(self, entry_uuid=None):
         if entry_uuid is None:
-            current_record = self.records[self.current_record_index]
-            entry_uuid = current_record.get("UUID", "unknown_uuid")
+            entry_uuid = self.current_record.get("UUID", "unknown_uuid")
         try:
             with open("entry_error.csv", "a", newline="", encoding="utf-8") as file:
                 writer = csv.writer(file)
@@ -726,9 +829,7 @@ class RetrievalApp(QWidget):
 
     def load_favorite_records(self):
         """Charge et affiche uniquement les enregistrements favoris."""
-        self.records = self.db_manager.fetch_favorite_records()
-        if self.records:
-            self.current_record_index = 0
+        if self._start_session({"favorite": True}):
             self.initialize_ui()
         else:
             QMessageBox.information(self, "Info", "Aucun favori trouvé.")
@@ -805,7 +906,7 @@ class RetrievalApp(QWidget):
     def check_multiple_responses_dialog(self, correct_responses, dialog=None):
         if self.review_mode:
             self.update_usage_stats()
-            self.records.pop(self.current_record_index)
+            self._pop_current()
         else:
             user_responses = [
                 TextUtils.normalize_special_characters(edit.text().strip())
@@ -865,9 +966,7 @@ class RetrievalApp(QWidget):
                 detailed_results.append(is_correct)
             all_correct = correct_count == total
             self.update_usage_stats(correct_count, total)
-            entry_uuid = self.records[self.current_record_index].get(
-                "UUID", "unknown_uuid"
-            )
+            entry_uuid = self.current_record.get("UUID", "unknown_uuid")
 
             if all_correct:
                 self.play_media("assets/audio_effects/correct.ogg")
@@ -897,8 +996,10 @@ class RetrievalApp(QWidget):
                 msg_box.show()
 
                 def on_closed():
-                    if self.records and self.current_record_index < len(self.records):
-                        self.records.pop(self.current_record_index)
+                    if self.session_uuids and self.current_record_index < len(
+                        self.session_uuids
+                    ):
+                        self._pop_current()
                     self.display_next_item()
 
                 msg_box.finished.connect(on_closed)
@@ -907,9 +1008,7 @@ class RetrievalApp(QWidget):
                 self.play_media("assets/audio_effects/error.ogg")
                 QTimer.singleShot(
                     800,
-                    lambda: self.play_media(
-                        self.records[self.current_record_index]["media_file"]
-                    ),
+                    lambda: self.play_media(self.current_record["media_file"]),
                 )
                 diff_html = (
                     f"<b>{correct_count}/{total} réponses correctes.</b><br><br>"
@@ -984,7 +1083,7 @@ class RetrievalApp(QWidget):
                 msg_box.show()
 
                 def on_closed():
-                    self.records.append(self.records.pop(self.current_record_index))
+                    self._requeue_current()
                     self.stop_audio(dialog)
                     self.display_next_item()
 
@@ -995,6 +1094,9 @@ class RetrievalApp(QWidget):
 
     # --- Gestion audio et vidéo ---
     def play_media(self, media_path):
+        if not media_path:
+            # Audio TTS pas encore généré : rien à lire, ce n'est pas une erreur
+            return
         MediaUtils.play_media_in_widget(
             self,
             media_path,
@@ -1019,14 +1121,14 @@ class RetrievalApp(QWidget):
             and self.autoplay_enabled
             and state == QMediaPlayer.StoppedState
         ):
-            if self.records:
-                self.records.pop(self.current_record_index)
+            if self.session_uuids:
+                self._pop_current()
                 self.display_next_item()
 
     # --- Fermeture propre de l'application ---
     def closeEvent(self, event):
-        if self.records:
-            self.save_records_to_file()
+        # Compacte le journal de la session en cours (rien à faire si elle est finie)
+        self._journal_call(self._journal.close)
         logger.info("Fermeture de session de revoir.")
         self.media_player.stop()
         super().closeEvent(event)
@@ -1034,16 +1136,16 @@ class RetrievalApp(QWidget):
 
     def skip_current_entry(self):
         """Affiche les réponses correctes pendant 1s avant de sauter à la prochaine entrée."""
-        if not self.records:
+        if not self.session_uuids or self.current_record is None:
             return
-        record = self.records[self.current_record_index]
+        record = self.current_record
         questions = [q.strip() for q in record["question"].split(";") if q.strip()]
         responses = [r.strip() for r in record["response"].split(";") if r.strip()]
         self._show_questions_with_responses(questions, responses)
         QTimer.singleShot(
             1000,
             lambda: (
-                self.records.pop(self.current_record_index),
+                self._pop_current(skipped=True),
                 self.display_next_item(),
             ),
         )
@@ -1096,37 +1198,26 @@ class RetrievalApp(QWidget):
 
     # --- Mise à jour des statistiques d'utilisation ---
     def update_usage_stats(self, correct_count=None, total_count=None):
-        import datetime
-
-        stats_file = "usage_stats.json"
-        today = datetime.date.today().isoformat()
-        stats = {
-            "retrieval_count": 0,
-            "review_count": 0,
-            "correct_count": 0,
-            "answered_count": 0,
-            "dates": [],
-        }
-        if os.path.exists(stats_file):
-            try:
-                with open(stats_file, "r", encoding="utf-8") as f:
-                    stats.update(json.load(f))
-            except Exception:
-                pass
-        if self.review_mode:
-            stats["review_count"] += 1
-        else:
-            stats["retrieval_count"] += 1
-            if correct_count is not None and total_count is not None:
-                stats["correct_count"] += correct_count
-                stats["answered_count"] += total_count
-        if not stats["dates"] or stats["dates"][-1] != today:
-            stats["dates"].append(today)
-        with open(stats_file, "w", encoding="utf-8") as f:
-            json.dump(stats, f, ensure_ascii=False, indent=2)
+        """Enregistre la vérification de l'entrée courante (écrite par lots en
+        arrière-plan, voir usage_statistics)."""
+        if self.current_record is None or self._review_log is None:
+            return
+        latency_ms = (
+            int((time.monotonic() - self._card_shown_at) * 1000)
+            if self._card_shown_at is not None
+            else None
+        )
+        self._review_log.record(
+            self.current_record.get("UUID"),
+            MODE_REVIEW if self.review_mode else MODE_RETRIEVAL,
+            correct_count,
+            total_count,
+            latency_ms,
+        )
 
     def _favorite_button_props(self, entry_uuid):
-        """Retourne l'icône, le tooltip et la couleur selon l'état favori."""
+        """Retourne l'icône, le tooltip et la couleur selon l'état favori (lu dans le
+        cache des favoris du DatabaseManager, sans requête)."""
         is_favorite = FavoritesManager.is_favorite(self.db_manager, entry_uuid)
         if is_favorite:
             return {
@@ -0,0 +1,191 @@
+"""Journal de session de révision (reprise après un arrêt brutal).
+
+Le fichier commence par un en-tête compact sur une ligne : l'ordre des UUID de
+la session et la position de chargement dans la base (`source`). Chaque action
+sur la carte courante ajoute ensuite une courte ligne au journal au lieu de
+réécrire toute la session :
+
+    {"version": 1, "uuids": ["…", "…"], "source": {…}}
+    ["p", "<uuid>"]                 carte terminée
+    ["r", "<uuid>"]                 carte remise en fin de file
+    ["s", "<uuid>"]                 carte sautée
+    ["+", ["<uuid>", …], {…}]       page chargée depuis la base, nouvelle source
+
+À la reprise, l'en-tête est relu puis les événements rejoués. Une dernière
+ligne tronquée (arrêt pendant l'écriture) est ignorée. Au-delà de
+`JOURNAL_COMPACT_EVENTS` événements, le journal est compacté : l'état courant
+devient le nouvel en-tête, écrit de façon atomique.
+
+Un fichier de session de l'ancien format (liste JSON des entrées, ou objet
+`{"records": […], "source": …}` indenté) est toujours accepté par `load` ; seuls
+les UUID en sont repris, les entrées étant relues depuis la base (record_cache).
+"""
+
+import json
+import os
+from autosave import write_json_atomic
+from logger import logger
+
+SESSION_FILE = "saved_records.json"
+JOURNAL_VERSION = 1
+JOURNAL_COMPACT_EVENTS = 500
+
+EVENT_POP = "p"
+EVENT_REQUEUE = "r"
+EVENT_SKIP = "s"
+EVENT_LOAD = "+"
+
+
+class SessionJournal:
+    """Journal append-only de l'ordre des entrées d'une session de révision.
+
+    Le journal tient en mémoire sa propre copie de l'ordre des UUID, ce qui lui
+    permet de se compacter sans interroger la fenêtre de révision."""
+
+    def __init__(self, path: str = SESSION_FILE, compact_events: int = None):
+        self.path = path
+        self.compact_events = (
+            JOURNAL_COMPACT_EVENTS if compact_events is None else compact_events
+        )
+        self.uuids = []
+        self.source = None
+        self._events = 0
+        self._file = None
+
+    # --- Écriture ---
+    def start(self, uuids, source=None):
+        """Commence un nouveau journal (remplace le précédent)."""
+        self.uuids = list(uuids)
+        self.source = source
+        self.compact()
+
+    def pop(self, uuid: str, skipped: bool = False):
+        """Retire la carte courante de la session (terminée ou sautée)."""
+        self._remove(uuid)
+        self._append([EVENT_SKIP if skipped else EVENT_POP, uuid])
+
+    def requeue(self, uuid: str):
+        """Remet la carte courante en fin de file."""
+        self._remove(uuid)
+        self.uuids.append(uuid)
+        self._append([EVENT_REQUEUE, uuid])
+
+    def extend(self, uuids, source):
+        """Note une page d'entrées chargée depuis la base et la nouvelle position."""
+        self.uuids.extend(uuids)
+        self.source = source
+        self._append([EVENT_LOAD, list(uuids), source])
+
+    def compact(self):
+        """Réécrit le journal en un seul en-tête décrivant l'état courant."""
+        self._close_file()
+        header = {"version": JOURNAL_VERSION, "uuids": self.uuids}
+        if self.source:
+            header["source"] = self.source
+        write_json_atomic(self.path, header, indent=None)
+        self._events = 0
+
+    def save_as(self, path: str):
+        """Écrit l'état courant, compacté, dans un autre fichier."""
+        header = {"version": JOURNAL_VERSION, "uuids": self.uuids}
+        if self.source:
+            header["source"] = self.source
+        write_json_atomic(path, header, indent=None)
+
+    def clear(self):
+        """Supprime le journal (fin de session)."""
+        self._close_file()
+        self.uuids = []
+        self.source = None
+        self._events = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        """Compacte le journal puis ferme le fichier."""
+        if self._file is not None or self._events:
+            self.compact()
+        self._close_file()
+
+    def _remove(self, uuid):
+        if self.uuids and self.uuids[0] == uuid:
+            del self.uuids[0]
+        elif uuid in self.uuids:
+            self.uuids.remove(uuid)
+
+    def _append(self, event):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        # Le séparateur précède l'événement : l'en-tête compacté n'a pas de fin de ligne
+        self._file.write("\n" + json.dumps(event, ensure_ascii=False))
+        self._file.flush()
+        self._events += 1
+        if self._events >= self.compact_events:
+            self.compact()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+
+    # --- Lecture ---
+    @classmethod
+    def load(cls, path: str = SESSION_FILE, compact_events: int = None):
+        """Relit un journal et rejoue ses événements. Seuls les UUID d'un fichier de
+        l'ancien format (entrées complètes) sont repris."""
+        journal = cls(path, compact_events)
+        with open(path, "r", encoding="utf-8") as file:
+            first_line = file.readline()
+            if first_line.strip() in ("[", "{", "[]", "{}"):
+                # Ancien format : JSON indenté de la session complète
+                file.seek(0)
+                data = json.load(file)
+                if isinstance(data, dict):
+                    records = data.get("records", [])
+                    journal.source = data.get("source")
+                else:
+                    records = data
+                journal.uuids = [r.get("UUID") for r in records if r.get("UUID")]
+                return journal
+
+            header = json.loads(first_line)
+            if isinstance(header, list):
+                # Ancienne liste écrite sans indentation
+                journal.uuids = [r.get("UUID") for r in header if r.get("UUID")]
+                return journal
+            if "records" in header:
+                journal.uuids = [
+                    r.get("UUID") for r in header["records"] if r.get("UUID")
+                ]
+                journal.source = header.get("source")
+                return journal
+            journal.uuids = list(header.get("uuids", []))
+            journal.source = header.get("source")
+
+            for line_number, line in enumerate(file, start=2):
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Ligne tronquée par un arrêt brutal : les suivantes n'existent pas
+                    logger.warning(
+                        f"Journal de session {path} : ligne {line_number} illisible ignorée"
+                    )
+                    break
+                journal._replay(event)
+                journal._events += 1
+        return journal
+
+    def _replay(self, event):
+        kind = event[0]
+        if kind in (EVENT_POP, EVENT_SKIP):
+            self._remove(event[1])
+        elif kind == EVENT_REQUEUE:
+            self._remove(event[1])
+            self.uuids.append(event[1])
+        elif kind == EVENT_LOAD:
+            self.uuids.extend(event[1])
+            self.source = event[2]
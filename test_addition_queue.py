@@ -0,0 +1,141 @@
+import json
+import time
+import pytest
+from PySide6.QtCore import Qt
+from addition_queue import (
+    JOB_COMPLETED,
+    JOB_ERROR,
+    JOB_PENDING,
+    JOB_PROCESSING,
+    AdditionQueue,
+    AdditionQueueThread,
+)
+from db import DatabaseManager
+from test_db import write_wav
+
+
+@pytest.fixture
+def db_manager(qapp, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager(str(tmp_path / "test.db"), "fr")
+    yield manager
+    manager.close_connection()
+
+
+def entry(i, media_file=""):
+    return {
+        "file_path": media_file,
+        "question_data": f"Q{i} (?)",
+        "response_data": f"r{i}",
+        "start_time": None,
+        "end_time": None,
+        "attribution": "",
+    }
+
+
+def test_queue_claims_once_and_backs_off(db_manager):
+    queue = AdditionQueue(db_manager)
+    first = queue.enqueue(entry(1))
+    assert queue.enqueue(entry(1)) is None  # double soumission ignorée
+    second = queue.enqueue(entry(2))
+
+    job = queue.claim()
+    assert job["id"] == first and job["attempts"] == 1
+    assert job["attribution"] == "no-attribution"
+    assert queue.status(first) == JOB_PROCESSING
+    assert queue.cancel(first) == JOB_PROCESSING  # en cours : conservé
+
+    assert queue.fail(job, "réseau", max_retries=1, retry_delay=60)
+    assert queue.status(first) == JOB_PENDING
+    assert queue.claim()["id"] == second
+    assert queue.claim() is None  # nouvel essai du premier pas encore dû
+    assert 59 < queue.next_available_in() <= 60
+
+    assert queue.cancel(second) == JOB_PROCESSING
+    assert queue.counts() == {JOB_PENDING: 1, JOB_PROCESSING: 1, JOB_ERROR: 0}
+    assert queue.requeue_interrupted() == 1
+    assert queue.cancel(second) == JOB_PENDING and queue.status(second) is None
+
+
+def test_thread_processes_jobs_with_retries(db_manager, tmp_path, monkeypatch):
+    media_file = write_wav(tmp_path / "silence.wav")
+    queue = AdditionQueue(db_manager)
+    insert_record = db_manager.insert_record
+    failures = {"Q1 (?)": 1, "Q2 (?)": 10}
+
+    def flaky_insert_record(media_file, question, *args, **kwargs):
+        if failures.get(question):
+            failures[question] -= 1
+            raise Exception("échec simulé")
+        return insert_record(media_file, question, *args, **kwargs)
+
+    monkeypatch.setattr(db_manager, "insert_record", flaky_insert_record)
+    results = []
+    thread = AdditionQueueThread(db_manager, workers=3, max_retries=1, retry_delay=0)
+    thread.entry_processed.connect(
+        lambda job, ok, message: results.append((job["question_data"], ok)),
+        Qt.DirectConnection,
+    )
+    thread.start()
+    try:
+        ids = [queue.enqueue(entry(i, media_file)) for i in range(5)]
+        thread.wake()
+        deadline = time.time() + 10
+        while len(results) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        thread.stop()
+        assert thread.wait(5000)
+
+    assert sorted(results) == [
+        ("Q0 (?)", True),
+        ("Q1 (?)", True),
+        ("Q2 (?)", False),
+        ("Q3 (?)", True),
+        ("Q4 (?)", True),
+    ]
+    assert [queue.status(job_id) for job_id in ids] == [
+        JOB_COMPLETED,
+        JOB_COMPLETED,
+        JOB_ERROR,
+        JOB_COMPLETED,
+        JOB_COMPLETED,
+    ]
+    assert len(db_manager.fetch_all_records()) == 4
+    assert queue.retry(ids[2]) and queue.status(ids[2]) == JOB_PENDING
+
+
+def test_stop_reports_threads_still_running(db_manager, monkeypatch):
+    import threading
+    from addition_queue import start_addition_queue, stop_addition_queue
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_insert_record(*args, **kwargs):
+        started.set()
+        release.wait(10)
+        raise Exception("interrompu")
+
+    monkeypatch.setattr(db_manager, "insert_record", slow_insert_record)
+    thread = start_addition_queue(db_manager, workers=1, retry_delay=0)
+    AdditionQueue(db_manager).enqueue(entry(0))
+    thread.wake()
+    assert started.wait(10)
+    # Travail en cours : la base ne doit pas encore être fermée
+    assert not stop_addition_queue(timeout_ms=50)
+    release.set()
+    assert stop_addition_queue()
+
+
+def test_legacy_json_queue_is_imported(db_manager, tmp_path):
+    path = tmp_path / "queue.json"
+    legacy = [
+        dict(entry(1), status="pending", timestamp=1.0),
+        dict(entry(2), status="completed", timestamp=2.0),
+        dict(entry(3), status="error", timestamp=3.0),
+    ]
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+    queue = AdditionQueue(db_manager)
+    assert queue.import_legacy_file(str(path)) == 2
+    assert not path.exists()
+    assert queue.counts() == {JOB_PENDING: 1, JOB_PROCESSING: 0, JOB_ERROR: 1}
@@ -0,0 +1,52 @@
+import json
+import os
+import time
+from autosave import AutosaveWriter
+
+
+def test_changes_are_coalesced_and_written_atomically(qapp, tmp_path):
+    path = str(tmp_path / "brouillon.json")
+    state = {"questions": ""}
+    snapshots = []
+
+    def snapshot():
+        snapshots.append(dict(state))
+        return dict(state)
+
+    writer = AutosaveWriter(path, snapshot, debounce_ms=50)
+    for text in ("B", "Bo", "Bon", "Bonjour (?)"):
+        state["questions"] = text
+        writer.schedule()
+    assert not os.path.exists(path)  # rien d'écrit pendant la saisie
+
+    deadline = time.time() + 5
+    while not snapshots and time.time() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    assert writer.flush()
+    assert snapshots == [{"questions": "Bonjour (?)"}]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"questions": "Bonjour (?)"}
+
+    # Fermeture : l'état en attente est écrit sans attendre le délai
+    state["questions"] = "Salut (?)"
+    writer.schedule()
+    writer.close()
+    assert writer.closed and not writer._thread.is_alive()
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"questions": "Salut (?)"}
+    assert os.listdir(tmp_path) == ["brouillon.json"]  # pas de fichier temporaire
+
+
+def test_discard_cancels_pending_write(qapp, tmp_path):
+    path = str(tmp_path / "brouillon.json")
+    writer = AutosaveWriter(path, lambda: {"questions": "x"}, debounce_ms=0)
+    writer.schedule()
+    writer.flush()
+    assert os.path.exists(path)
+
+    writer.schedule()
+    writer.discard()
+    assert writer.flush()
+    assert not os.path.exists(path)
+    writer.close()
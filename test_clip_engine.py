@@ -0,0 +1,79 @@
+import wave
+from clip_engine import ClipEngine
+
+
+def write_tone(path, seconds=2, rate=8000):
+    # Échantillons distincts d'une seconde à l'autre pour vérifier les découpes
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        for second in range(seconds):
+            f.writeframes(bytes([second + 1, 0]) * rate)
+    return str(path)
+
+
+def duration_ms(path):
+    with wave.open(str(path), "rb") as f:
+        return f.getnframes() * 1000 // f.getframerate()
+
+
+def test_clips_of_one_source_decode_it_once(tmp_path):
+    src = write_tone(tmp_path / "episode.wav")
+    engine = ClipEngine(ffmpeg="")
+    segments = [(0, 500), (1000, 1250), (1500, None)]
+    dest_paths = [str(tmp_path / f"clip{i}.wav") for i in range(len(segments))]
+
+    assert engine.extract(src, segments, dest_paths) == [None] * 3
+    assert engine.decodes == 1
+    assert [duration_ms(p) for p in dest_paths] == [500, 250, 500]
+    with wave.open(dest_paths[1], "rb") as f:
+        assert f.readframes(1) == bytes([2, 0])
+
+    # Source gardée en cache pour les segments suivants
+    engine.extract(src, [(0, 100)], [str(tmp_path / "more.wav")])
+    assert engine.decodes == 1
+
+
+def test_sources_over_memory_budget_are_sliced_not_decoded(tmp_path):
+    src = write_tone(tmp_path / "episode.wav")
+    engine = ClipEngine(memory_budget=1000, ffmpeg="")
+    dest_paths = [str(tmp_path / f"clip{i}.wav") for i in range(2)]
+    for dest_path, segment in zip(dest_paths, [(0, 100), (1500, None)]):
+        assert engine.extract(src, [segment], [dest_path]) == [None]
+    # Seuls les segments sont lus, jamais la source entière
+    assert (engine.decodes, engine.slices) == (0, 2)
+    assert [duration_ms(p) for p in dest_paths] == [100, 500]
+    with wave.open(dest_paths[1], "rb") as f:
+        assert f.readframes(1) == bytes([2, 0])
+
+    errors = engine.extract(
+        str(tmp_path / "absent.wav"), [(0, 100)], [str(tmp_path / "x.wav")]
+    )
+    assert isinstance(errors[0], Exception)
+
+
+def test_video_command_prefers_input_seeking_stream_copy(monkeypatch):
+    engine = ClipEngine(ffmpeg="ffmpeg", ffprobe="ffprobe", video_crf=28)
+    copyable = {"film.mp4": True, "film.webm": False}
+    monkeypatch.setattr(engine, "_copyable", lambda path: copyable[path])
+    monkeypatch.setattr(engine, "_keyframe_before", lambda path, start: 9.8)
+
+    def options(cmd):
+        return cmd[cmd.index("-i") :]
+
+    # Image clé proche du début : copie depuis l'image clé, -ss avant -i
+    cmd = engine.video_command("film.mp4", 10000, 15000, "out.mp4")
+    assert cmd[cmd.index("-ss") + 1] == "9.800" and cmd.index("-ss") < cmd.index("-i")
+    assert cmd[cmd.index("-t") + 1] == "5.200"
+    assert "copy" in options(cmd) and "libx264" not in cmd
+
+    # Image clé trop éloignée ou codecs incompatibles : réencodage, recherche
+    # toujours avant l'entrée
+    for path, start in (("film.mp4", 11000), ("film.webm", 10000)):
+        cmd = engine.video_command(path, start, None, "out.mp4")
+        assert cmd.index("-ss") < cmd.index("-i") and "-t" not in cmd
+        assert cmd[cmd.index("-crf") + 1] == "28" and "copy" not in cmd
+
+    engine.video_mode = "reencode"
+    assert "libx264" in engine.video_command("film.mp4", 10000, None, "out.mp4")
@@ -0,0 +1,656 @@
+import wave
+import pytest
+from db import DatabaseManager, Record, INSERT_OK, INSERT_DUPLICATE, INSERT_FAILED
+
+
+def write_wav(path, frame=b"\x00\x00"):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(frame * 800)
+    return str(path)
+
+
+@pytest.fixture
+def db_manager(qapp, tmp_path, monkeypatch):
+    # Les dossiers audio sont créés relativement au répertoire courant
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager(str(tmp_path / "test.db"), "fr")
+    yield manager
+    manager.close_connection()
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    return write_wav(tmp_path / "silence.wav")
+
+
+def test_insert_records_batch_statuses(db_manager, media_file):
+    rows = [
+        {"media_file": media_file, "question": "Bonjour (?)", "response": "Paris"},
+        {"media_file": media_file, "question": "Bonjour (?)", "response": "Paris"},
+        {"media_file": media_file, "question": "Sans blanc", "response": "Lyon"},
+        {"media_file": media_file, "question": "Salut (?)", "response": "Nice"},
+    ]
+    progress = []
+    statuses = db_manager.insert_records_batch(
+        rows, chunk_size=2, progress_callback=progress.append
+    )
+    assert statuses == [INSERT_OK, INSERT_DUPLICATE, INSERT_FAILED, INSERT_OK]
+    assert progress == [2, 4]  # un appel par lot, après sa validation
+    assert len(db_manager.fetch_all_records()) == 2
+    # Un second import du même lot ne crée aucun doublon
+    statuses = db_manager.insert_records_batch(rows)
+    assert statuses.count(INSERT_OK) == 0
+    assert db_manager.insert_record(media_file, "Salut (?)", "Nice") == INSERT_DUPLICATE
+
+
+def test_insert_records_batch_isolates_conflicting_uuid(db_manager, media_file):
+    db_manager.insert_record(media_file, "Un (?)", "un", UUID="uuid-1")
+    statuses = db_manager.insert_records_batch(
+        [
+            {"media_file": media_file, "question": "Deux (?)", "response": "deux"},
+            {
+                "media_file": media_file,
+                "question": "Trois (?)",
+                "response": "trois",
+                "UUID": "uuid-1",
+            },
+        ]
+    )
+    # UUID déjà pris : échec réel, pas un doublon
+    assert statuses == [INSERT_OK, INSERT_FAILED]
+    assert len(db_manager.fetch_all_records()) == 2
+    assert (
+        db_manager.insert_record(media_file, "Quatre (?)", "quatre", UUID="uuid-1")
+        == INSERT_FAILED
+    )
+
+
+def test_move_records_keeps_entries_the_target_refused(
+    db_manager, media_file, tmp_path
+):
+    db_manager.insert_record(media_file, "Un (?)", "un", UUID="u1")
+    db_manager.insert_record(media_file, "Deux (?)", "deux", UUID="u2")
+    db_manager.insert_record(media_file, "Trois (?)", "trois", UUID="u3")
+    target = DatabaseManager(str(tmp_path / "cible.db"), "fr")
+    try:
+        # UUID déjà pris dans la cible par une autre entrée : u1 ne doit pas être perdu
+        target.insert_record(media_file, "Autre (?)", "autre", UUID="u1")
+        # Même question et réponse déjà présentes dans la cible : u2 y est déjà
+        target.insert_record(media_file, "Deux (?)", "deux", UUID="v2")
+        records = db_manager.fetch_record_by_uuid(["u1", "u2", "u3"])
+        moved, failed = db_manager.move_records(records, target)
+        assert sorted(moved) == ["u2", "u3"]
+        assert failed == ["u1"]
+        assert [r["UUID"] for r in db_manager.fetch_all_records()] == ["u1"]
+        assert target.fetch_record_by_uuid("u3")["question"] == "Trois (?)"
+        assert target.fetch_record_by_uuid("u1")["question"] == "Autre (?)"
+    finally:
+        target.close_connection()
+
+
+def test_secondary_indexes_created(db_manager):
+    assert db_manager.unique_pairs
+    from PySide6.QtSql import QSqlQuery
+
+    query = QSqlQuery(db_manager.db)
+    query.exec_("PRAGMA index_list(records)")
+    names = set()
+    while query.next():
+        names.add(query.value(1))
+    assert {
+        "idx_records_question_response",
+        "idx_records_creation_date",
+        "idx_records_favorite",
+        "idx_records_media_file",
+    } <= names
+
+
+def test_legacy_database_with_duplicates_still_opens(qapp, tmp_path, monkeypatch):
+    import sqlite3
+
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE records (UUID TEXT PRIMARY KEY, media_file TEXT NOT NULL, question TEXT NOT NULL, response TEXT NOT NULL, creation_date TEXT NOT NULL, custom_media INTEGER DEFAULT 0, attribution TEXT NOT NULL DEFAULT 'no-attribution', is_favorite INTEGER DEFAULT 0)"
+    )
+    for uuid in ("a", "b"):
+        conn.execute(
+            "INSERT INTO records (UUID, media_file, question, response, creation_date) VALUES (?, 'x.mp3', 'Q (?)', 'R', '2024-01-01')",
+            (uuid,),
+        )
+    conn.commit()
+    conn.close()
+    manager = DatabaseManager(db_path, "fr")
+    try:
+        assert not manager.unique_pairs
+        assert manager.insert_record("", "Q (?)", "R") == INSERT_DUPLICATE
+    finally:
+        manager.close_connection()
+
+
+def test_migrations_upgrade_legacy_schema(qapp, tmp_path, monkeypatch):
+    import sqlite3
+
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / "ancienne.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE records (UUID TEXT PRIMARY KEY, audio_file TEXT NOT NULL, question TEXT NOT NULL, response TEXT NOT NULL, creation_date TEXT NOT NULL, custom_audio INTEGER DEFAULT 0)"
+    )
+    conn.execute(
+        "INSERT INTO records VALUES ('a', 'x.mp3', 'Q (?)', 'R', '2024-01-01', 1)"
+    )
+    conn.commit()
+    conn.close()
+    manager = DatabaseManager(db_path, "fr")
+    try:
+        assert manager.schema_version() == manager.MIGRATIONS[-1][0]
+        (record,) = manager.fetch_all_records()
+        assert record["media_file"] == "x.mp3"
+        assert record["attribution"] == "no-attribution"
+        assert manager.unique_pairs
+    finally:
+        manager.close_connection()
+    # Réouverture : aucune migration rejouée
+    manager = DatabaseManager(db_path, "fr")
+    try:
+        assert len(manager.fetch_all_records()) == 1
+    finally:
+        manager.close_connection()
+
+
+def test_rebuild_table_resumes_and_keeps_rowids(db_manager, media_file):
+    from PySide6.QtSql import QSqlQuery
+
+    for i in range(5):
+        db_manager.insert_record(media_file, f"Q{i} (?)", f"r{i}", UUID=f"u{i}")
+    create_sql = """
+        CREATE TABLE {table} (
+            UUID TEXT PRIMARY KEY, media_file TEXT NOT NULL, question TEXT NOT NULL,
+            response TEXT NOT NULL, creation_date TEXT NOT NULL,
+            custom_media INTEGER DEFAULT 0,
+            attribution TEXT NOT NULL DEFAULT 'no-attribution',
+            is_favorite INTEGER DEFAULT 0, response_length INTEGER
+        )
+    """
+    columns = [
+        "UUID",
+        "media_file",
+        "question",
+        "response",
+        "creation_date",
+        "custom_media",
+        "attribution",
+        "is_favorite",
+        "response_length",
+    ]
+    select_sql = "SELECT rowid, UUID, media_file, question, response, creation_date, custom_media, attribution, is_favorite, length(response) FROM {table}"
+    # Simule une reconstruction interrompue après la copie des deux premières lignes
+    query = QSqlQuery(db_manager.db)
+    assert query.exec_(create_sql.format(table="records_rebuild"))
+    assert query.exec_(
+        "INSERT INTO records_rebuild (rowid, UUID, media_file, question, response, creation_date) SELECT rowid, UUID, media_file, question, response, creation_date FROM records ORDER BY rowid LIMIT 2"
+    )
+    progress = []
+    db_manager.rebuild_table(
+        "records",
+        create_sql,
+        columns,
+        select_sql,
+        after_swap=db_manager.create_indexes,
+        chunk_size=2,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+    assert progress[-1] == (3, 3)
+    assert query.exec_(
+        "SELECT rowid, UUID, response_length FROM records ORDER BY rowid"
+    )
+    rows = []
+    while query.next():
+        rows.append((query.value(0), query.value(1), query.value(2)))
+    assert [row[1] for row in rows] == [f"u{i}" for i in range(5)]
+    assert [row[0] for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[-1][2] == 2
+    assert db_manager._is_unique_index("idx_records_question_response")
+
+
+def test_database_profile_pragmas(qapp, tmp_path, monkeypatch):
+    from PySide6.QtSql import QSqlQuery
+
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager(
+        str(tmp_path / "rapide.db"),
+        "fr",
+        {"profile": "fast", "synchronous": "full", "cache_size": "-1000", "x": 1},
+    )
+    try:
+        query = QSqlQuery(manager.db)
+        for pragma, expected in (
+            ("journal_mode", "wal"),
+            ("synchronous", 2),
+            ("cache_size", -1000),
+            ("temp_store", 2),
+        ):
+            assert query.exec_(f"PRAGMA {pragma}") and query.next()
+            assert query.value(0) == expected
+    finally:
+        manager.close_connection()
+    assert DatabaseManager.resolve_pragmas({"profile": "inconnu"}) == (
+        DatabaseManager.resolve_pragmas({})
+    )
+
+
+def test_review_profile_is_read_only(qapp, tmp_path, monkeypatch, media_file):
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / "revue.db")
+    manager = DatabaseManager(db_path, "fr")
+    manager.insert_record(media_file, "Bonjour (?)", "Paris", UUID="u1")
+    manager.close_connection()
+    # Les migrations passent avant que la connexion ne devienne lecture seule
+    manager = DatabaseManager(db_path, "fr", {"profile": "review"})
+    try:
+        assert manager.read_only
+        assert [r.UUID for r in manager.fetch_all_records()] == ["u1"]
+        with pytest.raises(Exception):
+            manager._exec_sql("UPDATE records SET is_favorite = 1")
+    finally:
+        manager.close_connection()
+
+
+def test_search_records_full_text(db_manager, media_file):
+    db_manager.insert_record(media_file, "Où est la gare (?)", "Là-bas", UUID="g")
+    db_manager.insert_record(media_file, "Il fait (?)", "beau", UUID="b")
+    db_manager.insert_record(media_file, "Élève (?)", "école", UUID="e")
+    assert db_manager.fts_enabled
+
+    def uuids(text, **kwargs):
+        return {r["UUID"] for r in db_manager.search_records(text, **kwargs)}
+
+    assert uuids("OU GAR") == {"g"}
+    assert uuids("eleve ecol") == {"e"}
+    assert uuids('fait "?') == {"b"}
+    assert uuids("   ") == set()
+    assert len(db_manager.search_records("e", limit=1)) == 1
+    # Les déclencheurs tiennent l'index à jour
+    db_manager.update_record("b", media_file, "Il fait (?)", "chaud", "x")
+    assert uuids("beau") == set()
+    assert uuids("chaud") == {"b"}
+    assert db_manager.delete_record("b")
+    assert uuids("chaud") == set()
+    assert not db_manager.delete_record("b")  # plus rien à supprimer
+
+
+def test_fetch_returns_records_with_dict_view(db_manager, media_file):
+    db_manager.insert_record(media_file, "Bonjour (?)", "Paris", UUID="u1")
+    (record,) = db_manager.fetch_all_records()
+    assert isinstance(record, Record)
+    assert record["UUID"] == record.UUID == record[0] == "u1"
+    assert record.get("attribution") == "no-attribution"
+    assert record.get("absent", "défaut") == "défaut"
+    with pytest.raises(KeyError):
+        record["absent"]
+    assert dict(record) == record.to_dict()
+    assert dict(record)["response"] == "Paris"
+    assert db_manager.fetch_record_by_uuid(["u1"]) == [record]
+
+
+@pytest.mark.parametrize("json_each", [True, False])
+def test_fetch_by_uuid_beyond_parameter_limit(db_manager, media_file, json_each):
+    rows = [
+        {"media_file": media_file, "question": f"Q{i} (?)", "response": f"r{i}"}
+        for i in range(1200)
+    ]
+    db_manager.insert_records_batch(rows)
+    uuids = [record.UUID for record in db_manager.fetch_all_records()]
+    db_manager._json_each = json_each  # False : requêtes IN (...) découpées
+    wanted = uuids[::-1] + ["absent", uuids[5]]
+    records = db_manager.fetch_record_by_uuid(wanted)
+    assert [record.UUID for record in records] == uuids[::-1] + [uuids[5]]
+
+
+def test_fetch_page_and_iter_records(db_manager, media_file):
+    for i in range(7):
+        db_manager.insert_record(
+            media_file,
+            f"Q{i} (?)",
+            f"r{i}",
+            UUID=f"u{i}",
+            creation_date=f"2024-01-0{i + 1}",
+        )
+    db_manager.set_favorite("u2", True)
+    db_manager.set_favorite("u5", True)
+
+    page, next_rowid = db_manager.fetch_page(limit=3)
+    assert [r.UUID for r in page] == ["u0", "u1", "u2"]
+    # La position reste valable après suppression de la dernière entrée lue
+    db_manager.delete_record("u2")
+    page, next_rowid = db_manager.fetch_page(after_rowid=next_rowid, limit=3)
+    assert [r.UUID for r in page] == ["u3", "u4", "u5"]
+    page, next_rowid = db_manager.fetch_page(after_uuid="u5", limit=3)
+    assert [r.UUID for r in page] == ["u6"] and next_rowid is None
+
+    assert [r.UUID for r in db_manager.iter_records(batch_size=2)] == [
+        "u0",
+        "u1",
+        "u3",
+        "u4",
+        "u5",
+        "u6",
+    ]
+    dates = {"start": "2024-01-04", "end": "2024-01-06"}
+    assert [r.UUID for r in db_manager.iter_records(dates, batch_size=1)] == [
+        "u3",
+        "u4",
+        "u5",
+    ]
+    assert db_manager.count_records(dates) == 3
+    assert [r.UUID for r in db_manager.iter_records({"favorite": True})] == ["u5"]
+
+
+def test_each_thread_gets_its_own_connection(db_manager, media_file):
+    import pickle
+    import threading
+    from PySide6.QtCore import QThread
+
+    main_db = db_manager.db
+    seen = {}
+
+    def work(tag):
+        seen[tag] = db_manager.db.connectionName()
+        db_manager.insert_record(media_file, f"{tag} (?)", tag)
+
+    thread = threading.Thread(target=work, args=("thread",))
+    thread.start()
+    thread.join()
+
+    class Worker(QThread):
+        def run(self):
+            work("qthread")
+            db_manager.release_connection()
+
+    worker = Worker()
+    worker.start()
+    worker.wait()
+
+    assert db_manager.db.connectionName() == main_db.connectionName()
+    assert len({main_db.connectionName(), *seen.values()}) == 3
+    assert len(db_manager.fetch_all_records()) == 2
+    # Connexion du QThread rendue ; celle du thread Python terminé est fermée au
+    # prochain nettoyage
+    db_manager._connections.cleanup()
+    assert db_manager._connections.active_connections() == 1
+
+    copy = pickle.loads(pickle.dumps(db_manager))
+    try:
+        assert copy.db.connectionName() != main_db.connectionName()
+        assert len(copy.fetch_all_records()) == 2
+    finally:
+        copy.close_connection()
+
+
+def test_favorite_flag_and_cache(db_manager, media_file):
+    from PySide6.QtSql import QSqlQuery
+
+    db_manager.insert_record(media_file, "Un (?)", "un", UUID="u1")
+    db_manager.insert_record(media_file, "Deux (?)", "deux", UUID="u2")
+    db_manager.set_favorite("u2", True)
+    flags = {r.UUID: r.is_favorite for r in db_manager.fetch_all_records()}
+    assert flags == {"u1": 0, "u2": 1}
+    assert db_manager.is_favorite("u2") and not db_manager.is_favorite("u1")
+    # Une fois chargé, le cache répond sans interroger la base
+    query = QSqlQuery(db_manager.db)
+    assert query.exec_("UPDATE records SET is_favorite = 1 WHERE UUID = 'u1'")
+    assert not db_manager.is_favorite("u1")
+    db_manager.set_favorite("u1", True)
+    db_manager.set_favorite("u2", False)
+    assert db_manager.favorite_uuids() == {"u1"}
+    db_manager.delete_record("u1")
+    assert db_manager.favorite_uuids() == set()
+    # Un UUID inexistant n'entre pas dans le cache
+    db_manager.set_favorites(["u2", "absent"], True)
+    assert db_manager.favorite_uuids() == {"u2"}
+    assert not db_manager.is_favorite("absent")
+
+
+def test_bulk_delete_favorite_and_update(db_manager, tmp_path):
+    import os
+
+    for i in range(4):
+        source = write_wav(tmp_path / f"media{i}.wav", bytes([i, 0]))
+        db_manager.insert_record(source, f"Q{i} (?)", f"r{i}", UUID=f"u{i}")
+    media = {r.UUID: r.media_file for r in db_manager.fetch_all_records()}
+    assert all(os.path.exists(path) for path in media.values())
+
+    assert db_manager.set_favorites(["u0", "u1", "absent"], True) == 2
+    assert db_manager.favorite_uuids() == {"u0", "u1"}
+
+    results = db_manager.update_records(
+        [
+            {
+                "UUID": "u2",
+                "media_file": media["u2"],
+                "question": "Q2 modifiée (?)",
+                "response": "r2",
+            },
+            {"UUID": "absent", "media_file": "", "question": "x (?)", "response": "y"},
+        ]
+    )
+    assert results[0].question == "Q2 modifiée (?)" and results[1] is None
+
+    assert db_manager.delete_records(["u0", "u3", "absent"]) == {"u0", "u3"}
+    assert {r.UUID for r in db_manager.fetch_all_records()} == {"u1", "u2"}
+    assert db_manager.favorite_uuids() == {"u1"}
+    # Les médias propres aux entrées supprimées sont effacés, pas les autres
+    assert not os.path.exists(media["u0"]) and not os.path.exists(media["u3"])
+    assert os.path.exists(media["u1"]) and os.path.exists(media["u2"])
+
+
+def test_media_store_deduplicates_and_counts_references(db_manager, tmp_path):
+    import os
+
+    source = write_wav(tmp_path / "source.wav", b"\x01\x00")
+    copy = write_wav(tmp_path / "copie.wav", b"\x01\x00")
+    db_manager.insert_record(source, "Un (?)", "un", UUID="u1")
+    db_manager.insert_record(copy, "Deux (?)", "deux", UUID="u2")
+    paths = {r.media_file for r in db_manager.fetch_all_records()}
+    assert len(paths) == 1
+    (stored,) = paths
+    assert os.path.samefile(stored, source)  # lien physique, pas de copie
+    assert db_manager._scalar("SELECT refcount FROM media") == 2
+
+    db_manager.delete_records(["u1"])
+    assert os.path.exists(stored)
+    assert db_manager._scalar("SELECT refcount FROM media") == 1
+    db_manager.delete_records(["u2"])
+    assert not os.path.exists(stored)
+    assert db_manager._scalar("SELECT COUNT(*) FROM media") == 0
+
+
+def test_media_store_concurrent_writers_share_one_hash(db_manager, tmp_path):
+    import os
+    import threading
+
+    source = write_wav(tmp_path / "partage.wav", b"\x02\x00")
+    store = db_manager.media_store
+
+    # Média ajouté mais pas encore référencé : épinglé, le ramasse-miettes d'un
+    # autre thread ne l'efface pas
+    media_hash, stored = store.add_file(source)
+    collector = threading.Thread(target=store.collect_garbage, args=([media_hash],))
+    collector.start()
+    collector.join()
+    assert os.path.exists(stored)
+    store.release([media_hash])
+    assert not os.path.exists(stored)
+
+    # Deux écrivains : l'un ajoute puis supprime des entrées (ramasse-miettes à
+    # chaque suppression), l'autre ajoute des entrées qu'il garde
+    errors = []
+
+    def churn():
+        try:
+            for i in range(30):
+                db_manager.insert_record(source, f"Éphémère {i} (?)", "x", UUID=f"e{i}")
+                db_manager.delete_records([f"e{i}"])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db_manager.release_connection()
+
+    def keep():
+        try:
+            for i in range(30):
+                db_manager.insert_record(source, f"Gardée {i} (?)", "x", UUID=f"k{i}")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db_manager.release_connection()
+
+    writers = [threading.Thread(target=churn), threading.Thread(target=keep)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert errors == []
+    records = db_manager.fetch_all_records()
+    assert {r.UUID for r in records} == {f"k{i}" for i in range(30)}
+    assert all(os.path.exists(r.media_file) for r in records)
+    assert db_manager._scalar("SELECT refcount FROM media") == 30
+    assert db_manager._scalar("SELECT pins FROM media") == 0
+
+
+def test_media_store_migration_merges_identical_files(qapp, tmp_path, monkeypatch):
+    import os
+    import sqlite3
+
+    monkeypatch.chdir(tmp_path)
+    audio_dir = tmp_path / "assets" / "audio" / "ancienne-audio"
+    audio_dir.mkdir(parents=True)
+    first = write_wav(audio_dir / "bonjour.mp3", b"\x02\x00")
+    second = write_wav(audio_dir / "bonjour_bis.mp3", b"\x02\x00")
+    db_path = str(tmp_path / "ancienne.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE records (UUID TEXT PRIMARY KEY, media_file TEXT NOT NULL, question TEXT NOT NULL, response TEXT NOT NULL, creation_date TEXT NOT NULL, custom_media INTEGER DEFAULT 0)"
+    )
+    conn.executemany(
+        "INSERT INTO records VALUES (?, ?, ?, ?, '2024-01-01', 1)",
+        [
+            ("a", os.path.relpath(first), "A (?)", "a"),
+            ("b", os.path.relpath(second), "B (?)", "b"),
+            ("c", "absent.mp3", "C (?)", "c"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    manager = DatabaseManager(db_path, "fr")
+    try:
+        media = {r.UUID: r.media_file for r in manager.fetch_all_records()}
+        assert media["a"] == media["b"] and media["c"] == "absent.mp3"
+        assert len(os.listdir(audio_dir)) == 1
+        assert manager._scalar("SELECT refcount FROM media") == 2
+    finally:
+        manager.close_connection()
+
+
+def test_deferred_tts_backfill(db_manager, tmp_path):
+    from PySide6.QtCore import Qt
+    from db import MEDIA_READY, MEDIA_FAILED
+    from tts_backfill import TtsBackfillThread
+    from tts_backends import TTSBackend
+    from tts_cache import TtsCache
+
+    statuses = db_manager.insert_records_batch(
+        [
+            {"media_file": "", "question": "(?)", "response": "un"},
+            {"media_file": "", "question": "(?)", "response": "deux"},
+            {"media_file": "", "question": "Encore (?)", "response": "deux"},
+            {"media_file": "", "question": "(?)", "response": "erreur"},
+        ],
+        defer_tts=True,
+    )
+    assert statuses == [INSERT_OK] * 4
+    assert db_manager.count_pending_media() == 4
+
+    calls = []
+
+    class Backend(TTSBackend):
+        name = "test"
+
+        def synthesize(self, text, language_code, path):
+            calls.append(text)
+            if text == "erreur":
+                raise Exception("service indisponible")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+    thread = TtsBackfillThread(
+        db_manager,
+        max_retries=1,
+        retry_delay=0,
+        backend=Backend(),
+        cache=TtsCache(tmp_path / "tts"),
+    )
+    progress = []
+    thread.progress.connect(
+        lambda done, total: progress.append(done), Qt.DirectConnection
+    )
+    thread.start()
+    assert thread.wait(10000)
+
+    assert calls.count("erreur") == 2  # un nouvel essai
+    assert calls.count("deux") == 1  # second « deux » pris dans le cache
+    assert progress[-1] == 4
+    assert db_manager.count_pending_media() == 0
+    for record in db_manager.fetch_all_records():
+        status = db_manager._scalar(
+            "SELECT media_status FROM records WHERE UUID = ?", [record.UUID]
+        )
+        if record.response == "erreur":
+            assert status == MEDIA_FAILED and record.media_file == ""
+        else:
+            assert status == MEDIA_READY
+            with open(record.media_file, encoding="utf-8") as f:
+                assert f.read() == db_manager.tts_text(record.question, record.response)
+    assert db_manager.requeue_failed_media() == 1
+
+
+def test_tts_backfill_stops_during_retry_delay(db_manager, tmp_path):
+    import threading
+    from db import MEDIA_PENDING
+    from tts_backfill import TtsBackfillThread
+    from tts_backends import TTSBackend
+    from tts_cache import TtsCache
+
+    db_manager.insert_records_batch(
+        [{"media_file": "", "question": "(?)", "response": "un"}], defer_tts=True
+    )
+    attempted = threading.Event()
+
+    class Backend(TTSBackend):
+        name = "test"
+
+        def synthesize(self, text, language_code, path):
+            attempted.set()
+            raise Exception("service indisponible")
+
+    thread = TtsBackfillThread(
+        db_manager,
+        max_retries=3,
+        retry_delay=60,
+        backend=Backend(),
+        cache=TtsCache(tmp_path / "tts"),
+    )
+    thread.start()
+    assert attempted.wait(10)
+    # L'attente avant le nouvel essai est interrompue par stop()
+    thread.stop()
+    assert thread.wait(5000)
+    # Interrompue, pas en échec : reprise au prochain démarrage
+    status = db_manager._scalar("SELECT media_status FROM records")
+    assert status == MEDIA_PENDING
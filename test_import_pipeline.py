@@ -0,0 +1,225 @@
+import csv
+import json
+import os
+import pytest
+from PySide6.QtCore import Qt
+from db import DatabaseManager
+import import_pipeline
+from import_pipeline import ImportCheckpoint, ImportPipeline
+from test_db import write_wav
+
+
+@pytest.fixture
+def db_manager(qapp, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager(str(tmp_path / "test.db"), "fr")
+    yield manager
+    manager.close_connection()
+
+
+def write_csv(path, fieldnames, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def run_pipeline(pipeline):
+    summaries = []
+    progress = []
+    pipeline.import_finished.connect(summaries.append, Qt.DirectConnection)
+    pipeline.progress.connect(
+        lambda done, total: progress.append((done, total)), Qt.DirectConnection
+    )
+    pipeline.start()
+    assert pipeline.wait(20000)
+    return summaries[0], progress
+
+
+def test_pipeline_imports_streamed_rows(db_manager, tmp_path):
+    (tmp_path / "audio").mkdir()
+    write_wav(tmp_path / "audio" / "bonjour.wav")
+    fields = ["media_path", "question", "response", "UUID"]
+    first = write_csv(
+        tmp_path / "a.csv",
+        fields,
+        [
+            {"media_path": "bonjour.wav", "question": "Bonjour (?)", "response": "x"},
+            {"media_path": "", "question": "Salut (?)", "response": "Nice"},
+            {"media_path": "", "question": "Salut (?)", "response": "Nice"},
+            {"media_path": "", "question": "Vide (?)", "response": ""},
+        ],
+    )
+    second = write_csv(
+        tmp_path / "b.csv", ["question"], [{"question": "Sans média (?)"}]
+    )
+
+    pipeline = ImportPipeline(
+        db_manager,
+        [first, second],
+        audio_base_dirs={first: str(tmp_path / "audio")},
+        batch_size=2,
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+    )
+    summary, progress = run_pipeline(pipeline)
+
+    assert summary["files"] == 2 and not summary["cancelled"]
+    assert (summary["imported"], summary["failed"]) == (2, 2)
+    assert summary["pending_audio"] == 1
+    assert summary["found_uuid"] and not summary["found_creation_date"]
+    assert [entry["question"] for entry in summary["missing_responses"]] == ["Vide (?)"]
+    assert [path for path, _ in summary["file_errors"]] == [second]
+    # Progression en Kio lus (Kio entamé compté) : tout est lu
+    assert progress[-1] == (1, 1)
+    assert db_manager.count_pending_media() == 1
+    records = {r.question: r for r in db_manager.fetch_all_records()}
+    assert set(records) == {"Bonjour (?)", "Salut (?)"}
+    assert records["Bonjour (?)"].custom_media == 1
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_pipeline_cancelled_before_start(db_manager, tmp_path):
+    path = write_csv(
+        tmp_path / "a.csv",
+        ["media_path", "question", "response"],
+        [{"media_path": "", "question": "Salut (?)", "response": "Nice"}],
+    )
+    pipeline = ImportPipeline(
+        db_manager, [path], checkpoint_path=str(tmp_path / "checkpoint.json")
+    )
+    pipeline.cancel()
+    summary, _ = run_pipeline(pipeline)
+    assert summary["cancelled"] and summary["imported"] == 0
+    assert db_manager.fetch_all_records() == []
+
+
+def test_checkpoint_ignores_missing_entries_past_the_saved_offset(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = ImportCheckpoint("base.db", path)
+    checkpoint.files["a.csv"] = ImportCheckpoint.new_file_state("h")
+    checkpoint.add_missing("a.csv", 10, {"question": "Q1 (?)"})
+    checkpoint.files["a.csv"]["offset"] = 10
+    checkpoint.save()
+    # Plantage entre l'ajout au journal et l'écriture de la position
+    checkpoint.add_missing("a.csv", 20, {"question": "Q2 (?)"})
+    checkpoint._unsaved_missing, unsaved = [], checkpoint._unsaved_missing
+    with open(checkpoint.missing_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(unsaved[0]) + "\n")
+
+    loaded = ImportCheckpoint.load("base.db", path)
+    assert loaded.missing_responses == {"a.csv": [{"question": "Q1 (?)"}]}
+    # Un nouveau point de reprise repart d'un journal vide
+    ImportCheckpoint("base.db", path).save()
+    assert ImportCheckpoint.load("base.db", path).missing_responses == {}
+
+
+def test_pipeline_resumes_from_checkpoint(db_manager, tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    rows = [
+        {"media_path": "", "question": f"Q{i} (?)", "response": f"r{i}"}
+        for i in range(7)
+    ]
+    rows[1]["response"] = ""  # à compléter manuellement
+    rows[2]["question"] = 'Sur "deux"\nlignes (?)'
+    path = write_csv(tmp_path / "a.csv", ["media_path", "question", "response"], rows)
+
+    # Plantage simulé pendant l'écriture du deuxième lot
+    write_batch = ImportPipeline._write_batch
+    calls = []
+
+    def crashing_write_batch(self, batch):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise Exception("plantage")
+        write_batch(self, batch)
+
+    monkeypatch.setattr(ImportPipeline, "_write_batch", crashing_write_batch)
+    pipeline = ImportPipeline(
+        db_manager, [path], batch_size=3, checkpoint_path=checkpoint_path
+    )
+    summary, _ = run_pipeline(pipeline)
+    assert summary["cancelled"]
+    checkpoint = ImportCheckpoint.load(db_manager.db_path, checkpoint_path)
+    assert checkpoint.csv_paths == [path] and checkpoint.rows_done() == 3
+    assert len(db_manager.fetch_all_records()) == 2
+    # Les entrées à compléter sont dans le journal séparé, pas dans le JSON
+    assert "missing_responses" not in checkpoint.files[path]
+    assert [e["question"] for e in checkpoint.missing_responses[path]] == ["Q1 (?)"]
+
+    monkeypatch.setattr(ImportPipeline, "_write_batch", write_batch)
+    # Progression en octets : la reprise part de la position enregistrée
+    monkeypatch.setattr(import_pipeline, "PROGRESS_UNIT", 1)
+    offset = checkpoint.files[path]["offset"]
+    size = os.path.getsize(path)
+    pipeline = ImportPipeline(
+        db_manager, [path], resume=True, checkpoint_path=checkpoint_path
+    )
+    summary, progress = run_pipeline(pipeline)
+    assert not summary["cancelled"] and summary["resumed_rows"] == 3
+    # Aucune ligne revue : pas de doublon compté en échec
+    assert (summary["imported"], summary["failed"]) == (6, 1)
+    assert [entry["question"] for entry in summary["missing_responses"]] == ["Q1 (?)"]
+    assert (offset, size) in progress and progress[-1] == (size, size)
+    assert len(db_manager.fetch_all_records()) == 6
+    assert ImportCheckpoint.load(db_manager.db_path, checkpoint_path) is None
+    assert not os.path.exists(checkpoint_path + ".missing")
+
+
+def test_clips_of_a_source_stay_on_one_process(db_manager, tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from clip_engine import CLIP_CACHE_BYTES
+
+    executors = []
+
+    class Executor:
+        # Remplace un processus : note les sources reçues, sans rien découper
+        def __init__(self, max_workers, initializer, initargs):
+            self.budget = initargs[0]["memory_budget"]
+            self.sources = []
+            executors.append(self)
+
+        def submit(self, function, src_path, work_dir, segments):
+            self.sources.append(src_path)
+            future = Future()
+            future.set_result([Exception("non découpé")] * len(segments))
+            return future
+
+        def shutdown(self, wait, cancel_futures):
+            pass
+
+    monkeypatch.setattr(import_pipeline, "ProcessPoolExecutor", Executor)
+    monkeypatch.setattr(import_pipeline, "CLIP_GROUP_SIZE", 2)
+    rows = [
+        {
+            "media_path": f"{name}.wav",
+            "question": f"{name} {i} (?)",
+            "response": "x",
+            "start_time": f"00:00:0{i}",
+            "end_time": f"00:00:0{i + 1}",
+        }
+        for i in range(5)
+        for name in ("a", "b", "c")
+    ]
+    for name in ("a", "b", "c"):
+        write_wav(tmp_path / f"{name}.wav")
+    path = write_csv(tmp_path / "clips.csv", list(rows[0]), rows)
+    pipeline = ImportPipeline(
+        db_manager,
+        [path],
+        audio_base_dirs={path: str(tmp_path)},
+        media_workers=2,
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+    )
+    summary, _ = run_pipeline(pipeline)
+
+    assert summary["failed"] == 15
+    assert len(executors) == 2
+    assert all(e.budget == CLIP_CACHE_BYTES // 2 for e in executors)
+    # Plusieurs groupes par source, tous confiés au même processus
+    owners = {}
+    for executor in executors:
+        for source in executor.sources:
+            owners.setdefault(source, set()).add(id(executor))
+    assert len(owners) == 3 and all(len(ids) == 1 for ids in owners.values())
+    assert sum(len(e.sources) for e in executors) > 3
@@ -0,0 +1,81 @@
+import os
+import pytest
+from PySide6.QtCore import Qt
+from clip_engine import ClipEngine, configure_clip_engine
+from db import DatabaseManager
+from media_compaction import MediaCompactionThread
+from test_db import write_wav
+
+
+@pytest.fixture
+def db_manager(qapp, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager(str(tmp_path / "test.db"), "fr")
+    yield manager
+    manager.close_connection()
+    configure_clip_engine()
+
+
+@pytest.fixture
+def fake_compact(monkeypatch):
+    # Conversion factice (pas de ffmpeg ici) : sortie courte et déterministe
+    converted = []
+
+    def compact(self, src_path, dest_path):
+        with open(src_path, "rb") as f:
+            data = f.read()
+        with open(dest_path, "wb") as f:
+            f.write(b"OggS" + data[-16:])
+        converted.append(src_path)
+
+    monkeypatch.setattr(ClipEngine, "compact", compact)
+    return converted
+
+
+def run_compaction(db_manager):
+    summaries = []
+    thread = MediaCompactionThread(db_manager)
+    thread.compaction_finished.connect(summaries.append, Qt.DirectConnection)
+    thread.start()
+    assert thread.wait(20000)
+    return summaries[0]
+
+
+def test_compaction_replaces_stored_media(db_manager, tmp_path, fake_compact):
+    source = write_wav(tmp_path / "source.wav", b"\x01\x00")
+    db_manager.insert_record(source, "Un (?)", "un", UUID="u1")
+    db_manager.insert_record(source, "Deux (?)", "deux", UUID="u2")
+    (original,) = {r.media_file for r in db_manager.fetch_all_records()}
+    size = os.path.getsize(original)
+
+    # Profil d'origine : rien à convertir
+    assert db_manager.media_store.compaction_candidates() == []
+
+    configure_clip_engine({"storage_profile": "compact"})
+    summary = run_compaction(db_manager)
+    assert (summary["converted"], summary["skipped"], summary["failed"]) == (1, 0, 0)
+    assert summary["bytes_before"] == size
+    assert summary["bytes_saved"] == size - 20
+
+    paths = {r.media_file for r in db_manager.fetch_all_records()}
+    (compacted,) = paths
+    assert compacted.endswith(".ogg") and os.path.getsize(compacted) == 20
+    assert os.path.exists(source) and not os.path.exists(original)
+    assert db_manager._scalar("SELECT COUNT(*) FROM media") == 1
+    assert db_manager._scalar("SELECT refcount FROM media") == 2
+    assert db_manager.media_store.compaction_candidates() == []
+
+
+def test_compact_profile_converts_new_media(db_manager, tmp_path, fake_compact):
+    configure_clip_engine({"storage_profile": "compact"})
+    first = write_wav(tmp_path / "a.wav", b"\x02\x00")
+    second = write_wav(tmp_path / "b.wav", b"\x02\x00")
+    db_manager.insert_record(first, "Un (?)", "un", UUID="u1")
+    db_manager.insert_record(second, "Deux (?)", "deux", UUID="u2")
+
+    # Même contenu, même conversion : un seul fichier stocké
+    paths = {r.media_file for r in db_manager.fetch_all_records()}
+    assert len(paths) == 1 and paths.pop().endswith(".ogg")
+    assert fake_compact == [first, second]
+    assert os.path.exists(first) and os.path.exists(second)
+    assert os.listdir(db_manager.media_store.staging_dir()) == []
@@ -0,0 +1,33 @@
+import pytest
+from db import DatabaseManager
+from record_cache import RecordCache
+from test_db import write_wav
+
+
+@pytest.fixture
+def db_manager(qapp, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager(str(tmp_path / "test.db"), "fr")
+    yield manager
+    manager.close_connection()
+
+
+def test_records_are_rehydrated_in_chunks(db_manager, tmp_path):
+    media_file = write_wav(tmp_path / "silence.wav")
+    uuids = [f"uuid-{i}" for i in range(10)]
+    for i, uuid in enumerate(uuids):
+        db_manager.insert_record(media_file, f"Q{i} (?)", f"r{i}", UUID=uuid)
+    db_manager.delete_records(["uuid-3"])
+
+    cache = RecordCache(db_manager, capacity=4, chunk_size=4)
+    assert cache.get(uuids)["question"] == "Q0 (?)"
+    assert cache.fetches == 1 and len(cache) == 3  # uuid-3 supprimée
+    assert cache.get(uuids, 2)["response"] == "r2"
+    assert cache.get(uuids, 3) is None
+    assert cache.fetches == 2
+
+    # Le cache reste borné : les entrées les moins récentes sont évincées
+    assert cache.get(uuids, 4)["question"] == "Q4 (?)" and cache.fetches == 2
+    assert len(cache) == 4 and "uuid-0" not in cache and "uuid-6" in cache
+    cache.invalidate()
+    assert cache.get(uuids, 9)["UUID"] == "uuid-9" and cache.fetches == 3
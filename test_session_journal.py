@@ -0,0 +1,49 @@
+import json
+from session_journal import SessionJournal
+
+
+def test_events_are_replayed_and_compacted(tmp_path):
+    path = str(tmp_path / "session.json")
+    journal = SessionJournal(path, compact_events=100)
+    journal.start(["a", "b", "c"], {"filter": None, "after_rowid": 3, "pending": 2})
+    size = (tmp_path / "session.json").stat().st_size
+
+    journal.requeue("a")
+    journal.pop("b")
+    journal.extend(["d", "e"], None)
+    journal.pop("c", skipped=True)
+    # Quelques octets par carte, pas de réécriture de la session
+    assert (tmp_path / "session.json").stat().st_size - size < 150
+
+    loaded = SessionJournal.load(path)
+    assert loaded.uuids == ["a", "d", "e"] and loaded.source is None
+
+    loaded.close()
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"version": 1, "uuids": ["a", "d", "e"]}
+
+    journal = SessionJournal(path, compact_events=2)
+    journal.start(["a", "b", "c"])
+    journal.pop("a")
+    journal.pop("b")  # seuil atteint : en-tête réécrit
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["uuids"] == ["c"]
+    journal.clear()
+    assert not (tmp_path / "session.json").exists()
+
+
+def test_torn_last_line_and_legacy_file(tmp_path):
+    path = tmp_path / "session.json"
+    journal = SessionJournal(str(path))
+    journal.start(["a", "b", "c"])
+    journal.pop("a")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('\n["p", "b"]\n["r", "c')  # arrêt pendant l'écriture
+    loaded = SessionJournal.load(str(path))
+    assert loaded.uuids == ["c"]
+
+    legacy = {"records": [{"UUID": "x"}, {"UUID": "y"}], "source": {"pending": 4}}
+    path.write_text(json.dumps(legacy, indent=4), encoding="utf-8")
+    loaded = SessionJournal.load(str(path))
+    assert loaded.uuids == ["x", "y"] and loaded.source == {"pending": 4}
@@ -0,0 +1,69 @@
+import wave
+from tts_backends import FakeBackend, TTSBackend
+from tts_cache import TtsCache
+
+
+class CountingBackend(TTSBackend):
+    name = "test"
+
+    def __init__(self, size=10):
+        super().__init__()
+        self.calls = []
+        self.size = size
+
+    def synthesize(self, text, language_code, path):
+        self.calls.append(text)
+        with open(path, "wb") as f:
+            f.write(text.encode("utf-8").ljust(self.size, b"."))
+
+
+def test_cache_reused_across_sessions(tmp_path):
+    backend = CountingBackend()
+    cache = TtsCache(tmp_path)
+    first = cache.synthesize("Oui  oui", "fr", backend)
+    assert cache.synthesize("Oui oui ", "fr", backend) == first
+    cache.synthesize("Oui oui", "en", backend)
+    assert len(backend.calls) == 2
+    assert cache.stats()["hits"] == 1
+    cache.flush()
+
+    # Nouvelle session : même clé, aucun nouvel appel à la synthèse
+    cache = TtsCache(tmp_path)
+    assert cache.synthesize("Oui oui", "fr", backend) == first
+    assert len(backend.calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["total_hits"]) == (1, 0, 2)
+    assert stats["entries"] == 2 and stats["bytes"] == 20
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    backend = CountingBackend()
+    cache = TtsCache(tmp_path, max_bytes=25)
+    a = cache.synthesize("a", "fr", backend)
+    b = cache.synthesize("b", "fr", backend)
+    cache.synthesize("a", "fr", backend)  # « a » redevient récent
+    cache.synthesize("c", "fr", backend)
+    voice = backend.voice_id
+    assert cache.get(cache.key("fr", "b", voice)) is None
+    assert cache.get(cache.key("fr", "a", voice)) == a
+    assert cache.stats()["bytes"] == 20
+    assert not (tmp_path / b.split("/")[-1]).exists()
+
+
+def test_fake_backend_is_deterministic(tmp_path):
+    backend = FakeBackend(workers=2)
+    texts = ["Bonjour", "Bonjour", "Au revoir, à demain"]
+    paths = [str(tmp_path / f"{i}.wav") for i in range(len(texts))]
+    assert backend.synthesize_many(texts, "fr", paths) == [None] * 3
+
+    contents = [open(path, "rb").read() for path in paths]
+    assert contents[0] == contents[1] != contents[2]
+    with wave.open(paths[2], "rb") as f:
+        duration_ms = f.getnframes() * 1000 // f.getframerate()
+    assert duration_ms == len(texts[2]) * FakeBackend.MS_PER_CHARACTER
+
+    # Cache : la voix du moteur fait partie de la clé
+    cache = TtsCache(tmp_path / "cache")
+    path = cache.synthesize("Bonjour", "fr", backend)
+    assert path.endswith(".wav") and open(path, "rb").read() == contents[0]
+    assert cache.key("fr", "Bonjour", backend.voice_id) != cache.key("fr", "Bonjour")
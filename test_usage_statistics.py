@@ -0,0 +1,83 @@
+import datetime
+import json
+import pytest
+from db import DatabaseManager
+from test_db import write_wav
+from usage_statistics import (
+    MODE_RETRIEVAL,
+    MODE_REVIEW,
+    ReviewEventWriter,
+    ReviewStats,
+)
+
+
+@pytest.fixture
+def db_manager(qapp, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager(str(tmp_path / "test.db"), "fr")
+    yield manager
+    manager.close_connection()
+
+
+def event(uuid, day, mode=MODE_RETRIEVAL, correct=None, total=None, latency=None):
+    return (uuid, 0.0, day, mode, correct, total, latency)
+
+
+def test_writer_batches_events_into_daily_rollup(db_manager, tmp_path):
+    media_file = write_wav(tmp_path / "silence.wav")
+    db_manager.insert_record(media_file, "Difficile (?)", "d", UUID="u1")
+    db_manager.insert_record(media_file, "Facile (?)", "f", UUID="u2")
+
+    writer = ReviewEventWriter(db_manager, flush_interval=60)
+    writer.record("u1", MODE_RETRIEVAL, 0, 2, 3000)
+    writer.record("u1", MODE_RETRIEVAL, 1, 2, 1000)
+    writer.record("u2", MODE_RETRIEVAL, 1, 1)
+    writer.record("u2", MODE_REVIEW)
+    assert writer.flush()
+    writer.close()
+
+    stats = ReviewStats(db_manager)
+    assert stats.totals() == {MODE_RETRIEVAL: (3, 2, 5), MODE_REVIEW: (1, 0, 0)}
+    today = datetime.date.today().isoformat()
+    assert stats.daily() == [(today, 4, 2, 5, 2000)]
+    assert stats.streaks() == (1, 1)
+    ((uuid, question, attempts, error_rate),) = stats.hardest_records()
+    assert (uuid, question, attempts) == ("u1", "Difficile (?)", 2)
+    assert error_rate == pytest.approx(0.75)
+
+
+def test_rollup_streaks_and_legacy_import(db_manager, tmp_path):
+    stats = ReviewStats(db_manager)
+    stats.record_events(
+        [
+            event("u1", "2026-03-01", correct=1, total=1),
+            event("u1", "2026-03-02", correct=0, total=1),
+            event("u1", "2026-03-03", correct=1, total=1),
+            event("u1", "2026-03-05", correct=1, total=1),
+        ]
+    )
+    assert stats.streaks(datetime.date(2026, 3, 6)) == (1, 3)
+    assert stats.streaks(datetime.date(2026, 3, 9)) == (0, 3)
+    # Le cumul journalier suit aussi les suppressions d'événements
+    db_manager._exec_sql("DELETE FROM review_events WHERE day = '2026-03-02'")
+    assert [day for day, *_ in stats.daily()] == [
+        "2026-03-05",
+        "2026-03-03",
+        "2026-03-01",
+    ]
+    assert stats.totals()[MODE_RETRIEVAL] == (3, 3, 3)
+
+    path = tmp_path / "usage_stats.json"
+    legacy = {
+        "retrieval_count": 10,
+        "review_count": 4,
+        "correct_count": 7,
+        "answered_count": 12,
+        "dates": ["2026-02-27", "2026-02-28"],
+    }
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+    assert stats.import_legacy_file(str(path))
+    assert not path.exists()
+    assert stats.totals() == {MODE_RETRIEVAL: (13, 10, 15), MODE_REVIEW: (4, 0, 0)}
+    assert stats.active_days()[:2] == ["2026-02-27", "2026-02-28"]
+    assert len(stats.daily()) == 3  # les anciens compteurs n'ont pas de détail par jour
@@ -0,0 +1,247 @@
+"""Moteurs de synthèse vocale (TTS), choisis dans la section [tts] de config.toml :
+
+    [tts]
+    backend = "gtts"  # "gtts", "espeak-ng" (hors ligne) ou "fake" (tests, mesures)
+
+Chaque moteur écrit un fichier audio par texte ; `synthesize_many` traite un lot
+et permet au moteur de mener plusieurs requêtes de front. Les autres clés de la
+section sont passées au moteur (voice, workers, requests_per_second, command...) ;
+les clés inconnues sont ignorées.
+"""
+
+import hashlib
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from logger import logger
+
+DEFAULT_TTS_BACKEND = "gtts"
+
+
+class RateLimiter:
+    """Espace les appels d'au moins 1/rate seconde, tous threads confondus."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class TTSBackend:
+    """Interface d'un moteur TTS."""
+
+    name = ""
+    extension = ".mp3"  # format des fichiers écrits
+
+    def __init__(self, voice: str = "", workers: int = 1, **options):
+        self.voice = voice
+        self.workers = max(1, int(workers))
+
+    @property
+    def voice_id(self) -> str:
+        """Identifie la voix dans la clé du cache TTS : deux moteurs ou voix
+        différents ne partagent pas leurs audios."""
+        return f"{self.name}:{self.voice}"
+
+    def synthesize(self, text: str, language_code: str, path: str):
+        """Écrit l'audio de `text` dans `path` ; lève une exception en cas d'échec."""
+        raise NotImplementedError
+
+    def synthesize_many(self, texts: list, language_code: str, paths: list) -> list:
+        """Synthétise un lot ; renvoie, pour chaque texte, None ou l'exception levée.
+        Les textes sont traités par `workers` requêtes simultanées."""
+
+        def run(text, path):
+            try:
+                self.synthesize(text, language_code, path)
+                return None
+            except Exception as e:
+                return e
+
+        if self.workers == 1 or len(texts) <= 1:
+            return [run(text, path) for text, path in zip(texts, paths)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(run, texts, paths))
+
+
+class GttsBackend(TTSBackend):
+    """Google Translate TTS (réseau). `voice` est le domaine régional (tld) de
+    l'accent, « com » par défaut."""
+
+    name = "gtts"
+    extension = ".mp3"
+
+    def __init__(
+        self,
+        voice: str = "",
+        workers: int = 4,
+        requests_per_second: float = 4.0,
+        **options,
+    ):
+        super().__init__(voice, workers)
+        # Le service limite les rafales : débit plafonné, tous threads confondus
+        self._limiter = RateLimiter(requests_per_second)
+
+    @property
+    def voice_id(self) -> str:
+        # Voix par défaut : mêmes clés de cache qu'avant l'introduction des moteurs
+        return f"{self.name}:{self.voice}" if self.voice else ""
+
+    def synthesize(self, text: str, language_code: str, path: str):
+        from gtts import gTTS
+
+        self._limiter.wait()
+        gTTS(text=text, lang=language_code, tld=self.voice or "com").save(path)
+
+
+class EspeakBackend(TTSBackend):
+    """Moteur local espeak-ng (ou espeak), appelé en sous-processus. `voice` est une
+    voix espeak (p. ex. « fr+f3 ») ; par défaut, la langue de la base."""
+
+    name = "espeak-ng"
+    extension = ".wav"
+
+    def __init__(self, voice: str = "", workers: int = 4, command: str = "", **options):
+        super().__init__(voice, workers)
+        self.command = command or shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def _args(self, text: str, language_code: str, path: str) -> list:
+        if not self.command:
+            raise Exception("espeak-ng introuvable (clé command de la section [tts])")
+        # Un texte commençant par « - » serait lu comme une option
+        return [
+            self.command,
+            "-v",
+            self.voice or language_code,
+            "-w",
+            path,
+            text.lstrip("-"),
+        ]
+
+    def synthesize(self, text: str, language_code: str, path: str):
+        result = subprocess.run(
+            self._args(text, language_code, path),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        if result.returncode != 0:
+            raise Exception(
+                f"espeak-ng a échoué : {result.stderr.decode(errors='ignore')}"
+            )
+
+    def synthesize_many(self, texts: list, language_code: str, paths: list) -> list:
+        # Jusqu'à `workers` processus en parallèle, sans thread intermédiaire
+        results = [None] * len(texts)
+        running = []
+        for index, (text, path) in enumerate(zip(texts, paths)):
+            try:
+                process = subprocess.Popen(
+                    self._args(text, language_code, path),
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                )
+            except Exception as e:
+                results[index] = e
+                continue
+            running.append((index, process))
+            if len(running) >= self.workers:
+                self._wait(running.pop(0), results)
+        for item in running:
+            self._wait(item, results)
+        return results
+
+    @staticmethod
+    def _wait(item, results):
+        index, process = item
+        _, stderr = process.communicate()
+        if process.returncode != 0:
+            results[index] = Exception(
+                f"espeak-ng a échoué : {stderr.decode(errors='ignore')}"
+            )
+
+
+class FakeBackend(TTSBackend):
+    """Moteur factice, sans réseau ni dépendance : un WAV silencieux dont la durée
+    suit la longueur du texte (environ celle d'une lecture à voix haute).
+    Déterministe ; quelques échantillons inaudibles dérivés du texte rendent chaque
+    fichier unique, comme de vrais enregistrements. `delay` (secondes) simule la
+    latence d'un service distant."""
+
+    name = "fake"
+    extension = ".wav"
+    SAMPLE_RATE = 8000
+    MS_PER_CHARACTER = 70
+    MIN_DURATION_MS = 500
+
+    def __init__(
+        self, voice: str = "", workers: int = 1, delay: float = 0.0, **options
+    ):
+        super().__init__(voice, workers)
+        self.delay = delay
+
+    def synthesize(self, text: str, language_code: str, path: str):
+        if self.delay:
+            time.sleep(self.delay)
+        duration_ms = max(self.MIN_DURATION_MS, len(text) * self.MS_PER_CHARACTER)
+        frame_count = self.SAMPLE_RATE * duration_ms // 1000
+        digest = hashlib.sha256(f"{language_code}\0{text}".encode("utf-8")).digest()
+        signature = struct.pack(f"<{len(digest)}h", *(b % 3 - 1 for b in digest))
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.SAMPLE_RATE)
+            f.writeframes(signature + b"\x00\x00" * (frame_count - len(digest)))
+
+
+TTS_BACKENDS = {
+    GttsBackend.name: GttsBackend,
+    EspeakBackend.name: EspeakBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+_tts_config = {}
+_active_backend = None
+
+
+def create_backend(config: dict = None) -> TTSBackend:
+    config = dict(config or {})
+    name = config.pop("backend", DEFAULT_TTS_BACKEND)
+    backend_class = TTS_BACKENDS.get(name)
+    if backend_class is None:
+        logger.warning(
+            f"Moteur TTS inconnu « {name} », utilisation de {DEFAULT_TTS_BACKEND}"
+        )
+        backend_class = TTS_BACKENDS[DEFAULT_TTS_BACKEND]
+    return backend_class(**config)
+
+
+def configure_tts(config: dict = None):
+    """Applique la section [tts] de config.toml (appelé au démarrage)."""
+    global _tts_config, _active_backend
+    _tts_config = dict(config or {})
+    _active_backend = create_backend(_tts_config)
+    logger.info(f"Moteur TTS : {_active_backend.name}")
+
+
+def tts_config() -> dict:
+    return _tts_config
+
+
+def active_backend() -> TTSBackend:
+    """Moteur configuré (gTTS tant que configure_tts n'a pas été appelé)."""
+    global _active_backend
+    if _active_backend is None:
+        _active_backend = create_backend(_tts_config)
+    return _active_backend
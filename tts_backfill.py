@@ -0,0 +1,180 @@
+"""Génération en arrière-plan de l'audio TTS des entrées insérées sans média.
+
+Les imports (MassImporter, mode rapide de l'ajout) insèrent leurs entrées à l'état
+MEDIA_PENDING sans attendre la synthèse vocale. Un TtsBackfillThread par base
+récupère ces entrées par lots et confie chaque lot au moteur TTS configuré
+(synthesize_many : requêtes menées de front, débit plafonné par le moteur), avec
+plusieurs essais ; les fichiers obtenus sont attachés aux entrées en une
+transaction par lot. Les textes déjà synthétisés sont pris dans le cache TTS
+partagé.
+"""
+
+import threading
+from PySide6.QtCore import QThread, Signal
+from logger import logger
+from tts_backends import active_backend, tts_config
+from tts_cache import shared_tts_cache
+
+# Nouveaux essais après un échec, espacés de TTS_RETRY_DELAY puis du double, etc.
+TTS_MAX_RETRIES = 3
+TTS_RETRY_DELAY = 2.0
+# Entrées en attente traitées par lot (une transaction par lot)
+BACKFILL_BATCH_SIZE = 20
+
+
+class TtsBackfillThread(QThread):
+    progress = Signal(int, int)  # entrées traitées, total connu
+    record_ready = Signal(str, str)  # UUID, chemin du média
+    record_failed = Signal(str, str)  # UUID, message d'erreur
+    backfill_finished = Signal(int, int)  # réussies, échouées
+
+    def __init__(
+        self,
+        db_manager,
+        max_retries: int = TTS_MAX_RETRIES,
+        retry_delay: float = TTS_RETRY_DELAY,
+        backend=None,
+        cache=None,
+    ):
+        super().__init__()
+        self.db_manager = db_manager
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+        self.backend = backend or active_backend()
+        self.cache = cache or shared_tts_cache()
+        self._lock = threading.Lock()
+        self._rescan = False
+        self._done = False
+        # Posé par stop() ; interrompt aussi l'attente entre deux essais
+        self._stop_event = threading.Event()
+
+    def schedule(self) -> bool:
+        """Signale de nouvelles entrées en attente. Renvoie False si le thread a déjà
+        terminé (il faut alors en démarrer un autre)."""
+        with self._lock:
+            if self._done:
+                return False
+            self._rescan = True
+            return True
+
+    def stop(self):
+        """Interrompt le traitement ; les entrées non traitées restent en attente."""
+        self._stop_event.set()
+
+    def run(self):
+        done = succeeded = failed = 0
+        try:
+            while not self._stop_event.is_set():
+                batch = self.db_manager.pending_media(BACKFILL_BATCH_SIZE)
+                if not batch:
+                    with self._lock:
+                        if not self._rescan:
+                            self._done = True
+                            break
+                        self._rescan = False
+                    continue
+                total = done + self.db_manager.count_pending_media()
+
+                errors = {}
+                texts = {}
+                for entry_uuid, question, response in batch:
+                    try:
+                        texts[entry_uuid] = self.db_manager.tts_text(question, response)
+                    except Exception as e:
+                        errors[entry_uuid] = e
+                generated = self._generate(texts, errors)
+                if self._stop_event.is_set():
+                    # Interrompues, pas en échec : reprises au prochain démarrage
+                    errors = {
+                        entry_uuid: error
+                        for entry_uuid, error in errors.items()
+                        if entry_uuid not in texts
+                    }
+
+                attached = self.db_manager.attach_generated_media(generated)
+                for entry_uuid, path in attached:
+                    succeeded += 1
+                    self.record_ready.emit(entry_uuid, path)
+                # Audio généré mais non stocké : en échec, sinon repris en boucle
+                attached_uuids = {entry_uuid for entry_uuid, _ in attached}
+                for entry_uuid, _ in generated:
+                    if entry_uuid not in attached_uuids:
+                        errors[entry_uuid] = Exception("audio non stocké")
+                for entry_uuid, error in errors.items():
+                    logger.error(f"Audio TTS non généré pour {entry_uuid} : {error}")
+                    self.record_failed.emit(entry_uuid, str(error))
+                self.db_manager.mark_media_failed(list(errors))
+                failed += len(errors)
+                done += len(attached) + len(errors)
+                self.progress.emit(done, total)
+        except Exception as e:
+            logger.error(f"Arrêt de la génération TTS en arrière-plan : {e}")
+        finally:
+            with self._lock:
+                self._done = True
+            self.db_manager.release_connection()
+            logger.info(
+                f"Génération TTS en arrière-plan terminée : {succeeded} réussie(s), {failed} échec(s)."
+            )
+            self.backfill_finished.emit(succeeded, failed)
+
+    def _generate(self, texts: dict, errors: dict) -> list:
+        """Synthétise (ou prend dans le cache) les textes {UUID: texte} d'un lot ;
+        renvoie les (UUID, fichier) obtenus et complète `errors` avec les échecs
+        restants après les nouveaux essais."""
+        generated = []
+        remaining = dict(texts)
+        for attempt in range(self.max_retries + 1):
+            if not remaining:
+                break
+            delay = self.retry_delay * 2 ** (attempt - 1) if attempt else 0
+            if self._stop_event.wait(delay):
+                break
+            uuids = list(remaining)
+            results = self.cache.synthesize_many(
+                [remaining[entry_uuid] for entry_uuid in uuids],
+                self.db_manager.language_code,
+                self.backend,
+            )
+            for entry_uuid, result in zip(uuids, results):
+                if isinstance(result, Exception):
+                    errors[entry_uuid] = Exception(
+                        f"échec après {attempt + 1} essai(s) : {result}"
+                    )
+                    continue
+                errors.pop(entry_uuid, None)
+                generated.append((entry_uuid, result))
+                del remaining[entry_uuid]
+        return generated
+
+
+# Un thread de génération au plus par base (clé : chemin de la base)
+_backfill_threads = {}
+
+
+def start_tts_backfill(db_manager, **options) -> TtsBackfillThread:
+    """Lance (ou relance) la génération des audios en attente de `db_manager` et
+    renvoie le thread, dont les signaux permettent de suivre la progression.
+    Les nouveaux essais suivent la section [tts] (max_retries, retry_delay)."""
+    thread = _backfill_threads.get(db_manager.db_path)
+    if thread is not None and thread.schedule():
+        return thread
+    config = tts_config()
+    for key in ("max_retries", "retry_delay"):
+        if key in config:
+            options.setdefault(key, config[key])
+    thread = TtsBackfillThread(db_manager, **options)
+    _backfill_threads[db_manager.db_path] = thread
+    thread.start()
+    return thread
+
+
+def stop_tts_backfill(timeout_ms: int = 5000) -> bool:
+    """Arrête les générations en cours (fermeture de l'application). Renvoie False
+    si un thread tourne encore après `timeout_ms` : sa base ne doit pas être fermée."""
+    for thread in _backfill_threads.values():
+        thread.stop()
+    for db_path, thread in list(_backfill_threads.items()):
+        if thread.wait(timeout_ms):
+            del _backfill_threads[db_path]
+    return not _backfill_threads
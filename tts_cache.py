@@ -0,0 +1,276 @@
+"""Cache disque des audios TTS, partagé par toute l'application et conservé d'une
+session à l'autre.
+
+La clé d'un audio est une empreinte SHA-256 stable de (code langue, moteur et
+voix, texte normalisé) ; l'index (index.json dans le dossier du cache) garde les entrées de la
+moins récemment utilisée à la plus récente, et les plus anciennes sont évincées dès
+que la taille totale dépasse la limite.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from logger import logger
+from tts_backends import active_backend, tts_config
+
+TTS_CACHE_DIR = os.path.join(os.path.dirname(__file__), "tmp", "tts_cache")
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Formats des fichiers du cache (selon le moteur TTS)
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")
+# Un accès (hit) ne réécrit l'index qu'au plus une fois par intervalle
+INDEX_FLUSH_INTERVAL = 30.0
+
+
+class TtsCache:
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.directory, "index.json")
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._in_flight = {}  # clé -> threading.Event, synthèse en cours
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        # Compteurs de la session ; les totaux cumulés sont gardés dans l'index
+        self.hits = 0
+        self.misses = 0
+        self._entries, self._totals = self._load_index()
+        self.total_bytes = sum(entry["size"] for entry in self._entries.values())
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def key(cls, language_code: str, text: str, voice: str = "") -> str:
+        """Empreinte stable d'un audio (identique d'un processus à l'autre,
+        contrairement à hash())."""
+        material = "\0".join((language_code, voice or "", cls.normalize_text(text)))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        entries = OrderedDict()
+        totals = {"hits": 0, "misses": 0}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, file_name, size in data.get("entries", []):
+                entries[key] = {"file": file_name, "size": size}
+            totals.update(data.get("totals", {}))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Index du cache TTS illisible, reconstruit : {e}")
+        # Les fichiers disparus sont oubliés ; ceux écrits par un autre processus
+        # sans mise à jour de l'index sont repris comme les plus anciens
+        present = {
+            name
+            for name in os.listdir(self.directory)
+            if os.path.splitext(name)[1] in AUDIO_EXTENSIONS
+        }
+        for key in [k for k, entry in entries.items() if entry["file"] not in present]:
+            del entries[key]
+        known = {entry["file"] for entry in entries.values()}
+        for name in sorted(present - known):
+            path = os.path.join(self.directory, name)
+            key = os.path.splitext(name)[0]
+            entries[key] = {"file": name, "size": os.path.getsize(path)}
+            entries.move_to_end(key, last=False)
+        return entries, totals
+
+    def flush(self):
+        """Écrit l'index sur disque (remplacement atomique)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "entries": [
+                    [key, entry["file"], entry["size"]]
+                    for key, entry in self._entries.items()
+                ],
+                "totals": self._totals,
+            }
+            self._dirty = False
+            self._last_flush = time.monotonic()
+        handle, tmp_path = tempfile.mkstemp(suffix=".json", dir=self.directory)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.warning(f"Index du cache TTS non enregistré : {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, key: str):
+        """Chemin de l'audio en cache, ou None ; compte un succès ou un échec."""
+        with self._lock:
+            entry = self._entries.get(key)
+            path = os.path.join(self.directory, entry["file"]) if entry else None
+            if path and not os.path.exists(path):
+                self._forget(key)
+                path = None
+            if path is None:
+                self.misses += 1
+                self._totals["misses"] += 1
+                self._dirty = True
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._totals["hits"] += 1
+            self._dirty = True
+            flush_due = time.monotonic() - self._last_flush >= INDEX_FLUSH_INTERVAL
+        if flush_due:
+            self.flush()
+        return path
+
+    def put(self, key: str, src_path: str, extension: str = ".mp3") -> str:
+        """Déplace un fichier audio dans le cache sous la clé donnée et renvoie son
+        chemin ; évince les entrées les plus anciennes si la limite est dépassée."""
+        file_name = f"{key}{extension}"
+        path = os.path.join(self.directory, file_name)
+        os.replace(src_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries[key]["size"]
+            self._entries[key] = {"file": file_name, "size": size}
+            self._entries.move_to_end(key)
+            self.total_bytes += size
+            self._evict(keep=key)
+            self._dirty = True
+        self.flush()
+        return path
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.total_bytes -= entry["size"]
+        return entry
+
+    def _evict(self, keep: str):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            entry = self._forget(key)
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
+
+    def synthesize(self, text: str, language_code: str, backend=None) -> str:
+        """Renvoie le chemin d'un audio de `text`, synthétisé par `backend` (moteur
+        configuré par défaut) seulement s'il n'est pas déjà en cache."""
+        (result,) = self.synthesize_many([text], language_code, backend)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def synthesize_many(self, texts: list, language_code: str, backend=None) -> list:
+        """Version par lot : les textes absents du cache sont confiés ensemble au
+        moteur, qui peut mener ses requêtes de front. Renvoie, pour chaque texte,
+        le chemin de l'audio ou l'exception levée. Un texte déjà en cours de
+        synthèse dans un autre thread n'est pas redemandé : on attend son résultat."""
+        backend = backend or active_backend()
+        keys = [self.key(language_code, text, backend.voice_id) for text in texts]
+        paths = {}
+        owned = {}  # clé -> texte, synthèses lancées par cet appel
+        waiting = {}  # clé -> Event d'une synthèse lancée par un autre thread
+        for text, key in zip(texts, keys):
+            if key in paths or key in owned or key in waiting:
+                continue
+            path = self.get(key)
+            if path:
+                paths[key] = path
+                continue
+            with self._lock:
+                event = self._in_flight.get(key)
+                if event is None:
+                    self._in_flight[key] = threading.Event()
+                    owned[key] = text
+                else:
+                    waiting[key] = event
+
+        failures = {}
+        if owned:
+            owned_keys = list(owned)
+            tmp_paths = []
+            try:
+                for _ in owned_keys:
+                    handle, tmp_path = tempfile.mkstemp(
+                        suffix=".part", dir=self.directory
+                    )
+                    os.close(handle)
+                    tmp_paths.append(tmp_path)
+                errors = backend.synthesize_many(
+                    [owned[key] for key in owned_keys], language_code, tmp_paths
+                )
+                for key, tmp_path, error in zip(owned_keys, tmp_paths, errors):
+                    if error is not None:
+                        failures[key] = error
+                        continue
+                    try:
+                        paths[key] = self.put(key, tmp_path, backend.extension)
+                    except Exception as e:
+                        failures[key] = e
+            except Exception as e:
+                for key in owned_keys:
+                    failures.setdefault(key, e)
+            finally:
+                for tmp_path in tmp_paths:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                with self._lock:
+                    for key in owned_keys:
+                        self._in_flight.pop(key).set()
+
+        for key, event in waiting.items():
+            event.wait()
+            paths[key] = self._peek(key)
+        return [
+            failures.get(key)
+            or paths.get(key)
+            or Exception("audio TTS non généré par un autre thread")
+            for key in keys
+        ]
+
+    def _peek(self, key: str):
+        """Chemin d'une entrée présente, sans compter d'accès."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return os.path.join(self.directory, entry["file"]) if entry else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "total_hits": self._totals["hits"],
+                "total_misses": self._totals["misses"],
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_tts_cache() -> TtsCache:
+    """Instance du cache partagée par le processus (créée au premier appel)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            max_mb = tts_config().get("cache_max_mb")
+            _shared_cache = TtsCache(
+                max_bytes=max_mb * 1024 * 1024 if max_mb else TTS_CACHE_MAX_BYTES
+            )
+            atexit.register(_shared_cache.flush)
+        return _shared_cache
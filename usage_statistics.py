@@ -1,13 +1,373 @@
-import os
+"""Statistiques de révision, stockées dans la base.
+
+Chaque réponse vérifiée est un événement de la table review_events (UUID de
+l'entrée, horodatage, mode, réponses justes et total, temps de réponse). Des
+déclencheurs tiennent à jour review_daily, un cumul par jour et par mode : les
+statistiques d'années d'historique se lisent sur quelques centaines de lignes.
+
+Les événements sont écrits par lots par un thread (ReviewEventWriter) : la
+fenêtre de révision n'attend jamais la base. L'ancien fichier usage_stats.json
+(compteurs globaux et jours d'utilisation) est repris dans review_daily puis
+supprimé.
+"""
+
+import datetime
 import json
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton
+import os
+import threading
+import time
+from PySide6.QtSql import QSqlQuery
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+)
+from logger import logger
+
+STATS_FILE = "usage_stats.json"  # Ancien format, repris au démarrage
+
+MODE_RETRIEVAL = "retrieval"
+MODE_REVIEW = "review"
+# Compteurs repris de usage_stats.json, sans détail par jour ni par entrée
+LEGACY_MODES = {"legacy-retrieval": MODE_RETRIEVAL, "legacy-review": MODE_REVIEW}
+
+# Événements écrits au plus tard après REVIEW_FLUSH_INTERVAL (s), ou dès
+# REVIEW_BATCH_SIZE événements en attente
+REVIEW_FLUSH_INTERVAL = 2.0
+REVIEW_BATCH_SIZE = 200
+
+_EVENT_COLUMNS = (
+    "UUID",
+    "reviewed_at",
+    "day",
+    "mode",
+    "correct",
+    "total",
+    "latency_ms",
+)
+
+
+class ReviewStats:
+    """Accès à review_events et review_daily (connexion du thread appelant)."""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def _select(self, statement: str, params: list = None) -> list:
+        query = QSqlQuery(self.db_manager.db)
+        query.setForwardOnly(True)
+        query.prepare(statement)
+        for param in params or []:
+            query.addBindValue(param)
+        if not query.exec_():
+            raise Exception(f"Failed to execute query: {query.lastError().text()}")
+        columns = query.record().count()
+        rows = []
+        while query.next():
+            rows.append(
+                tuple(
+                    None if query.isNull(i) else query.value(i) for i in range(columns)
+                )
+            )
+        query.finish()
+        return rows
+
+    def record_events(self, events: list):
+        """Insère des événements (tuples dans l'ordre de _EVENT_COLUMNS) en une
+        transaction ; review_daily est mise à jour par déclencheur."""
+        db = self.db_manager.db
+        if not db.transaction():
+            raise Exception(
+                f"Impossible de démarrer la transaction : {db.lastError().text()}"
+            )
+        try:
+            query = QSqlQuery(db)
+            query.prepare(
+                f"INSERT INTO review_events ({', '.join(_EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(_EVENT_COLUMNS))})"
+            )
+            for column in zip(*events):
+                query.addBindValue(list(column))
+            if not query.execBatch():
+                raise Exception(query.lastError().text())
+            if not db.commit():
+                raise Exception(db.lastError().text())
+        except Exception:
+            db.rollback()
+            raise
+
+    def totals(self) -> dict:
+        """Cumuls par mode : {mode: (événements, réponses justes, réponses)}."""
+        totals = {MODE_RETRIEVAL: [0, 0, 0], MODE_REVIEW: [0, 0, 0]}
+        for mode, events, correct, total in self._select(
+            "SELECT mode, SUM(events), SUM(correct), SUM(total) FROM review_daily GROUP BY mode"
+        ):
+            counters = totals.get(LEGACY_MODES.get(mode, mode))
+            if counters is not None:
+                counters[0] += events or 0
+                counters[1] += correct or 0
+                counters[2] += total or 0
+        return {mode: tuple(counters) for mode, counters in totals.items()}
+
+    def daily(self, days: int = 30) -> list:
+        """Derniers jours d'utilisation, du plus récent au plus ancien :
+        (jour, entrées vérifiées, réponses justes, réponses, temps moyen en ms)."""
+        rows = self._select(
+            """
+            SELECT day, SUM(events), SUM(correct), SUM(total), SUM(timed), SUM(latency_ms)
+            FROM review_daily
+            WHERE mode IN (?, ?)
+            GROUP BY day
+            ORDER BY day DESC
+            LIMIT ?
+            """,
+            [MODE_RETRIEVAL, MODE_REVIEW, days],
+        )
+        return [
+            (day, events, correct, total, latency // timed if timed else None)
+            for day, events, correct, total, timed, latency in rows
+        ]
+
+    def active_days(self) -> list:
+        """Jours d'utilisation, dans l'ordre chronologique."""
+        return [
+            day
+            for (day,) in self._select(
+                "SELECT DISTINCT day FROM review_daily ORDER BY day"
+            )
+        ]
+
+    def streaks(self, today: datetime.date = None) -> tuple:
+        """Série en cours (jours consécutifs jusqu'à aujourd'hui ou hier) et plus
+        longue série."""
+        today = today or datetime.date.today()
+        current = longest = 0
+        previous = None
+        for day in map(datetime.date.fromisoformat, self.active_days()):
+            run = current + 1 if previous and (day - previous).days == 1 else 1
+            current, previous = run, day
+            longest = max(longest, run)
+        if previous is None or (today - previous).days > 1:
+            current = 0
+        return current, longest
+
+    def hardest_records(self, limit: int = 10, min_attempts: int = 2) -> list:
+        """Entrées les plus souvent manquées :
+        (UUID, question, vérifications, taux d'erreur)."""
+        return self._select(
+            """
+            SELECT e.UUID, r.question, e.attempts, e.error_rate
+            FROM (
+                SELECT UUID, COUNT(*) AS attempts,
+                       1.0 * SUM(total - correct) / SUM(total) AS error_rate
+                FROM review_events
+                WHERE mode = ? AND total > 0
+                GROUP BY UUID
+                HAVING COUNT(*) >= ? AND SUM(total - correct) > 0
+            ) AS e
+            JOIN records AS r ON r.UUID = e.UUID
+            ORDER BY e.error_rate DESC, e.attempts DESC
+            LIMIT ?
+            """,
+            [MODE_RETRIEVAL, min_attempts, limit],
+        )
+
+    def import_legacy_file(self, path: str = STATS_FILE) -> bool:
+        """Reprend les compteurs de usage_stats.json dans review_daily (sur le
+        premier jour connu, les autres jours étant gardés pour les séries), puis
+        supprime le fichier."""
+        if not os.path.exists(path):
+            return False
+        with open(path, "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        days = stats.get("dates") or [datetime.date.today().isoformat()]
+        rows = []
+        for index, day in enumerate(days):
+            first = index == 0
+            rows.append(
+                (
+                    day,
+                    "legacy-retrieval",
+                    stats.get("retrieval_count", 0) if first else 0,
+                    stats.get("correct_count", 0) if first else 0,
+                    stats.get("answered_count", 0) if first else 0,
+                )
+            )
+            if first:
+                rows.append((day, "legacy-review", stats.get("review_count", 0), 0, 0))
+        db = self.db_manager.db
+        if not db.transaction():
+            raise Exception(
+                f"Impossible de démarrer la transaction : {db.lastError().text()}"
+            )
+        try:
+            query = QSqlQuery(db)
+            query.prepare(
+                """
+                INSERT INTO review_daily (day, mode, events, correct, total)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (day, mode) DO UPDATE SET
+                    events = events + excluded.events,
+                    correct = correct + excluded.correct,
+                    total = total + excluded.total
+                """
+            )
+            for row in rows:
+                for value in row:
+                    query.addBindValue(value)
+                if not query.exec_():
+                    raise Exception(query.lastError().text())
+            if not db.commit():
+                raise Exception(db.lastError().text())
+        except Exception:
+            db.rollback()
+            raise
+        os.remove(path)
+        logger.info(f"Statistiques {path} reprises dans la base ({len(days)} jours).")
+        return True
+
+
+class ReviewEventWriter:
+    """Écrit les événements de révision par lots, dans un thread d'écriture."""
+
+    def __init__(
+        self,
+        db_manager,
+        flush_interval: float = REVIEW_FLUSH_INTERVAL,
+        batch_size: int = REVIEW_BATCH_SIZE,
+    ):
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._condition = threading.Condition()
+        self._pending = []
+        self._writing = False
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(
+        self,
+        uuid: str,
+        mode: str,
+        correct: int = None,
+        total: int = None,
+        latency_ms: int = None,
+    ):
+        """Ajoute un événement ; il sera écrit avec le prochain lot."""
+        now = time.time()
+        day = datetime.date.fromtimestamp(now).isoformat()
+        with self._condition:
+            if self._closed:
+                return
+            self._pending.append((uuid, now, day, mode, correct, total, latency_ms))
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Écrit sans attendre les événements en attente. Renvoie False si
+        l'écriture n'est pas terminée à l'échéance."""
+        with self._condition:
+            if self._pending:
+                self._flush_requested = True
+                self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._writing, timeout
+            )
+
+    def close(self, timeout: float = 5.0):
+        """Écrit les événements en attente puis arrête le thread d'écriture."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        stats = ReviewStats(self.db_manager)
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._pending or self._closed)
+                    # Regroupe les événements arrivés pendant l'intervalle
+                    self._condition.wait_for(
+                        lambda: self._closed
+                        or self._flush_requested
+                        or len(self._pending) >= self.batch_size,
+                        self.flush_interval,
+                    )
+                    if not self._pending:
+                        self._flush_requested = False
+                        self._condition.notify_all()
+                        if self._closed:
+                            return
+                        continue
+                    batch, self._pending = self._pending, []
+                    self._writing = True
+                try:
+                    stats.record_events(batch)
+                    batch = []
+                except Exception as e:
+                    logger.error(f"Écriture des statistiques de révision : {e}")
+                finally:
+                    with self._condition:
+                        self._writing = False
+                        if batch and not self._closed:
+                            # Nouvel essai avec le lot suivant
+                            self._pending[:0] = batch
+                        elif batch:
+                            logger.error(
+                                f"{len(batch)} événement(s) de révision perdus."
+                            )
+                        if not self._pending:
+                            self._flush_requested = False
+                        self._condition.notify_all()
+        finally:
+            self.db_manager.release_connection()
+
+
+_review_writers = {}
+
+
+def start_review_log(db_manager) -> ReviewEventWriter:
+    """Démarre (une fois par base) l'écriture des événements de révision et
+    renvoie l'écrivain ; l'ancien fichier usage_stats.json est repris."""
+    writer = _review_writers.get(db_manager.db_path)
+    if writer is not None:
+        return writer
+    try:
+        ReviewStats(db_manager).import_legacy_file()
+    except Exception as e:
+        logger.error(f"Reprise de {STATS_FILE} impossible : {e}")
+    writer = ReviewEventWriter(db_manager)
+    _review_writers[db_manager.db_path] = writer
+    return writer
 
-STATS_FILE = "usage_stats.json"
+
+def flush_review_log(timeout: float = 2.0):
+    """Écrit les événements en attente (avant d'afficher les statistiques)."""
+    for writer in _review_writers.values():
+        writer.flush(timeout)
+
+
+def stop_review_log(timeout: float = 5.0):
+    """Écrit les événements en attente et arrête l'écriture (fermeture)."""
+    for writer in _review_writers.values():
+        writer.close(timeout)
+    _review_writers.clear()
+
+
+def _percent(correct, total):
+    return f"{100 * correct / total:.1f}%" if total else "N/A"
 
 
 class StatisticsApp(QDialog):
-    def __init__(self, font_size=12, parent=None):
+    def __init__(self, db_manager, font_size=12, parent=None):
         super().__init__(parent)
+        self.db_manager = db_manager
         self.setWindowTitle("Statistiques d'utilisation")
         self.setStyleSheet(f"* {{ font-size: {font_size}px; }}")
         self.layout = QVBoxLayout(self)
@@ -18,25 +378,69 @@ class StatisticsApp(QDialog):
         self.layout.addWidget(close_btn)
 
     def load_and_display_stats(self):
-        if not os.path.exists(STATS_FILE):
+        flush_review_log()
+        stats = ReviewStats(self.db_manager)
+        try:
+            totals = stats.totals()
+            days = stats.daily()
+            current_streak, longest_streak = stats.streaks()
+            hardest = stats.hardest_records()
+        except Exception as e:
+            logger.error(f"Lecture des statistiques impossible : {e}")
+            self.layout.addWidget(QLabel("Statistiques indisponibles."))
+            return
+        retrieval_count, total_correct, total_answered = totals[MODE_RETRIEVAL]
+        review_count = totals[MODE_REVIEW][0]
+        if not retrieval_count and not review_count:
             self.layout.addWidget(QLabel("Aucune statistique disponible."))
             return
-        with open(STATS_FILE, "r", encoding="utf-8") as f:
-            stats = json.load(f)
-        total_retrieval = stats.get("retrieval_count", 0)
-        total_review = stats.get("review_count", 0)
-        total_correct = stats.get("correct_count", 0)
-        total_answered = stats.get("answered_count", 0)
-        accuracy = (
-            f"{(100 * total_correct / total_answered):.1f}%"
-            if total_answered
-            else "N/A"
+
+        self.layout.addWidget(QLabel(f"Éléments parcourus : {retrieval_count}"))
+        self.layout.addWidget(QLabel(f"Éléments vus en mode revue : {review_count}"))
+        self.layout.addWidget(
+            QLabel(f"Taux d'exactitude : {_percent(total_correct, total_answered)}")
+        )
+        self.layout.addWidget(
+            QLabel(
+                f"Série en cours : {current_streak} jour(s) — meilleure série : {longest_streak} jour(s)"
+            )
         )
-        last_dates = stats.get("dates", [])
-        self.layout.addWidget(QLabel(f"Éléments parcourus : {total_retrieval}"))
-        self.layout.addWidget(QLabel(f"Éléments vus en mode revue : {total_review}"))
-        self.layout.addWidget(QLabel(f"Taux d'exactitude : {accuracy}"))
-        if last_dates:
+
+        if days:
+            self.layout.addWidget(QLabel("Derniers jours :"))
             self.layout.addWidget(
-                QLabel(f"Dernières sessions : {', '.join(last_dates[-5:])}")
+                self._table(
+                    ["Jour", "Entrées", "Exactitude", "Temps moyen"],
+                    [
+                        (
+                            day,
+                            str(events),
+                            _percent(correct, total),
+                            f"{latency / 1000:.1f} s" if latency is not None else "",
+                        )
+                        for day, events, correct, total, latency in days
+                    ],
+                )
             )
+        if hardest:
+            self.layout.addWidget(QLabel("Entrées les plus souvent manquées :"))
+            self.layout.addWidget(
+                self._table(
+                    ["Question", "Vérifications", "Taux d'erreur"],
+                    [
+                        (question, str(attempts), f"{100 * error_rate:.0f}%")
+                        for _uuid, question, attempts, error_rate in hardest
+                    ],
+                )
+            )
+
+    def _table(self, headers, rows):
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+        return table